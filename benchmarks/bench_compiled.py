@@ -0,0 +1,58 @@
+"""
+Prediction latency of the compiled tree ensembles in
+ml_utils/model/compiled.py against the scikit-learn models they were
+compiled from, for batches of --batch-sizes rows of the sample CSV. Each
+model is fitted here (--n-estimators trees) and the predictions of both
+forms are checked to be identical before timing.
+
+    python -m benchmarks.bench_compiled --n-estimators 256 --batch-sizes 1 16 64 256
+"""
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from network_security.constants.training_pipeline import TARGET_COLUMN
+from network_security.utils.ml_utils.model.compiled import compile_model
+
+SAMPLE_FILE_PATH = os.path.join("network_data", "phisingData.csv")
+
+
+def best_time(function, X, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function(X)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n-estimators", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    sample = pd.read_csv(SAMPLE_FILE_PATH)
+    X = sample.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float64)
+    y = sample[TARGET_COLUMN].replace(-1, 0).to_numpy()
+
+    models = {
+        "Decision Tree": DecisionTreeClassifier(random_state=42),
+        "Random Forest": RandomForestClassifier(n_estimators=args.n_estimators, random_state=42),
+        "Gradient Boosting": GradientBoostingClassifier(n_estimators=args.n_estimators, random_state=42),
+    }
+    for name, model in models.items():
+        model.fit(X, y)
+        compiled = compile_model(model)
+        assert np.array_equal(model.predict(X), compiled.predict(X))
+        for batch_size in args.batch_sizes:
+            batch = X[:batch_size]
+            baseline = best_time(model.predict, batch, args.repeats)
+            seconds = best_time(compiled.predict, batch, args.repeats)
+            print(f"{name:>18} rows={batch_size:5d}: sklearn={baseline * 1000:8.3f} ms "
+                  f"compiled={seconds * 1000:8.3f} ms speedup={baseline / seconds:6.1f}x")
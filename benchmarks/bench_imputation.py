@@ -0,0 +1,76 @@
+"""
+Compare the imputation strategies with scikit-learn's KNNImputer (the "knn"
+strategy) on time, peak memory and accuracy.
+
+A synthetic feature matrix of --rows rows is sampled from the sample CSV and
+a --missing-rate fraction of its cells is hidden. Every strategy is fitted and
+applied to the matrix; accuracy is the share of hidden cells whose imputed
+value, rounded, is the original one. "agrees" is the share of hidden cells
+imputed to the same value as KNNImputer. Peak memory is the largest amount of
+memory traced during fit + transform.
+
+    python -m benchmarks.bench_imputation --rows 50000
+"""
+import os
+import time
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from network_security.constants.training_pipeline import (
+    TARGET_COLUMN,
+    DATA_TRANSFORMATION_IMPUTER_PARAMS,
+)
+from network_security.utils.ml_utils.impute.imputer import IMPUTER_STRATEGIES, get_imputer
+
+SAMPLE_FILE_PATH = os.path.join("network_data", "phisingData.csv")
+
+
+def build_features(n_rows: int, missing_rate: float, seed: int = 42):
+    sample = pd.read_csv(SAMPLE_FILE_PATH).drop(columns=[TARGET_COLUMN])
+    rng = np.random.default_rng(seed)
+    truth = sample.to_numpy(dtype=np.float64)[rng.integers(0, len(sample), n_rows)]
+    hidden = rng.random(truth.shape) < missing_rate
+    features = truth.copy()
+    features[hidden] = np.nan
+    return truth, features, hidden
+
+
+def run(strategy: str, features: np.ndarray):
+    imputer = get_imputer(strategy, DATA_TRANSFORMATION_IMPUTER_PARAMS)
+    tracemalloc.start()
+    started = time.perf_counter()
+    imputed = imputer.fit(features).transform(features)
+    seconds = time.perf_counter() - started
+    peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return imputed, seconds, peak_mb
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--missing-rate", type=float, default=0.01)
+    parser.add_argument("--strategies", nargs="+", default=list(IMPUTER_STRATEGIES))
+    args = parser.parse_args()
+
+    truth, features, hidden = build_features(args.rows, args.missing_rate)
+    print(f"{args.rows} rows, {int(hidden.sum())} hidden cells "
+          f"in {int(hidden.any(axis=1).sum())} rows")
+
+    results = {}
+    if "knn" in args.strategies:
+        results["knn"] = run("knn", features)
+    reference, baseline = results["knn"][:2] if results else (None, None)
+    for strategy in args.strategies:
+        if strategy not in results:
+            results[strategy] = run(strategy, features)
+        imputed, seconds, peak_mb = results[strategy]
+        accuracy = (np.round(imputed[hidden]) == truth[hidden]).mean()
+        line = (f"{strategy:>16} time={seconds:8.3f}s peak={peak_mb:8.1f} MB "
+                f"accuracy={accuracy:.4f}")
+        if reference is not None:
+            agrees = (np.round(imputed[hidden]) == np.round(reference[hidden])).mean()
+            line += f" agrees={agrees:.4f} speedup={baseline / seconds:7.1f}x"
+        print(line)
@@ -0,0 +1,81 @@
+"""
+Benchmark DataIngestion export throughput against the number of workers.
+
+Runs against the MongoDB at MONGO_DB_URI when it is set, otherwise against an
+in-process mongomock stand-in (pip install mongomock). The sample CSV is
+replicated to --rows documents in a scratch collection that is dropped
+afterwards.
+
+    python -m benchmarks.bench_ingestion --rows 200000 --workers 1 2 4 8
+"""
+import os
+import time
+import argparse
+import pandas as pd
+
+from network_security.components import data_ingestion
+from network_security.components.data_ingestion import DataIngestion
+from network_security.entity.config import DataIngestionConfig, TrainingPipelineConfig
+
+SAMPLE_FILE_PATH = os.path.join("network_data", "phisingData.csv")
+BENCH_DATABASE_NAME = "NetworkSecurityBenchmark"
+BENCH_COLLECTION_NAME = "PhishingDataBenchmark"
+
+
+def get_client():
+    uri = os.getenv("MONGO_DB_URI")
+    if uri:
+        import pymongo
+
+        return pymongo.MongoClient(uri)
+
+    import mongomock
+
+    client = mongomock.MongoClient()
+    # Route DataIngestion to the stand-in instead of a real server
+    data_ingestion.get_mongo_client = lambda *args, **kwargs: client
+    return client
+
+
+def seed_collection(collection, n_rows: int) -> None:
+    sample = pd.read_csv(SAMPLE_FILE_PATH)
+    repeats = -(-n_rows // len(sample))
+    df = pd.concat([sample] * repeats, ignore_index=True).iloc[:n_rows]
+    collection.drop()
+    for start in range(0, n_rows, 50_000):
+        collection.insert_many(df.iloc[start:start + 50_000].to_dict("records"))
+
+
+def run(n_rows: int, workers: list, batch_size: int) -> None:
+    client = get_client()
+    collection = client[BENCH_DATABASE_NAME][BENCH_COLLECTION_NAME]
+    seed_collection(collection, n_rows)
+
+    config = DataIngestionConfig(tp_config=TrainingPipelineConfig())
+    config.database_name = BENCH_DATABASE_NAME
+    config.collection_name = BENCH_COLLECTION_NAME
+    config.batch_size = batch_size
+
+    try:
+        modes = [("streaming", 1)] + [("parallel", n) for n in workers]
+        for mode, num_workers in modes:
+            config.export_mode = mode
+            config.num_workers = num_workers
+            started = time.perf_counter()
+            df = DataIngestion(config).export_collection_as_df()
+            elapsed = time.perf_counter() - started
+            print(
+                f"{mode:>9} workers={num_workers:<3} rows={len(df):<9} "
+                f"time={elapsed:8.2f}s rows/sec={len(df) / elapsed:12,.0f}"
+            )
+    finally:
+        collection.drop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+    run(args.rows, args.workers, args.batch_size)
@@ -0,0 +1,87 @@
+"""
+Compare peak RSS of loading the feature store with pandas' default dtypes
+(int64/float64) against the schema's compact dtype plan (Int8).
+
+A synthetic store of --rows rows is sampled from the sample CSV (with a small
+fraction of "na" values) in both csv and npy artifact formats; each
+measurement runs in a fresh subprocess so peak RSS is not shared.
+
+    python -m benchmarks.bench_memory --rows 10000000
+"""
+import os
+import sys
+import argparse
+import resource
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+
+from network_security.constants.training_pipeline import SCHEMA_FILE_PATH
+from network_security.utils.main_utils.utils import (
+    read_yaml_file,
+    load_dataframe,
+    save_dataframe,
+    get_compact_dtype_plan,
+)
+
+SAMPLE_FILE_PATH = os.path.join("network_data", "phisingData.csv")
+
+
+def build_store(dir_path: str, n_rows: int, missing_rate: float) -> None:
+    sample = pd.read_csv(SAMPLE_FILE_PATH)
+    rng = np.random.default_rng(42)
+    dtype_plan = get_compact_dtype_plan(read_yaml_file(SCHEMA_FILE_PATH))
+    df = sample.iloc[rng.integers(0, len(sample), n_rows)].reset_index(drop=True)
+    df = df.astype(dtype_plan)
+    features = df.columns.drop("Result")
+    df[features] = df[features].mask(rng.random((n_rows, len(features))) < missing_rate)
+    save_dataframe(os.path.join(dir_path, "store.csv"), df)
+    save_dataframe(os.path.join(dir_path, "store.cols"), df)
+
+
+def peak_rss_mb() -> float:
+    # VmHWM belongs to this process image; ru_maxrss may carry the parent's peak
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(file_path: str, compact: bool) -> None:
+    dtypes = get_compact_dtype_plan(read_yaml_file(SCHEMA_FILE_PATH)) if compact else None
+    baseline_mb = peak_rss_mb()
+    if compact or not file_path.endswith(".csv"):
+        df = load_dataframe(file_path, mmap=False, dtypes=dtypes)
+    else:
+        df = pd.read_csv(file_path, na_values=["na"])
+    frame_mb = df.memory_usage(deep=True).sum() / 2**20
+    peak_mb = peak_rss_mb()
+    print(f"{os.path.basename(file_path):>10} compact={compact!s:<5} "
+          f"frame={frame_mb:9.1f} MB peak_rss={peak_mb:9.1f} MB "
+          f"(+{peak_mb - baseline_mb:.1f} MB over imports)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--missing-rate", type=float, default=0.001)
+    parser.add_argument("--measure", nargs=2, metavar=("FILE_PATH", "COMPACT"))
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure[0], args.measure[1] == "1")
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as dir_path:
+        build_store(dir_path, args.rows, args.missing_rate)
+        for file_name, compact in [("store.csv", "0"), ("store.csv", "1"), ("store.cols", "1")]:
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_memory", "--measure",
+                 os.path.join(dir_path, file_name), compact],
+                check=True,
+            )
@@ -0,0 +1,61 @@
+"""
+Time to score many prediction vectors: scikit-learn's f1/precision/recall
+(one validation and confusion matrix per metric and vector, as
+get_classification_score used to) against the batched engine in
+ml_utils/metric/classification.py, for --vectors random prediction vectors
+of --rows samples. The same comparison is made for --thresholds decision
+thresholds over one score vector.
+
+    python -m benchmarks.bench_metrics --rows 10000 --vectors 300 --thresholds 1000
+"""
+import time
+import argparse
+import numpy as np
+from sklearn.metrics import f1_score, precision_score, recall_score
+
+from network_security.utils.ml_utils.metric.classification import (
+    get_classification_scores,
+    get_threshold_classification_scores,
+)
+
+
+def sklearn_scores(y_true, y_pred):
+    return (
+        f1_score(y_true, y_pred, zero_division=0),
+        precision_score(y_true, y_pred, zero_division=0),
+        recall_score(y_true, y_pred, zero_division=0),
+    )
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--vectors", type=int, default=300)
+    parser.add_argument("--thresholds", type=int, default=1_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    y_true = rng.integers(0, 2, args.rows)
+    y_preds = np.where(rng.random((args.vectors, args.rows)) < 0.9, y_true, 1 - y_true)
+    y_score = np.clip(y_true + rng.normal(0, 0.6, args.rows), 0, 1)
+    thresholds = np.linspace(0, 1, args.thresholds)
+
+    reference, baseline = timed(lambda: [sklearn_scores(y_true, y_pred) for y_pred in y_preds])
+    batched, seconds = timed(get_classification_scores, y_true, y_preds)
+    assert np.allclose(reference, [(m.f1_score, m.precision_score, m.recall_score) for m in batched])
+    print(f"{args.vectors} vectors x {args.rows} rows: sklearn={baseline:7.3f}s "
+          f"batched={seconds:7.3f}s speedup={baseline / seconds:7.1f}x")
+
+    reference, baseline = timed(
+        lambda: [sklearn_scores(y_true, (y_score >= threshold).astype(int)) for threshold in thresholds]
+    )
+    batched, seconds = timed(get_threshold_classification_scores, y_true, y_score, thresholds)
+    assert np.allclose(reference, [(m.f1_score, m.precision_score, m.recall_score) for m in batched])
+    print(f"{args.thresholds} thresholds x {args.rows} rows: sklearn={baseline:7.3f}s "
+          f"batched={seconds:7.3f}s speedup={baseline / seconds:7.1f}x")
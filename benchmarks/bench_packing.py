@@ -0,0 +1,68 @@
+"""
+Memory and speed of the 2-bit row packing in utils/main_utils/packing.py on
+the sample CSV (tiled --repeat times, with --missing-rate of the cells
+blanked): bytes per row against int64 and int8 frames, pack/unpack
+throughput, deduplication against np.unique(axis=0), and XOR/popcount
+Hamming distances of --queries rows to all rows against a float comparison.
+
+    python -m benchmarks.bench_packing --repeat 20 --missing-rate 0.01 --queries 256
+"""
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from network_security.constants.training_pipeline import TARGET_COLUMN
+from network_security.utils.main_utils.packing import hamming_distances, pack_rows, unique_rows, unpack_rows
+
+SAMPLE_FILE_PATH = os.path.join("network_data", "phisingData.csv")
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def float_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Missing is a value of its own, as in hamming_distances
+    a, b = np.nan_to_num(a, nan=np.inf), np.nan_to_num(b, nan=np.inf)
+    return (a[:, np.newaxis, :] != b[np.newaxis, :, :]).sum(axis=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--missing-rate", type=float, default=0.01)
+    parser.add_argument("--queries", type=int, default=256)
+    args = parser.parse_args()
+
+    features = pd.read_csv(SAMPLE_FILE_PATH).drop(columns=[TARGET_COLUMN])
+    features = pd.concat([features] * args.repeat, ignore_index=True)
+    rng = np.random.default_rng(42)
+    X = features.mask(rng.random(features.shape) < args.missing_rate).to_numpy(dtype=np.float64)
+    n_rows, n_features = X.shape
+
+    packed, pack_seconds = timed(pack_rows, X)
+    unpacked, unpack_seconds = timed(unpack_rows, packed, n_features)
+    assert np.array_equal(unpacked, X, equal_nan=True)
+    print(f"{n_rows} rows x {n_features} features: int64={n_rows * n_features * 8 / 2**20:7.2f} MiB "
+          f"int8={n_rows * n_features / 2**20:7.2f} MiB packed={packed.nbytes / 2**20:7.2f} MiB "
+          f"({X.nbytes / packed.nbytes:.0f}x smaller than int64)")
+    print(f"pack={n_rows / pack_seconds / 1e6:6.2f} M rows/s unpack={n_rows / unpack_seconds / 1e6:6.2f} M rows/s")
+
+    (reference, reference_counts), baseline = timed(
+        np.unique, np.where(np.isnan(X), np.inf, X), axis=0, return_counts=True
+    )
+    (unique, counts), seconds = timed(unique_rows, packed, return_counts=True)
+    assert np.array_equal(counts, reference_counts)
+    print(f"dedupe to {len(unique)} rows: np.unique(axis=0)={baseline:7.3f}s packed={seconds:7.3f}s "
+          f"speedup={baseline / seconds:6.1f}x")
+
+    queries = X[rng.choice(n_rows, args.queries, replace=False)]
+    reference, baseline = timed(float_distances, queries, X[: min(n_rows, 20_000)])
+    distances, seconds = timed(hamming_distances, pack_rows(queries), packed[: min(n_rows, 20_000)])
+    assert np.array_equal(distances, reference)
+    print(f"{args.queries} x {min(n_rows, 20_000)} distances: float={baseline:7.3f}s "
+          f"xor/popcount={seconds:7.3f}s speedup={baseline / seconds:6.1f}x")
@@ -0,0 +1,131 @@
+"""
+Wall time of the model trainer's hyperparameter search and how it scales with
+the number of worker processes.
+
+The baseline is the former search: one GridSearchCV per candidate model, one
+after the other, in a single process. parallel_grid_search is then timed for
+every --jobs value (default 1, 2, 4, ... up to the number of cores) on the
+same data and grids, and its speedup over the baseline is reported. The
+training matrix is written to an .npy file and memory-mapped, as the trainer
+reads it.
+
+--mode halving times the successive halving search instead, over
+--resource (n_estimators or n_samples), optionally bounded by --budget
+seconds. --no-path-fitting fits every n_estimators of a sweep from scratch.
+--deduplicate searches the distinct rows, weighted by their counts, as the
+trainer does with MODEL_TRAINER_DEDUPLICATE.
+
+    python -m benchmarks.bench_search --rows 20000 --jobs 1 2 4 8
+    python -m benchmarks.bench_search --mode halving --budget 60
+    python -m benchmarks.bench_search --deduplicate --skip-baseline --jobs 1
+"""
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import GridSearchCV
+
+from network_security.constants.training_pipeline import TARGET_COLUMN, MODEL_TRAINER_CV_FOLDS
+from network_security.utils.main_utils.utils import deduplicate_rows
+from network_security.utils.ml_utils.model.search import SEARCH_MODES, get_candidates, run_search
+
+SAMPLE_FILE_PATH = os.path.join("network_data", "phisingData.csv")
+
+
+def get_model_candidates():
+    # The trainer's candidates, without importing the trainer (it connects to
+    # the experiment tracker on import)
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.tree import DecisionTreeClassifier
+    from sklearn.ensemble import AdaBoostClassifier, GradientBoostingClassifier, RandomForestClassifier
+
+    models = {
+        "Random Forest": RandomForestClassifier(),
+        "Decision Tree": DecisionTreeClassifier(),
+        "Gradient Boosting": GradientBoostingClassifier(),
+        "Logistic Regression": LogisticRegression(),
+        "AdaBoost": AdaBoostClassifier(),
+    }
+    params = {
+        "Decision Tree": {"criterion": ["gini", "entropy", "log_loss"]},
+        "Random Forest": {"n_estimators": [8, 16, 32, 64, 128, 256]},
+        "Gradient Boosting": {
+            "learning_rate": [.1, .01, .001],
+            "subsample": [.6, .7, .8, .9],
+            "n_estimators": [8, 16, 32, 64, 128, 256],
+        },
+        "Logistic Regression": {},
+        "AdaBoost": {"learning_rate": [.1, .01, .001], "n_estimators": [8, 16, 32, 64, 128, 256]},
+    }
+    return models, params
+
+
+def get_default_jobs() -> list:
+    jobs, cores = [1], os.cpu_count() or 1
+    while jobs[-1] * 2 <= cores:
+        jobs.append(jobs[-1] * 2)
+    if jobs[-1] != cores:
+        jobs.append(cores)
+    return jobs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=11_055)
+    parser.add_argument("--jobs", type=int, nargs="+", default=get_default_jobs())
+    parser.add_argument("--models", nargs="+", default=None, help="subset of the candidate models")
+    parser.add_argument("--mode", choices=list(SEARCH_MODES), default="grid")
+    parser.add_argument("--budget", type=float, default=None, help="halving budget in seconds")
+    parser.add_argument("--resource", default="n_estimators", help="halving resource")
+    parser.add_argument("--no-path-fitting", action="store_true", help="fit every n_estimators from scratch")
+    parser.add_argument("--deduplicate", action="store_true", help="search the distinct rows with counts")
+    parser.add_argument("--skip-baseline", action="store_true")
+    args = parser.parse_args()
+
+    models, params = get_model_candidates()
+    if args.models:
+        models = {name: models[name] for name in args.models}
+
+    sample = pd.read_csv(SAMPLE_FILE_PATH)
+    rng = np.random.default_rng(42)
+    # Same layout as the transformed arrays: features, then the target
+    columns = [col for col in sample.columns if col != TARGET_COLUMN] + [TARGET_COLUMN]
+    data = sample[columns].to_numpy(dtype=np.int8)[rng.integers(0, len(sample), args.rows)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "train.npy")
+        np.save(file_path, data)
+        array = np.load(file_path, mmap_mode="r")
+        X, y = array[:, :-1], array[:, -1]
+
+        n_fits = len(get_candidates(models, params)) * MODEL_TRAINER_CV_FOLDS
+        print(f"{args.rows} rows, {len(models)} models, {n_fits} fits, {os.cpu_count()} cores")
+
+        baseline = None
+        if not args.skip_baseline:
+            started = time.perf_counter()
+            for name, model in models.items():
+                GridSearchCV(model, params[name], cv=MODEL_TRAINER_CV_FOLDS).fit(X, y)
+            baseline = time.perf_counter() - started
+            print(f"{'GridSearchCV':>14} time={baseline:8.2f}s")
+
+        # The baseline always runs on all rows
+        sample_weight = None
+        if args.deduplicate:
+            X, y, sample_weight = deduplicate_rows(X, y)
+            print(f"{args.rows} rows deduplicated to {len(X)} (compression ratio {args.rows / len(X):.2f})")
+
+        for n_jobs in args.jobs:
+            started = time.perf_counter()
+            results = run_search(
+                args.mode, models, params, X, y,
+                cv=MODEL_TRAINER_CV_FOLDS, n_jobs=n_jobs, budget_seconds=args.budget, resource=args.resource,
+                path_fitting=not args.no_path_fitting, sample_weight=sample_weight,
+            )
+            seconds = time.perf_counter() - started
+            best_score = max(result["best_score"] for result in results.values())
+            line = f"{f'n_jobs={n_jobs}':>14} time={seconds:8.2f}s best cv score={best_score:.4f}"
+            if baseline is not None:
+                line += f" speedup={baseline / seconds:6.2f}x"
+            print(line)
@@ -0,0 +1,151 @@
+"""
+Load generator for the inference server.
+
+--clients threads each send single-URL POST /predict requests (rows of the
+sample CSV, over keep-alive connections) back to back for --seconds, and
+the client-side p50/p99 latency and throughput are reported with the
+server's own counters. Without --url, a server is started in-process for
+every --max-wait-ms value (0 only batches requests that are already queued),
+on final_model/ when it exists or else on a small model fitted here, with
+the prediction cache unless --no-prediction-cache is given.
+
+    python -m benchmarks.bench_serving --clients 32 --seconds 10 --max-wait-ms 0 2 5
+    python -m benchmarks.bench_serving --url http://127.0.0.1:8000 --clients 32
+"""
+import os
+import json
+import time
+import argparse
+import threading
+import http.client
+import numpy as np
+import pandas as pd
+from urllib.parse import urlparse
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+
+from network_security.constants.training_pipeline import (
+    TARGET_COLUMN,
+    FINAL_MODEL_FILE_PATH,
+    FINAL_PREPROCESSOR_FILE_PATH,
+    DATA_TRANSFORMATION_IMPUTER_PARAMS,
+)
+from network_security.serving.server import InferenceService, create_server
+from network_security.utils.ml_utils.impute.imputer import get_imputer
+from network_security.utils.ml_utils.model.compiled import compile_model
+from network_security.utils.ml_utils.model.estimator import NetworkModel
+from network_security.utils.ml_utils.model.prediction_cache import PredictionCache
+
+SAMPLE_FILE_PATH = os.path.join("network_data", "phisingData.csv")
+
+
+def get_network_model(sample: pd.DataFrame, prediction_cache: bool = True) -> NetworkModel:
+    if os.path.exists(FINAL_MODEL_FILE_PATH) and os.path.exists(FINAL_PREPROCESSOR_FILE_PATH):
+        return InferenceService.from_final_model(prediction_cache=prediction_cache).network_model
+    features = sample.drop(columns=[TARGET_COLUMN]).astype(np.float64)
+    preprocessor = Pipeline([("imputer", get_imputer("bounded_knn", DATA_TRANSFORMATION_IMPUTER_PARAMS))])
+    model = RandomForestClassifier(n_estimators=64, random_state=42)
+    model.fit(preprocessor.fit_transform(features), sample[TARGET_COLUMN].replace(-1, 0))
+    return NetworkModel(
+        preprocessor=preprocessor,
+        model=model,
+        compiled_model=compile_model(model),
+        prediction_cache=PredictionCache() if prediction_cache else None,
+    )
+
+
+def get_request_bodies(sample: pd.DataFrame, missing_rate: float = 0.01) -> list:
+    features = sample.drop(columns=[TARGET_COLUMN]).astype(object)
+    rng = np.random.default_rng(42)
+    features = features.mask(rng.random(features.shape) < missing_rate, None)
+    return [json.dumps(row).encode() for row in features.to_dict("records")]
+
+
+def client(url, bodies, stop_at, latencies, errors, offset) -> None:
+    connection = http.client.HTTPConnection(url.hostname, url.port)
+    i = offset
+    while time.perf_counter() < stop_at:
+        body = bodies[i % len(bodies)]
+        i += 1
+        started = time.perf_counter()
+        connection.request("POST", "/predict", body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - started)
+        if response.status != 200:
+            errors.append(response.status)
+    connection.close()
+
+
+def generate_load(url, bodies, n_clients: int, seconds: float) -> dict:
+    latencies, errors = [], []
+    stop_at = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=client, args=(url, bodies, stop_at, latencies, errors, i * 97))
+        for i in range(n_clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if latencies else (0.0, 0.0)
+    return {"requests": len(latencies), "errors": len(errors), "rps": len(latencies) / elapsed,
+            "p50_ms": p50, "p99_ms": p99}
+
+
+def get_server_metrics(url) -> dict:
+    connection = http.client.HTTPConnection(url.hostname, url.port)
+    connection.request("GET", "/metrics")
+    metrics = json.loads(connection.getresponse().read())
+    connection.close()
+    return metrics
+
+
+def report(label: str, client_stats: dict, server_stats: dict) -> None:
+    print(
+        f"{label:>16} client: {client_stats['rps']:8.1f} req/s p50={client_stats['p50_ms']:7.2f} ms "
+        f"p99={client_stats['p99_ms']:7.2f} ms errors={client_stats['errors']} | server: "
+        f"p50={server_stats['p50_ms']:7.2f} ms p99={server_stats['p99_ms']:7.2f} ms "
+        f"mean batch={server_stats['mean_batch_size']:6.1f}"
+        + (f" cache hit rate={server_stats['prediction_cache']['hit_rate']:5.1%}"
+           if "prediction_cache" in server_stats else "")
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=None, help="load an already running server")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[0.0, 2.0, 5.0])
+    parser.add_argument("--no-prediction-cache", action="store_true")
+    args = parser.parse_args()
+
+    sample = pd.read_csv(SAMPLE_FILE_PATH)
+    bodies = get_request_bodies(sample)
+
+    if args.url:
+        url = urlparse(args.url)
+        report(args.url, generate_load(url, bodies, args.clients, args.seconds), get_server_metrics(url))
+    else:
+        network_model = get_network_model(sample, prediction_cache=not args.no_prediction_cache)
+        for max_wait_ms in args.max_wait_ms:
+            if network_model.prediction_cache is not None:
+                # Every setting starts cold
+                network_model.prediction_cache.clear()
+            service = InferenceService(
+                network_model, max_batch_size=args.max_batch_size, max_wait_ms=max_wait_ms
+            ).start()
+            server = create_server(service, "127.0.0.1", 0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = urlparse(f"http://127.0.0.1:{server.server_port}")
+            try:
+                client_stats = generate_load(url, bodies, args.clients, args.seconds)
+                report(f"wait={max_wait_ms}ms", client_stats, get_server_metrics(url))
+            finally:
+                server.shutdown()
+                server.server_close()
+                service.stop()
@@ -0,0 +1,71 @@
+"""
+Pickled size, load time and per-request latency of the preprocessor shipped
+with the model, for growing training sets: the training-time KNNImputer
+pipeline against the serving one built by
+DataTransformation.get_serving_transformer_object.
+
+Latency is the median time to transform one row, with and without a missing
+value.
+
+    python -m benchmarks.bench_serving_preprocessor --rows 10000 100000 1000000
+"""
+import os
+import time
+import pickle
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.impute import KNNImputer
+from sklearn.pipeline import Pipeline
+
+from network_security.constants.training_pipeline import (
+    TARGET_COLUMN,
+    DATA_TRANSFORMATION_IMPUTER_PARAMS,
+)
+from network_security.components.data_transformation import DataTransformation
+
+SAMPLE_FILE_PATH = os.path.join("network_data", "phisingData.csv")
+
+
+def median_latency_ms(preprocessor, row: pd.DataFrame, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        preprocessor.transform(row)
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings)) * 1000
+
+
+def measure(name: str, preprocessor, complete_row: pd.DataFrame, missing_row: pd.DataFrame, repeat: int) -> None:
+    payload = pickle.dumps(preprocessor)
+    started = time.perf_counter()
+    loaded = pickle.loads(payload)
+    load_ms = (time.perf_counter() - started) * 1000
+    print(
+        f"  {name:>8} size={len(payload) / 2**20:8.2f} MB load={load_ms:8.2f} ms "
+        f"latency complete={median_latency_ms(loaded, complete_row, repeat):7.3f} ms "
+        f"missing={median_latency_ms(loaded, missing_row, repeat):7.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--missing-rate", type=float, default=0.001)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    sample = pd.read_csv(SAMPLE_FILE_PATH).drop(columns=[TARGET_COLUMN])
+    rng = np.random.default_rng(42)
+    complete_row = sample.iloc[[0]].astype(np.float64)
+    missing_row = complete_row.copy()
+    missing_row.iloc[0, 3] = np.nan
+
+    for n_rows in args.rows:
+        features = sample.iloc[rng.integers(0, len(sample), n_rows)].reset_index(drop=True)
+        features = features.astype(np.float64).mask(rng.random(features.shape) < args.missing_rate)
+        training = Pipeline([("imputer", KNNImputer(**DATA_TRANSFORMATION_IMPUTER_PARAMS))]).fit(features)
+        serving = DataTransformation.get_serving_transformer_object(training, features)
+        print(f"{n_rows} training rows")
+        measure("training", training, complete_row, missing_row, args.repeat)
+        measure("serving", serving, complete_row, missing_row, args.repeat)
@@ -1,15 +1,33 @@
 import os
 import sys
 import pymongo
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 import numpy as np
 import pandas as pd
+from bson import ObjectId
 from sklearn.model_selection import train_test_split
 
 from network_security.exception.exception import NetworkSecurityException
 from network_security.logging.logger import logging
 from network_security.entity.config import DataIngestionConfig
 from network_security.entity.artifact import DataIngestionArtifact
+from network_security.constants.training_pipeline import SCHEMA_FILE_PATH, TARGET_COLUMN
+from network_security.utils.main_utils.utils import (
+    read_yaml_file,
+    write_yaml_file,
+    save_dataframe,
+    write_artifact,
+    append_dataframe,
+    get_dataframe_marker,
+    truncate_dataframe,
+    get_compact_dtype_plan,
+    get_invalid_value_marker,
+    get_mongo_client,
+    get_row_groups,
+    grouped_train_test_split,
+)
+from network_security.utils.ml_utils.metric.drift import DriftMonitor
 
 from dotenv import load_dotenv
 
@@ -22,46 +40,284 @@ class DataIngestion:
     def __init__(self, data_ingestion_config: DataIngestionConfig) -> None:
         try:
             self.data_ingestion_config = data_ingestion_config
+            self._schema_config = read_yaml_file(SCHEMA_FILE_PATH)
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    def export_collection_as_df(self) -> pd.DataFrame:
-        """Export collection data as pandas DataFrame"""
+    def get_collection(self):
         try:
             db_name = self.data_ingestion_config.database_name
             collection_name = self.data_ingestion_config.collection_name
-            self.mongo_client = pymongo.MongoClient(MONGO_DB_URI)
-            collection = self.mongo_client[db_name][collection_name]
+            self.mongo_client = get_mongo_client(MONGO_DB_URI)
+            return self.mongo_client[db_name][collection_name]
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def export_collection_as_df(self, query: Optional[dict] = None) -> pd.DataFrame:
+        """Export collection data (optionally only documents matching `query`) as pandas DataFrame"""
+        try:
+            query = query or {}
+            if self.data_ingestion_config.export_mode == "streaming":
+                return self.export_collection_as_df_streaming(query)
+            if self.data_ingestion_config.export_mode == "parallel":
+                return self.export_collection_as_df_parallel(query)
+
+            collection = self.get_collection()
 
-            df = pd.DataFrame(list(collection.find()))
+            df = pd.DataFrame(list(collection.find(query)))
             if "_id" in df.columns.to_list():
                 df = df.drop(columns=["_id"], axis=1)
 
-            df.replace({"na": np.nan}, inplace=True)
+            # Same missing-value markers as the streaming and parallel exports
+            df = df.mask(df.isin(self.data_ingestion_config.missing_values))
+            dtype_plan = get_compact_dtype_plan(self._schema_config)
+            for col in df.columns:
+                if col not in dtype_plan:
+                    continue
+                try:
+                    df[col] = df[col].astype(dtype_plan[col])
+                except (TypeError, ValueError):
+                    # Keep the column as read, validation quarantines the bad cells
+                    logging.info(f"Column {col} holds values outside {dtype_plan[col]}")
+            return df
+
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _fill_batch(
+        self, batch: List[dict], buffers: dict, start: int
+    ) -> None:
+        """Parse one batch of documents into the preallocated column buffers"""
+        stop = start + len(batch)
+        missing_values = self.data_ingestion_config.missing_values
+        for col, (values, mask) in buffers.items():
+            raw = np.array([doc.get(col) for doc in batch], dtype=object)
+            missing = pd.isna(raw) | np.isin(raw, missing_values)
+            raw[missing] = 0
+            if np.issubdtype(values.dtype, np.integer):
+                # Cells that are not integers of the buffer's range are stored
+                # as the invalid-value marker (the dtype maximum), which lies
+                # outside every allowed domain, so validation quarantines their
+                # rows instead of them being truncated here. The raw value is
+                # not kept.
+                numeric = pd.to_numeric(pd.Series(raw), errors="coerce").to_numpy(dtype=np.float64)
+                info = np.iinfo(values.dtype)
+                invalid = ~(
+                    (numeric == np.round(numeric)) & (numeric > info.min) & (numeric < info.max)
+                )
+                numeric[invalid] = get_invalid_value_marker(values.dtype)
+                values[start:stop] = numeric
+            else:
+                values[start:stop] = raw.astype(values.dtype)
+            mask[start:stop] = missing
+
+    def _allocate_buffers(self, n_rows: int) -> dict:
+        columns = get_compact_dtype_plan(self._schema_config, nullable=False)
+        return {
+            col: (np.empty(n_rows, dtype=dtype), np.zeros(n_rows, dtype=bool))
+            for col, dtype in columns.items()
+        }
+
+    def _read_into(
+        self, collection, query: dict, buffers: dict, start: int, limit: int,
+        sort_key: Optional[str] = None,
+    ) -> int:
+        """
+        Stream the documents matching `query` into `buffers[start:start + limit]`
+        and return how many rows were written.
+        """
+        batch_size = self.data_ingestion_config.batch_size
+        projection = {"_id": 0, **{col: 1 for col in buffers}}
+        cursor = collection.find(
+            query, projection=projection, batch_size=batch_size, limit=limit
+        )
+        if sort_key is not None:
+            # `_id` breaks ties so non-unique partition keys still read in a fixed order
+            sort = [(sort_key, pymongo.ASCENDING)]
+            if sort_key != "_id":
+                sort.append(("_id", pymongo.ASCENDING))
+            cursor = cursor.sort(sort)
+
+        filled = 0
+        batch: List[dict] = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) == batch_size:
+                self._fill_batch(batch, buffers, start + filled)
+                filled += len(batch)
+                batch = []
+        if batch:
+            self._fill_batch(batch, buffers, start + filled)
+            filled += len(batch)
+        return filled
+
+    @staticmethod
+    def _buffers_to_df(buffers: dict, rows) -> pd.DataFrame:
+        """Wrap the filled buffers (restricted to `rows`) as nullable columns"""
+        return pd.DataFrame(
+            {
+                col: pd.arrays.IntegerArray(values[rows], mask[rows])
+                if np.issubdtype(values.dtype, np.integer)
+                else pd.Series(values[rows]).mask(mask[rows]).array
+                for col, (values, mask) in buffers.items()
+            },
+            copy=False,
+        )
+
+    def export_collection_as_df_streaming(self, query: Optional[dict] = None) -> pd.DataFrame:
+        """
+        Export collection data as pandas DataFrame without materialising the
+        whole collection as Python dicts.
+
+        The cursor is read in batches of `batch_size` documents with a
+        projection on the schema columns (so `_id` never leaves the server) and
+        every batch is parsed straight into preallocated column arrays typed by
+        the schema's compact dtype plan.
+        Missing markers ("na") are masked during parsing, so peak memory is the
+        output columns plus a single batch.
+        """
+        try:
+            query = query or {}
+            collection = self.get_collection()
+            n_rows = collection.count_documents(query)
+            buffers = self._allocate_buffers(n_rows)
+            logging.info(
+                f"Streaming {n_rows} documents in batches of "
+                f"{self.data_ingestion_config.batch_size}"
+            )
+
+            filled = self._read_into(collection, query, buffers, 0, n_rows)
+
+            # Documents deleted while streaming leave the tail unused
+            df = self._buffers_to_df(buffers, slice(0, filled))
+            logging.info(f"Exported {filled} documents from collection")
+            return df
+
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_partition_bounds(
+        self, collection, n_partitions: int, query: Optional[dict] = None
+    ) -> List[tuple]:
+        """
+        Split the collection into `n_partitions` contiguous, roughly equal
+        ranges of `partition_key`. Returns [(lower, upper), ...] where `None`
+        means unbounded; lower bounds are inclusive, upper bounds exclusive.
+        """
+        try:
+            query = query or {}
+            key = self.data_ingestion_config.partition_key
+            n_rows = collection.count_documents(query)
+            splits = []
+            for i in range(1, n_partitions):
+                docs = list(
+                    collection.find(query, projection={key: 1})
+                    .sort(key, pymongo.ASCENDING)
+                    .skip(i * n_rows // n_partitions)
+                    .limit(1)
+                )
+                if docs and (not splits or docs[0][key] != splits[-1]):
+                    splits.append(docs[0][key])
+
+            bounds = list(zip([None] + splits, splits + [None]))
+            return bounds
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _range_query(self, lower, upper, query: Optional[dict] = None) -> dict:
+        query = query or {}
+        condition = {}
+        if lower is not None:
+            condition["$gte"] = lower
+        if upper is not None:
+            condition["$lt"] = upper
+        if not condition:
+            return query
+        range_query = {self.data_ingestion_config.partition_key: condition}
+        return {"$and": [query, range_query]} if query else range_query
+
+    def export_collection_as_df_parallel(self, query: Optional[dict] = None) -> pd.DataFrame:
+        """
+        Export collection data by scanning `partition_key` ranges concurrently.
+
+        Every partition is counted up front so that it owns a fixed slice of the
+        preallocated output columns; workers share the pooled MongoClient and
+        read their range in key order straight into that slice. The result is
+        therefore identical across runs regardless of which worker finishes
+        first.
+        """
+        try:
+            collection = self.get_collection()
+            num_workers = self.data_ingestion_config.num_workers
+            key = self.data_ingestion_config.partition_key
+
+            bounds = self.get_partition_bounds(collection, num_workers, query)
+            queries = [self._range_query(lower, upper, query) for lower, upper in bounds]
+            counts = [collection.count_documents(query) for query in queries]
+            offsets = np.concatenate([[0], np.cumsum(counts)]).astype(int)
+            buffers = self._allocate_buffers(int(offsets[-1]))
+            logging.info(
+                f"Scanning {offsets[-1]} documents in {len(queries)} partitions "
+                f"with {num_workers} workers"
+            )
+
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                futures = [
+                    executor.submit(
+                        self._read_into, collection, query, buffers,
+                        int(offsets[i]), counts[i], key,
+                    )
+                    for i, query in enumerate(queries)
+                ]
+                filled = [future.result() for future in futures]
+
+            if filled == counts:
+                rows = slice(0, int(offsets[-1]))
+            else:
+                # Documents deleted while scanning leave gaps in their slice
+                rows = np.concatenate(
+                    [np.arange(offsets[i], offsets[i] + n) for i, n in enumerate(filled)]
+                )
+            df = self._buffers_to_df(buffers, rows)
+            logging.info(f"Exported {sum(filled)} documents from collection")
             return df
 
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
     def export_data_to_feature_store(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Export DataFrame to feature store as csv file"""
+        """Export DataFrame to feature store in the configured artifact format"""
         try:
             feature_store_file_path = self.data_ingestion_config.feature_store_file_path
             dir_path = os.path.dirname(feature_store_file_path)
             os.makedirs(dir_path, exist_ok=True)
-            df.to_csv(feature_store_file_path, index=False, header=True)
+            write_artifact(
+                save_dataframe, feature_store_file_path, df,
+                background=self.data_ingestion_config.in_memory_handoff,
+            )
 
             return df
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    def split_data_as_train_test(self, df: pd.DataFrame) -> None:
+    def _train_test_split(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Random train/test split; with `grouped_split` the copies of a feature
+        vector are kept together, so duplicates cannot leak into the test set.
+        """
         try:
-            train_set, test_set = train_test_split(
-                df,
-                test_size=self.data_ingestion_config.train_test_split_ratio,
-                random_state=42,
-            )
+            test_size = self.data_ingestion_config.train_test_split_ratio
+            if not self.data_ingestion_config.grouped_split:
+                return train_test_split(df, test_size=test_size, random_state=42)
+            groups = get_row_groups(df.drop(columns=[TARGET_COLUMN]))
+            logging.info(f"Grouped split of {len(df)} rows into {groups.max(initial=-1) + 1} distinct feature vectors")
+            return grouped_train_test_split(df, groups, test_size=test_size, random_state=42)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def split_data_as_train_test(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        try:
+            train_set, test_set = self._train_test_split(df)
             logging.info("Performed train test split")
             logging.info(
                 "Exited split_data_as_train_test method of DataIngestion class"
@@ -70,26 +326,169 @@ class DataIngestion:
             os.makedirs(dir_path, exist_ok=True)
             logging.info(f"Exporting train/test file path")
 
-            train_set.to_csv(
-                self.data_ingestion_config.training_file_path, index=False, header=True
+            background = self.data_ingestion_config.in_memory_handoff
+            write_artifact(
+                save_dataframe, self.data_ingestion_config.training_file_path, train_set,
+                background=background,
             )
-            test_set.to_csv(
-                self.data_ingestion_config.testing_file_path, index=False, header=True
+            write_artifact(
+                save_dataframe, self.data_ingestion_config.testing_file_path, test_set,
+                background=background,
             )
 
             logging.info(f"Exported train/test file path")
+            return train_set, test_set
+
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @staticmethod
+    def _encode_watermark(value) -> dict:
+        if isinstance(value, ObjectId):
+            return {"type": "ObjectId", "value": str(value)}
+        return {"type": type(value).__name__, "value": value}
+
+    @staticmethod
+    def _decode_watermark(entry: dict):
+        if entry["type"] == "ObjectId":
+            return ObjectId(entry["value"])
+        return entry["value"]
+
+    def read_watermark(self) -> dict:
+        """Return the state committed by the last incremental run ({} if none)"""
+        try:
+            watermark_file_path = self.data_ingestion_config.watermark_file_path
+            if not os.path.exists(watermark_file_path):
+                return {}
+            return read_yaml_file(watermark_file_path)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _rollback_uncommitted(self, state: dict, file_paths: List[str]) -> None:
+        """
+        Drop anything appended by a run that crashed before committing its
+        watermark, so those documents are not appended a second time.
+        """
+        committed_markers = state.get("markers", {})
+        for file_path in file_paths:
+            marker = committed_markers.get(file_path, 0)
+            if get_dataframe_marker(file_path) > marker:
+                logging.info(f"Rolling back uncommitted rows in {file_path}")
+                truncate_dataframe(file_path, marker)
 
+    def check_batch_drift(self, dataframe: pd.DataFrame) -> Optional[bool]:
+        """
+        Compare a batch of new records with the reference sketch of the
+        published model and write the drift report. Returns None when there is
+        no reference yet, otherwise True when no column drifted.
+        """
+        try:
+            config = self.data_ingestion_config
+            if not config.drift_check or not os.path.exists(config.reference_sketch_file_path):
+                return None
+            status, report = DriftMonitor(config.reference_sketch_file_path).update(dataframe)
+            write_yaml_file(config.drift_report_file_path, report)
+            drifted = [col for col, stats in report.items() if stats["drift_status"]]
+            if drifted:
+                logging.info(f"Drift against the reference sketch in columns: {drifted}")
+            return status
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def initiate_incremental_data_ingestion(self) -> DataIngestionArtifact:
+        """
+        Fetch only the documents past the stored high-water mark of
+        `watermark_field`, split them and append them to the feature store and
+        train/test files kept in `incremental_store_dir`.
+
+        Rows keep the train/test side they were assigned to when first
+        ingested; a grouped split only keeps the copies within one batch
+        together. The new watermark (and the committed file sizes) is written
+        only after all appends succeed.
+        """
+        try:
+            config = self.data_ingestion_config
+            field = config.watermark_field
+            file_paths = [
+                config.incremental_feature_store_file_path,
+                config.incremental_training_file_path,
+                config.incremental_testing_file_path,
+            ]
+
+            state = self.read_watermark()
+            if state and state["field"] != field:
+                raise ValueError(
+                    f"Feature store watermark is on '{state['field']}', not '{field}'"
+                )
+            if state and set(state["markers"]) != set(file_paths):
+                raise ValueError(
+                    f"Feature store in {config.incremental_store_dir} was written "
+                    f"in another artifact format"
+                )
+            self._rollback_uncommitted(state, file_paths)
+
+            lower = self._decode_watermark(state["watermark"]) if state else None
+            bound = {"$gt": lower} if lower is not None else {}
+            collection = self.get_collection()
+            latest = list(
+                collection.find({field: bound} if bound else {}, projection={field: 1})
+                .sort(field, pymongo.DESCENDING)
+                .limit(1)
+            )
+
+            if not latest:
+                logging.info(f"No new documents since watermark {lower}")
+            else:
+                # Pin the upper bound so documents inserted while reading are
+                # left for the next run instead of being skipped
+                upper = latest[0][field]
+                dataframe = self.export_collection_as_df({field: {**bound, "$lte": upper}})
+                logging.info(f"Fetched {len(dataframe)} new documents up to {upper}")
+                self.check_batch_drift(dataframe)
+
+                if len(dataframe) * config.train_test_split_ratio >= 1:
+                    train_set, test_set = self._train_test_split(dataframe)
+                else:
+                    train_set, test_set = dataframe, dataframe.iloc[:0]
+
+                for df, file_path in zip([dataframe, train_set, test_set], file_paths):
+                    append_dataframe(file_path, df)
+
+                write_yaml_file(
+                    config.watermark_file_path,
+                    {
+                        "field": field,
+                        "watermark": self._encode_watermark(upper),
+                        "markers": {
+                            file_path: get_dataframe_marker(file_path)
+                            for file_path in file_paths
+                        },
+                    },
+                )
+
+            data_ingestion_artifact = DataIngestionArtifact(
+                train_file_path=config.incremental_training_file_path,
+                test_file_path=config.incremental_testing_file_path,
+            )
+            return data_ingestion_artifact
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
     def initiate_data_ingestion(self) -> DataIngestionArtifact:
         try:
+            if self.data_ingestion_config.incremental:
+                return self.initiate_incremental_data_ingestion()
+
             dataframe = self.export_collection_as_df()
+            self.check_batch_drift(dataframe)
             dataframe = self.export_data_to_feature_store(dataframe)
-            self.split_data_as_train_test(dataframe)
+            train_set, test_set = self.split_data_as_train_test(dataframe)
+            in_memory = self.data_ingestion_config.in_memory_handoff
             data_ingestion_artifact = DataIngestionArtifact(
                 train_file_path=self.data_ingestion_config.training_file_path,
                 test_file_path=self.data_ingestion_config.testing_file_path,
+                train_df=train_set if in_memory else None,
+                test_df=test_set if in_memory else None,
             )
             return data_ingestion_artifact
         except Exception as e:
@@ -2,15 +2,38 @@ import os
 import sys
 import numpy as np
 import pandas as pd
-from sklearn.impute import KNNImputer
 from sklearn.pipeline import Pipeline
 
-from network_security.constants.training_pipeline import TARGET_COLUMN, DATA_TRANSFORMATION_IMPUTER_PARAMS
+from typing import Dict, Optional, Tuple
+
+from network_security.constants.training_pipeline import (
+    TARGET_COLUMN,
+    DATA_TRANSFORMATION_IMPUTER_PARAMS,
+    DATA_TRANSFORMATION_IMPUTER_STRATEGY,
+    DATA_TRANSFORMATION_SERVING_INDEX_ROWS,
+    FINAL_PREPROCESSOR_FILE_PATH,
+    SCHEMA_FILE_PATH,
+)
 from network_security.entity.artifact import DataTransformationArtifact, DataValidationArtifact
 from network_security.entity.config import DataTransformationConfig
 from network_security.exception.exception import NetworkSecurityException
 from network_security.logging.logger import logging
-from network_security.utils.main_utils.utils import save_numpy_array, save_object
+from network_security.utils.main_utils.utils import (
+    save_object,
+    load_object,
+    load_dataframe,
+    cast_dataframe,
+    write_artifact,
+    read_yaml_file,
+    get_compact_dtype_plan,
+    get_row_groups,
+)
+from network_security.utils.ml_utils.impute.imputer import (
+    get_imputer,
+    BoundedKNNImputer,
+    ModeImputer,
+    ConditionalModeImputer,
+)
 
 class DataTransformation:
     def __init__(
@@ -21,32 +44,97 @@ class DataTransformation:
         try:
             self.data_validation_artifact = data_validation_artifact
             self.data_transformation_config = data_transformation_config
+            self._dtype_plan = get_compact_dtype_plan(read_yaml_file(SCHEMA_FILE_PATH))
+            self._input_frames = None
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @staticmethod
+    def read_data(file_path: str, dtypes: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        try:
+            return load_dataframe(file_path, dtypes=dtypes)
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
     @staticmethod
-    def read_data(file_path: str) -> pd.DataFrame:
+    def _is_int8_column(column: pd.Series) -> bool:
+        if pd.api.types.is_integer_dtype(column) and column.dtype.itemsize == 1:
+            return True
+        values = column.dropna().to_numpy(dtype=np.float64)
+        info = np.iinfo(np.int8)
+        return bool(
+            np.array_equal(values, np.round(values))
+            and values.min(initial=0) >= info.min
+            and values.max(initial=0) <= info.max
+        )
+
+    @staticmethod
+    def write_transformed_array(
+        file_path: str, preprocessor: Pipeline, features: pd.DataFrame, target: pd.Series,
+        chunk_size: int = 65_536,
+    ) -> np.ndarray:
+        """
+        Write the transformed features and the target (last column) straight
+        into a preallocated .npy file and return it memory-mapped.
+
+        The dtype is the narrowest that keeps the features intact: int8 while
+        every (imputed) value is still a small whole number, float32 otherwise.
+        Only the rows with missing values go through the preprocessor, each
+        distinct one once; the rest are copied from the frame chunk by chunk,
+        so no full float64 copy of the features is ever made.
+        """
         try:
-            return pd.read_csv(file_path)
+            missing_rows = np.flatnonzero(features.isna().to_numpy().any(axis=1))
+            imputed = None
+            if missing_rows.size:
+                # Copies of a row impute alike, so only one of each is imputed
+                groups = get_row_groups(features.iloc[missing_rows])
+                _, first = np.unique(groups, return_index=True)
+                imputed = preprocessor.transform(features.iloc[missing_rows[first]])[groups]
+            if imputed is not None and imputed.shape[1] != features.shape[1]:
+                raise ValueError("The preprocessor changed the number of features")
+
+            is_integral = all(DataTransformation._is_int8_column(features[col]) for col in features.columns)
+            if imputed is not None:
+                info = np.iinfo(np.int8)
+                is_integral = is_integral and bool(
+                    np.array_equal(imputed, np.round(imputed))
+                    and imputed.min(initial=0) >= info.min
+                    and imputed.max(initial=0) <= info.max
+                )
+            dtype = np.int8 if is_integral else np.float32
+
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            array = np.lib.format.open_memmap(
+                file_path, mode="w+", dtype=dtype, shape=(len(features), features.shape[1] + 1)
+            )
+            for start in range(0, len(features), chunk_size):
+                chunk = features.iloc[start:start + chunk_size]
+                array[start:start + len(chunk), :-1] = chunk.to_numpy(dtype=dtype, na_value=0)
+            if imputed is not None:
+                array[missing_rows, :-1] = imputed
+            array[:, -1] = target.to_numpy(dtype=dtype)
+            array.flush()
+            return array
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
     @classmethod
     def get_data_transformer_object(cls) -> Pipeline:
         """
-        This function initialises KNN Imputer object with the parameters specified in the training_pipeline.py file
-        and returns a Pipeline object with the KNN Imputer object as the first step.
+        This function initialises the imputer of the strategy specified in the training_pipeline.py file
+        (with the parameters it accepts) and returns a Pipeline object with the imputer as the first step.
 
         Args:
             cls: DataTransformation class
 
         Returns:
-            Pipeline: Pipeline object with KNN Imputer
+            Pipeline: Pipeline object with the imputer
         """
         logging.info("Entered the get_data_transformer_object method of DataTransformation class")
         try:
-            imputer: KNNImputer = KNNImputer(**DATA_TRANSFORMATION_IMPUTER_PARAMS)
-            logging.info(f"Initialised KNN Imputer with parameters: {DATA_TRANSFORMATION_IMPUTER_PARAMS}")
+            imputer = get_imputer(DATA_TRANSFORMATION_IMPUTER_STRATEGY, DATA_TRANSFORMATION_IMPUTER_PARAMS)
+            logging.info(f"Initialised imputer: {imputer}")
             processor: Pipeline = Pipeline([("imputer", imputer)])
 
             return processor
@@ -54,12 +142,76 @@ class DataTransformation:
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
+    @classmethod
+    def get_serving_transformer_object(cls, preprocessor: Pipeline, features: pd.DataFrame) -> Pipeline:
+        """
+        Return the preprocessor to ship with the model. Imputers whose fitted
+        state is a fill table already are kept; nearest-neighbour ones, which
+        hold the whole training matrix, are replaced by a BoundedKNNImputer
+        fitted on the same features.
+        """
+        try:
+            imputer = preprocessor.named_steps["imputer"]
+            if isinstance(imputer, (ModeImputer, ConditionalModeImputer)):
+                return preprocessor
+            serving_imputer = get_imputer(
+                "bounded_knn",
+                {
+                    **DATA_TRANSFORMATION_IMPUTER_PARAMS,
+                    "max_index_rows": DATA_TRANSFORMATION_SERVING_INDEX_ROWS,
+                },
+            )
+            logging.info(f"Fitting serving imputer: {serving_imputer}")
+            return Pipeline([("imputer", serving_imputer.fit(features))])
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _get_input_frames(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        # Use the frames validation handed over in memory, otherwise read the files
+        if self._input_frames is None:
+            if self.data_validation_artifact.train_df is not None:
+                train_df = cast_dataframe(self.data_validation_artifact.train_df, self._dtype_plan)
+                test_df = cast_dataframe(self.data_validation_artifact.test_df, self._dtype_plan)
+            else:
+                train_df = DataTransformation.read_data(
+                    self.data_validation_artifact.valid_train_file_path, self._dtype_plan
+                )
+                test_df = DataTransformation.read_data(
+                    self.data_validation_artifact.valid_test_file_path, self._dtype_plan
+                )
+            self._input_frames = (train_df, test_df)
+        return self._input_frames
+
+    def get_cache_key_inputs(self) -> list:
+        """Everything the transformed arrays depend on, for the stage cache"""
+        try:
+            train_df, test_df = self._get_input_frames()
+            return [
+                train_df,
+                test_df,
+                DATA_TRANSFORMATION_IMPUTER_PARAMS,
+                repr(self.get_data_transformer_object()),
+                DATA_TRANSFORMATION_SERVING_INDEX_ROWS,
+            ]
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @staticmethod
+    def export_final_preprocessor(data_transformation_artifact: DataTransformationArtifact) -> None:
+        """Publish the preprocessor of a transformation artifact to final_model/"""
+        try:
+            save_object(
+                FINAL_PREPROCESSOR_FILE_PATH,
+                load_object(data_transformation_artifact.transformed_object_file_path),
+            )
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
     def initiate_data_transformation(self) -> DataTransformationArtifact:
         logging.info("Entered the initiate_data_transformation method of DataTransformation class")
         try:
             logging.info("Starting data transformation process") 
-            train_df = DataTransformation.read_data(self.data_validation_artifact.valid_train_file_path)
-            test_df = DataTransformation.read_data(self.data_validation_artifact.valid_test_file_path)
+            train_df, test_df = self._get_input_frames()
 
             # Training dataframe
             input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN], axis=1)
@@ -73,33 +225,42 @@ class DataTransformation:
 
             preprocessor = self.get_data_transformer_object()
             preprocessor_obj = preprocessor.fit(input_feature_train_df)
-            transformed_input_train_feature = preprocessor_obj.transform(input_feature_train_df)
-            transformed_input_test_feature = preprocessor_obj.transform(input_feature_test_df)
-
-            train_array = np.c_[transformed_input_train_feature, np.array(target_feature_train_df)]
-            test_array = np.c_[transformed_input_test_feature, np.array(target_feature_test_df)]
+            # The training imputer may hold the whole training matrix, the
+            # model ships with a compact one
+            serving_preprocessor = self.get_serving_transformer_object(
+                preprocessor_obj, input_feature_train_df
+            )
 
-            # Save numpy arrays
-            save_numpy_array(
-                file_path=self.data_transformation_config.transformed_train_file_path,
-                array=train_array
+            # Write the arrays memory-mapped; the next stage maps the same pages
+            train_array = self.write_transformed_array(
+                self.data_transformation_config.transformed_train_file_path,
+                preprocessor_obj,
+                input_feature_train_df,
+                target_feature_train_df,
             )
-            save_numpy_array(
-                file_path=self.data_transformation_config.transformed_test_file_path,
-                array=test_array
+            test_array = self.write_transformed_array(
+                self.data_transformation_config.transformed_test_file_path,
+                preprocessor_obj,
+                input_feature_test_df,
+                target_feature_test_df,
             )
-            save_object(
+
+            background = self.data_transformation_config.in_memory_handoff
+            write_artifact(
+                save_object,
                 file_path=self.data_transformation_config.transformed_object_file_path,
-                obj=preprocessor_obj
+                obj=serving_preprocessor,
+                background=background,
             )
 
-            save_object("final_model/preprocessor.pkl", preprocessor_obj)
-
             # Prepare Artifact
             data_transformation_artifact = DataTransformationArtifact(
                 transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
                 transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
-                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path
+                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path,
+                train_array=train_array if background else None,
+                test_array=test_array if background else None,
+                preprocessor=serving_preprocessor if background else None,
             )
 
             return data_transformation_artifact
@@ -1,7 +1,10 @@
 import os
 import sys
+import shutil
+import numpy as np
 import pandas as pd
-from scipy.stats import ks_2samp
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from network_security.entity.artifact import (
     DataIngestionArtifact,
@@ -10,8 +13,28 @@ from network_security.entity.artifact import (
 from network_security.entity.config import DataValidationConfig
 from network_security.exception.exception import NetworkSecurityException
 from network_security.logging.logger import logging
-from network_security.constants.training_pipeline import SCHEMA_FILE_PATH
-from network_security.utils.main_utils.utils import read_yaml_file, write_yaml_file
+from network_security.constants.training_pipeline import (
+    SCHEMA_FILE_PATH,
+    REFERENCE_SKETCH_FILE_PATH,
+)
+from network_security.utils.main_utils.utils import (
+    read_yaml_file,
+    write_yaml_file,
+    load_dataframe,
+    save_dataframe,
+    cast_dataframe,
+    write_artifact,
+    get_compact_dtype_plan,
+    get_category_domain,
+    get_invalid_value_marker,
+    get_allowed_values,
+)
+from network_security.utils.ml_utils.metric.drift import (
+    get_category_counts,
+    get_discrete_drift,
+    get_drift_report,
+    save_reference_sketch,
+)
 
 
 class DataValidation:
@@ -25,13 +48,17 @@ class DataValidation:
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_config = data_validation_config
             self._schema_config = read_yaml_file(SCHEMA_FILE_PATH)
+            self._dtype_plan = get_compact_dtype_plan(self._schema_config)
+            self._categories = get_category_domain(self._schema_config)
+            self._allowed_values = get_allowed_values(self._schema_config)
+            self._input_frames = None
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
     @staticmethod
-    def read_data(file_path: str) -> pd.DataFrame:
+    def read_data(file_path: str, dtypes: Optional[Dict[str, str]] = None) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return load_dataframe(file_path, dtypes=dtypes)
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
@@ -63,30 +90,29 @@ class DataValidation:
             raise NetworkSecurityException(e, sys)
 
     def detect_data_drift(
-        self, base_df: pd.DataFrame, current_df: pd.DataFrame, threshold: float = 0.05
+        self, base_df: pd.DataFrame, current_df: pd.DataFrame, threshold: Optional[float] = None
     ) -> bool:
         try:
-            status = True
-            report = {}
-            for col in base_df.columns:
-                d1 = pd.to_numeric(base_df[col], errors="coerce").dropna()
-                d2 = pd.to_numeric(current_df[col], errors="coerce").dropna()
-                is_same_dist = ks_2samp(d1, d2)
-
-                if is_same_dist.pvalue >= threshold:
-                    is_found = False
-                else:
-                    is_found = True
-                    status = False
-
-                report.update(
-                    {
-                        col: {
-                            "p_value": float(is_same_dist.pvalue),
-                            "drift_status": is_found,
-                        }
-                    }
-                )
+            # Every feature is discrete, so the tests run on category counts of all columns at once
+            if threshold is None:
+                threshold = self.data_validation_config.drift_threshold
+            base_counts = get_category_counts(base_df, self._categories)
+            current_counts = get_category_counts(current_df[base_df.columns], self._categories)
+            # The base histograms are the reference later batches are checked against
+            save_reference_sketch(
+                self.data_validation_config.reference_sketch_file_path,
+                list(base_df.columns),
+                self._categories,
+                base_counts,
+            )
+            drift = get_discrete_drift(base_counts, current_counts)
+            status, report = get_drift_report(
+                list(base_df.columns),
+                drift,
+                method=self.data_validation_config.drift_method,
+                threshold=threshold,
+                psi_threshold=self.data_validation_config.psi_threshold,
+            )
 
             drift_report_file_path = self.data_validation_config.drift_report_file_path
 
@@ -100,78 +126,186 @@ class DataValidation:
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
+    def _get_input_frames(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        # Use the frames ingestion handed over in memory, otherwise read the files.
+        # They are kept as ingested, rows are checked before the compact cast.
+        if self._input_frames is None:
+            if self.data_ingestion_artifact.train_df is not None:
+                train_df = self.data_ingestion_artifact.train_df
+                test_df = self.data_ingestion_artifact.test_df
+            else:
+                train_df = DataValidation.read_data(self.data_ingestion_artifact.train_file_path)
+                test_df = DataValidation.read_data(self.data_ingestion_artifact.test_file_path)
+            self._input_frames = (train_df, test_df)
+        return self._input_frames
+
+    def validate_rows(self, dataframe: pd.DataFrame) -> Tuple[np.ndarray, Dict[str, int]]:
+        """
+        Check the dtype and the allowed values of every cell of the schema
+        columns. Returns the mask of valid rows and the number of failing cells
+        per column. Missing cells are valid, they are imputed later.
+        """
+        try:
+            valid = np.ones(len(dataframe), dtype=bool)
+            failures: Dict[str, int] = {}
+            for col, domain in self._allowed_values.items():
+                if col not in dataframe.columns:
+                    continue
+                column = dataframe[col]
+                cell_ok = None
+                if not pd.api.types.is_numeric_dtype(column):
+                    numeric = pd.to_numeric(column, errors="coerce")
+                    # Present but not a number
+                    cell_ok = ~(numeric.isna() & column.notna()).to_numpy()
+                    column = numeric
+                values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+                # Fractional and out of range values fall outside the domain too
+                in_domain = np.isnan(values) | np.isin(values, domain)
+                cell_ok = in_domain if cell_ok is None else cell_ok & in_domain
+                n_failed = len(cell_ok) - int(np.count_nonzero(cell_ok))
+                if n_failed:
+                    failures[col] = n_failed
+                    valid &= cell_ok
+            return valid, failures
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_cache_key_inputs(self) -> list:
+        """Everything the validation result depends on, for the stage cache"""
+        try:
+            train_df, test_df = self._get_input_frames()
+            config = self.data_validation_config
+            output_format = os.path.splitext(config.valid_train_file_path)[1]
+            return [
+                train_df,
+                test_df,
+                self._schema_config,
+                output_format,
+                {
+                    "drift_method": config.drift_method,
+                    "drift_threshold": config.drift_threshold,
+                    "psi_threshold": config.psi_threshold,
+                },
+            ]
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @staticmethod
+    def export_reference_sketch(data_validation_artifact: DataValidationArtifact) -> None:
+        """Publish the reference sketch of a validation artifact to final_model/"""
+        try:
+            # Only data that passed validation may become the reference
+            if not data_validation_artifact.validation_status:
+                return
+            os.makedirs(os.path.dirname(REFERENCE_SKETCH_FILE_PATH), exist_ok=True)
+            shutil.copyfile(data_validation_artifact.reference_sketch_file_path, REFERENCE_SKETCH_FILE_PATH)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def count_marked_cells(self, dataframe: pd.DataFrame) -> Dict[str, int]:
+        """
+        Number of cells per column holding the invalid-value marker, i.e. cells
+        whose ingested value could not be stored in the compact column and was
+        replaced at ingestion
+        """
+        try:
+            marked: Dict[str, int] = {}
+            for col, dtype in self._dtype_plan.items():
+                if col not in dataframe.columns:
+                    continue
+                dtype = pd.api.types.pandas_dtype(dtype)
+                # Masked dtypes ("Int8") wrap the numpy one
+                numpy_dtype = getattr(dtype, "numpy_dtype", dtype)
+                if numpy_dtype.kind != "i":
+                    continue
+                column = pd.to_numeric(dataframe[col], errors="coerce")
+                n_marked = int((column == get_invalid_value_marker(numpy_dtype)).sum())
+                if n_marked:
+                    marked[col] = n_marked
+            return marked
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def quarantine_rows(
+        self, frames: List[pd.DataFrame], masks: List[np.ndarray], failures: List[Dict[str, int]]
+    ) -> int:
+        """
+        Write the failing rows of the train and test frames and a report of why
+        they failed. Cells the export could not store hold the invalid-value
+        marker instead of their ingested value; the report counts them under
+        `marked_cells`.
+        """
+        try:
+            config = self.data_validation_config
+            file_paths = [config.quarantine_train_file_path, config.quarantine_test_file_path]
+            report = {}
+            for name, df, valid, failed_cells, file_path in zip(
+                ["train", "test"], frames, masks, failures, file_paths
+            ):
+                rejected = df[~valid]
+                save_dataframe(file_path, rejected)
+                report[name] = {
+                    "rows": len(rejected),
+                    "failed_cells": failed_cells,
+                    "marked_cells": self.count_marked_cells(rejected),
+                }
+            write_yaml_file(config.quarantine_report_file_path, report)
+            quarantined = sum(entry["rows"] for entry in report.values())
+            logging.info(f"Quarantined {quarantined} rows: {report}")
+            return quarantined
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
     def initiate_data_validation(self) -> DataValidationArtifact:
         try:
             train_file_path = self.data_ingestion_artifact.train_file_path
             test_file_path = self.data_ingestion_artifact.test_file_path
+            background = self.data_validation_config.in_memory_handoff
 
             # Reading the train and test data
-            train_df = DataValidation.read_data(train_file_path)
-            test_df = DataValidation.read_data(test_file_path)
-            # Validate number of columns
-            train_columns_ok = self.validate_number_of_columns(dataframe=train_df)
-            test_columns_ok = self.validate_number_of_columns(dataframe=test_df)
-
-            # Validate numerical columns
-            train_numerical_ok = self.validate_numerical_columns(dataframe=train_df)
-            test_numerical_ok = self.validate_numerical_columns(dataframe=test_df)
-
-            # Validate data drift (only meaningful if numerical columns exist)
-            drift_ok = self.detect_data_drift(base_df=train_df, current_df=test_df)
-
-            overall_status = all(
-                [
-                    train_columns_ok,
-                    test_columns_ok,
-                    train_numerical_ok,
-                    test_numerical_ok,
-                    drift_ok,
-                ]
-            )
+            train_df, test_df = self._get_input_frames()
 
-            # Ensure directories exist and write files to valid or invalid paths depending on overall_status
-            if overall_status:
-                os.makedirs(
-                    os.path.dirname(self.data_validation_config.valid_train_file_path),
-                    exist_ok=True,
-                )
-                train_df.to_csv(
-                    self.data_validation_config.valid_train_file_path,
-                    index=False,
-                    header=True,
-                )
-                test_df.to_csv(
-                    self.data_validation_config.valid_test_file_path,
-                    index=False,
-                    header=True,
+            # Row level checks: failing rows go to quarantine, the rest carries on
+            train_valid, train_failures = self.validate_rows(train_df)
+            test_valid, test_failures = self.validate_rows(test_df)
+            all_rows_valid = bool(train_valid.all() and test_valid.all())
+            quarantined_rows = 0
+            if not all_rows_valid:
+                quarantined_rows = self.quarantine_rows(
+                    [train_df, test_df], [train_valid, test_valid], [train_failures, test_failures]
                 )
+                train_df = train_df[train_valid]
+                test_df = test_df[test_valid]
+            train_df = cast_dataframe(train_df, self._dtype_plan)
+            test_df = cast_dataframe(test_df, self._dtype_plan)
+
+            # The train and test checks and the drift detection are independent
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                checks = [
+                    # Validate number of columns
+                    executor.submit(self.validate_number_of_columns, dataframe=train_df),
+                    executor.submit(self.validate_number_of_columns, dataframe=test_df),
+                    # Validate numerical columns
+                    executor.submit(self.validate_numerical_columns, dataframe=train_df),
+                    executor.submit(self.validate_numerical_columns, dataframe=test_df),
+                    # Validate data drift (only meaningful if numerical columns exist)
+                    executor.submit(self.detect_data_drift, base_df=train_df, current_df=test_df),
+                ]
+                overall_status = all([check.result() for check in checks])
 
+            # Data is only rewritten when rows were quarantined; otherwise the
+            # artifact points at the ingested files
+            valid_train_path = valid_test_path = ""
+            invalid_train_path = invalid_test_path = ""
+            if overall_status and all_rows_valid:
+                valid_train_path, valid_test_path = train_file_path, test_file_path
+            elif overall_status:
                 valid_train_path = self.data_validation_config.valid_train_file_path
                 valid_test_path = self.data_validation_config.valid_test_file_path
-                invalid_train_path = ""
-                invalid_test_path = ""
+                write_artifact(save_dataframe, valid_train_path, train_df, background=background)
+                write_artifact(save_dataframe, valid_test_path, test_df, background=background)
             else:
-                os.makedirs(
-                    os.path.dirname(
-                        self.data_validation_config.invalid_train_file_path
-                    ),
-                    exist_ok=True,
-                )
-                train_df.to_csv(
-                    self.data_validation_config.invalid_train_file_path,
-                    index=False,
-                    header=True,
-                )
-                test_df.to_csv(
-                    self.data_validation_config.invalid_test_file_path,
-                    index=False,
-                    header=True,
-                )
-
-                valid_train_path = ""
-                valid_test_path = ""
-                invalid_train_path = self.data_validation_config.invalid_train_file_path
-                invalid_test_path = self.data_validation_config.invalid_test_file_path
+                invalid_train_path, invalid_test_path = train_file_path, test_file_path
 
             data_validation_artifact = DataValidationArtifact(
                 validation_status=overall_status,
@@ -180,6 +314,19 @@ class DataValidation:
                 invalid_train_file_path=invalid_train_path,
                 invalid_test_file_path=invalid_test_path,
                 drift_report_file_path=self.data_validation_config.drift_report_file_path,
+                reference_sketch_file_path=self.data_validation_config.reference_sketch_file_path,
+                quarantine_train_file_path=(
+                    self.data_validation_config.quarantine_train_file_path if quarantined_rows else ""
+                ),
+                quarantine_test_file_path=(
+                    self.data_validation_config.quarantine_test_file_path if quarantined_rows else ""
+                ),
+                quarantine_report_file_path=(
+                    self.data_validation_config.quarantine_report_file_path if quarantined_rows else ""
+                ),
+                quarantined_rows=quarantined_rows,
+                train_df=train_df if background and overall_status else None,
+                test_df=test_df if background and overall_status else None,
             )
             return data_validation_artifact
         except Exception as e:
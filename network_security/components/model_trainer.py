@@ -2,6 +2,8 @@ import os
 import sys
 import mlflow
 import dagshub
+import numpy as np
+from typing import Dict, Tuple
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 
@@ -16,10 +18,26 @@ from network_security.logging.logger import logging
 
 from network_security.entity.artifact import DataTransformationArtifact, ModelTrainerArtifact, ClassificationMetricArtifact
 from network_security.entity.config import ModelTrainerConfig
+from network_security.constants.training_pipeline import (
+    FINAL_MODEL_FILE_PATH,
+    PREDICTION_CACHE_MAX_ENTRIES,
+    PREDICTION_CACHE_TTL_SECONDS,
+)
 
-from network_security.utils.main_utils.utils import save_object, load_object, load_numpy_array, evaluate_models
+from network_security.utils.main_utils.utils import (
+    save_object,
+    load_object,
+    load_numpy_array,
+    evaluate_models,
+    write_artifact,
+    write_yaml_file,
+    deduplicate_rows,
+)
 from network_security.utils.ml_utils.metric.classification import get_classification_score
 from network_security.utils.ml_utils.model.estimator import NetworkModel
+from network_security.utils.ml_utils.model.cv_memo import CVMemo
+from network_security.utils.ml_utils.model.compiled import compile_model
+from network_security.utils.ml_utils.model.prediction_cache import PredictionCache, get_model_fingerprint
 
 load_dotenv()
 
@@ -30,10 +48,13 @@ class ModelTrainer:
         try:
             self.model_trainer_config = model_trainer_config
             self.data_transformation_artifact = data_transformation_artifact
+            self._input_arrays = None
+            self._preprocessor = None
         except Exception as e:
             raise NetworkSecurityException(e, sys)
         
-    def track_mlflow(self, best_model, classification_metric: ClassificationMetricArtifact):
+    @staticmethod
+    def track_mlflow(best_model, classification_metric: ClassificationMetricArtifact):
         mlflow.set_registry_uri(os.getenv("MLFLOW_TRACKING_URI"))
         tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
         with mlflow.start_run():
@@ -45,13 +66,30 @@ class ModelTrainer:
             mlflow.log_metric("Precision", precision_score)
             mlflow.log_metric("Recall", recall_score)
             mlflow.sklearn.log_model(best_model, "model")
-        
-    def train_model(self, X_train, y_train, X_test, y_test):
+
+    @staticmethod
+    def track_experiments(model_trainer_artifact: ModelTrainerArtifact) -> None:
+        """Log the trained model with its train and test metrics to MLflow, one run each"""
+        try:
+            best_model = model_trainer_artifact.best_model
+            if best_model is None:
+                best_model = load_object(model_trainer_artifact.trainer_model_file_path).model
+            # One run after the other: MLflow's active run is process state
+            for classification_metric in [
+                model_trainer_artifact.train_metric_artifact,
+                model_trainer_artifact.test_metric_artifact,
+            ]:
+                ModelTrainer.track_mlflow(best_model, classification_metric)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_model_candidates(self) -> Tuple[Dict, Dict]:
+        """Return the candidate models and the hyperparameter grid of each"""
         models = {
-            "Random Forest": RandomForestClassifier(verbose=1),
+            "Random Forest": RandomForestClassifier(),
             "Decision Tree": DecisionTreeClassifier(),
-            "Gradient Boosting": GradientBoostingClassifier(verbose=1),
-            "Logistic Regression": LogisticRegression(verbose=1),
+            "Gradient Boosting": GradientBoostingClassifier(),
+            "Logistic Regression": LogisticRegression(),
             "AdaBoost": AdaBoostClassifier()
         }
 
@@ -81,14 +119,103 @@ class ModelTrainer:
             }
         }
 
+        return models, params
+
+    def get_cache_key_inputs(self) -> list:
+        """Everything the trained model depends on, for the stage cache"""
+        try:
+            train_array, test_array = self._get_input_arrays()
+            models, params = self.get_model_candidates()
+            config = self.model_trainer_config
+            return [
+                train_array,
+                test_array,
+                # The serving preprocessor is embedded in the NetworkModel and can
+                # change (e.g. its index size) while the arrays stay the same
+                get_model_fingerprint(self._get_preprocessor()),
+                {name: repr(model) for name, model in models.items()},
+                params,
+                {
+                    "cv_folds": config.cv_folds,
+                    "search_mode": config.search_mode,
+                    "halving_factor": config.halving_factor,
+                    "halving_resource": config.halving_resource,
+                    "search_budget_seconds": config.search_budget_seconds,
+                    "path_fitting": config.path_fitting,
+                    "deduplicate": config.deduplicate,
+                    # Memo hits return estimators fitted by earlier runs
+                    "cv_memo_enabled": config.cv_memo_enabled,
+                    "cv_memo_dir": config.cv_memo_dir,
+                    "cv_memo_max_bytes": config.cv_memo_max_bytes,
+                    "cv_memo_max_age_seconds": config.cv_memo_max_age_seconds,
+                    "compile_model": config.compile_model,
+                    "prediction_cache": config.prediction_cache,
+                    "prediction_cache_max_entries": PREDICTION_CACHE_MAX_ENTRIES,
+                    "prediction_cache_ttl_seconds": PREDICTION_CACHE_TTL_SECONDS,
+                },
+            ]
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_cv_memo(self):
+        """Cross-run memo of the search's fold scores and fitted estimators, if enabled"""
+        if not self.model_trainer_config.cv_memo_enabled:
+            return None
+        return CVMemo(
+            memo_dir=self.model_trainer_config.cv_memo_dir,
+            max_bytes=self.model_trainer_config.cv_memo_max_bytes,
+            max_age_seconds=self.model_trainer_config.cv_memo_max_age_seconds,
+        )
+
+    def deduplicate_training_data(self, X_train, y_train):
+        """
+        Distinct training rows and their counts as sample weights (None when
+        deduplication is off), with the compression ratio written to the
+        dedupe report
+        """
+        try:
+            if not self.model_trainer_config.deduplicate:
+                return X_train, y_train, None
+            X_unique, y_unique, counts = deduplicate_rows(X_train, y_train)
+            write_yaml_file(
+                self.model_trainer_config.dedupe_report_file_path,
+                {
+                    "rows": int(len(X_train)),
+                    "distinct_rows": int(len(X_unique)),
+                    "compression_ratio": float(len(X_train) / max(len(X_unique), 1)),
+                    "max_copies": int(counts.max(initial=0)),
+                },
+            )
+            return X_unique, y_unique, counts
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def train_model(self, X_train, y_train, X_test, y_test):
+        models, params = self.get_model_candidates()
+        memo = self.get_cv_memo()
+        # Search and fit on the distinct rows; metrics below use all of them
+        X_fit, y_fit, sample_weight = self.deduplicate_training_data(X_train, y_train)
+
         model_report: dict = evaluate_models(
-            X_train=X_train, 
-            y_train=y_train, 
+            X_train=X_fit, 
+            y_train=y_fit, 
             X_test= X_test, 
             y_test=y_test,
             models=models,
-            params=params
+            params=params,
+            cv=self.model_trainer_config.cv_folds,
+            n_jobs=self.model_trainer_config.n_jobs,
+            search_mode=self.model_trainer_config.search_mode,
+            factor=self.model_trainer_config.halving_factor,
+            resource=self.model_trainer_config.halving_resource,
+            budget_seconds=self.model_trainer_config.search_budget_seconds,
+            path_fitting=self.model_trainer_config.path_fitting,
+            memo=memo,
+            sample_weight=sample_weight
         )
+        if memo is not None:
+            logging.info(f"CV memo: {memo.hits} hits, {memo.misses} misses")
+            memo.evict()
 
         # Get the best model score from `model_report`
         best_model_score = max(
@@ -105,48 +232,82 @@ class ModelTrainer:
 
         classification_train_metric = get_classification_score(y_true=y_train, y_pred=y_train_pred)
 
-        # Track training experiments with mlflow 
-        self.track_mlflow(best_model, classification_train_metric)
-
         y_test_pred = best_model.predict(X_test)
         classification_test_metric = get_classification_score(y_true=y_test, y_pred=y_test_pred)
 
-        # Track test experiments with mlflow
-        self.track_mlflow(best_model, classification_test_metric)
+        # Training and test experiments are logged to MLflow by the pipeline's
+        # experiment tracking stage, see `track_experiments`
+        background = self.model_trainer_config.in_memory_handoff
 
-        preprocessor = load_object(
-            file_path=self.data_transformation_artifact.transformed_object_file_path
-        )
+        preprocessor = self._get_preprocessor()
         model_dir_path = os.path.dirname(self.model_trainer_config.trained_model_file_path)
         os.makedirs(model_dir_path, exist_ok=True)
 
+        # Compile step: the chosen tree ensemble as flat node arrays
+        compiled_model = compile_model(best_model) if self.model_trainer_config.compile_model else None
+
         network_model = NetworkModel(
             preprocessor=preprocessor,
-            model=best_model
+            model=best_model,
+            compiled_model=compiled_model,
+            prediction_cache=PredictionCache() if self.model_trainer_config.prediction_cache else None
+        )
+        write_artifact(
+            save_object,
+            file_path=self.model_trainer_config.trained_model_file_path,
+            obj=network_model,
+            background=background,
         )
-        save_object(file_path=self.model_trainer_config.trained_model_file_path, obj=network_model)
-
-        save_object("final_model/model.pkl", best_model)
 
         # Model Trainer Artifact
         model_trainer_artifact = ModelTrainerArtifact(
             trainer_model_file_path=self.model_trainer_config.trained_model_file_path,
             train_metric_artifact=classification_train_metric,
-            test_metric_artifact=classification_test_metric
+            test_metric_artifact=classification_test_metric,
+            best_model=best_model if background else None
         )
 
         logging.info(f"Model trainer Artifact: {model_trainer_artifact}")
 
         return model_trainer_artifact
 
-    def initiate_model_trainer(self) -> ModelTrainerArtifact:
+    @staticmethod
+    def export_final_model(model_trainer_artifact: ModelTrainerArtifact) -> None:
+        """Publish the model of a trainer artifact to final_model/"""
         try:
-            train_file_path = self.data_transformation_artifact.transformed_train_file_path
-            test_file_path = self.data_transformation_artifact.transformed_test_file_path
+            network_model = load_object(model_trainer_artifact.trainer_model_file_path)
+            save_object(FINAL_MODEL_FILE_PATH, network_model.model)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
 
-            # Load training and testing arrays
-            train_array = load_numpy_array(train_file_path)
-            test_array = load_numpy_array(test_file_path)
+    def _get_input_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Map training and testing arrays read-only, unless they were handed over in memory
+        if self._input_arrays is None:
+            train_array = self.data_transformation_artifact.train_array
+            test_array = self.data_transformation_artifact.test_array
+            if train_array is None:
+                train_array = load_numpy_array(
+                    self.data_transformation_artifact.transformed_train_file_path, mmap_mode="r"
+                )
+                test_array = load_numpy_array(
+                    self.data_transformation_artifact.transformed_test_file_path, mmap_mode="r"
+                )
+            self._input_arrays = (train_array, test_array)
+        return self._input_arrays
+
+    def _get_preprocessor(self):
+        # The serving preprocessor handed over in memory, else the persisted one
+        if self._preprocessor is None:
+            self._preprocessor = self.data_transformation_artifact.preprocessor
+            if self._preprocessor is None:
+                self._preprocessor = load_object(
+                    file_path=self.data_transformation_artifact.transformed_object_file_path
+                )
+        return self._preprocessor
+
+    def initiate_model_trainer(self) -> ModelTrainerArtifact:
+        try:
+            train_array, test_array = self._get_input_arrays()
 
             X_train, y_train, X_test, y_test = (
                 train_array[:, :-1],
@@ -2,6 +2,7 @@ import os
 import sys
 import numpy as np
 import pandas as pd
+from typing import Optional
 
 """
 Common constant variable for training pipeline
@@ -16,8 +17,56 @@ TEST_FILE_NAME: str = "test.csv"
 
 SCHEMA_FILE_PATH = os.path.join("data_schema", "schema.yaml")
 
+# Format of the tabular artifacts handed between stages: "npy" (a directory of
+# memory-mappable .npy columns), "parquet" (needs pyarrow) or "csv"
+ARTIFACT_FORMAT: str = "npy"
+ARTIFACT_FILE_EXTENSIONS: dict = {"csv": ".csv", "parquet": ".parquet", "npy": ".cols"}
+# Opt-in: in "npy" artifacts, store the integer columns holding only ternary
+# values as 2-bit packed rows (see utils/main_utils/packing.py): 8 bytes per
+# row for up to 32 such columns instead of one byte per column. Packed columns
+# are decoded into memory on load instead of memory-mapped
+ARTIFACT_NPY_PACK_TERNARY: bool = False
+# Hand DataFrames/arrays to the next stage in memory and persist artifacts on a
+# background thread instead of re-reading them from disk
+IN_MEMORY_HANDOFF: bool = True
+# Reuse a stage's artifact from an earlier run when its inputs and config hash
+# to the same key
+STAGE_CACHE_ENABLED: bool = True
+STAGE_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, ".stage_cache")
+
+# Values of the ternary features (schema.yaml's default allowed_values), the
+# domain of the 2-bit row packing in utils/main_utils/packing.py
+PACKED_FEATURE_DOMAIN: tuple = (-1, 0, 1)
+
+PIPELINE_STATE_FILE_NAME: str = "pipeline_state.yaml"
+PIPELINE_MAX_WORKERS: int = 4
+PIPELINE_TIMESTAMP_FORMAT: str = "%m_%d_%Y_%H_%M_%S"
+
 SAVED_MODEL_DIR = os.path.join("saved_models")
 MODEL_FILE_NAME = "model.pkl"
+# Category histograms of the training data the published model was built from
+REFERENCE_SKETCH_FILE_PATH: str = os.path.join("final_model", "reference_sketch.yaml")
+FINAL_MODEL_FILE_PATH: str = os.path.join("final_model", "model.pkl")
+FINAL_PREPROCESSOR_FILE_PATH: str = os.path.join("final_model", "preprocessor.pkl")
+# Batches up to this many rows are predicted by the compiled tree ensemble,
+# larger ones by the scikit-learn model, which is faster there
+COMPILED_MODEL_MAX_BATCH_ROWS: int = 64
+# Predictions of fully observed rows are cached per packed row (LRU with a time to live)
+PREDICTION_CACHE_MAX_ENTRIES: int = 100_000
+PREDICTION_CACHE_TTL_SECONDS: Optional[float] = 3600.0
+
+"""
+Inference server related constants start with SERVING VAR NAME
+"""
+SERVING_HOST: str = "127.0.0.1"
+SERVING_PORT: int = 8000
+# Concurrent requests are grouped into batches of at most this many rows; the
+# oldest request of a batch waits at most SERVING_MAX_WAIT_MS for it to fill
+SERVING_MAX_BATCH_SIZE: int = 64
+SERVING_MAX_WAIT_MS: float = 5.0
+# Latencies kept for the p50/p99 counters
+SERVING_LATENCY_WINDOW: int = 10_000
+SERVING_PREDICTION_CACHE: bool = True
 
 """
 All Data Ingestion related constants start with DATA_INGESTION VAR NAME
@@ -28,6 +77,27 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: float = 0.2
+# Opt-in: keep all copies of a feature vector on the same side of the
+# train/test split, so the test set never scores rows the model was trained
+# on. Such a split can fail the drift check on data with many duplicates
+DATA_INGESTION_GROUPED_SPLIT: bool = False
+# "full" loads the whole collection at once, "streaming" reads the cursor in batches,
+# "parallel" scans key ranges of the collection concurrently
+DATA_INGESTION_EXPORT_MODE: str = "streaming"
+DATA_INGESTION_BATCH_SIZE: int = 10_000
+DATA_INGESTION_NUM_WORKERS: int = 4
+DATA_INGESTION_PARTITION_KEY: str = "_id"
+# Incremental mode only fetches documents past the stored high-water mark and
+# appends them to a feature store that persists across runs
+DATA_INGESTION_INCREMENTAL: bool = False
+DATA_INGESTION_WATERMARK_FIELD: str = "_id"
+DATA_INGESTION_INCREMENTAL_STORE_DIR: str = "feature_store"
+DATA_INGESTION_WATERMARK_FILE_NAME: str = "watermark.yaml"
+DATA_INGESTION_MISSING_VALUES: list = ["na"]
+# Check every ingested batch for drift against the published reference sketch
+DATA_INGESTION_DRIFT_CHECK: bool = True
+DATA_INGESTION_DRIFT_REPORT_DIR: str = "drift_report"
+DATA_INGESTION_DRIFT_REPORT_FILE_NAME: str = "report.yaml"
 
 """
 Data Validation related constant start with DATA_VALIDATION VAR NAME
@@ -35,8 +105,16 @@ Data Validation related constant start with DATA_VALIDATION VAR NAME
 DATA_VALIDATION_DIR_NAME: str = "data_validation"
 DATA_VALIDATION_VALID_DIR: str = "validated"
 DATA_VALIDATION_INVALID_DIR: str = "invalid"
+# Rows with a cell outside its dtype or allowed values
+DATA_VALIDATION_QUARANTINE_DIR: str = "quarantine"
+DATA_VALIDATION_QUARANTINE_REPORT_FILE_NAME: str = "report.yaml"
 DATA_VALIDATION_DRIFT_REPORT_DIR: str = "drift_report"
 DATA_VALIDATION_DRIFT_REPORT_FILE_NAME: str = "report.yaml"
+# Test that flags a column as drifted: "ks", "chi2" or "psi"
+DATA_VALIDATION_DRIFT_METHOD: str = "ks"
+DATA_VALIDATION_DRIFT_THRESHOLD: float = 0.05
+DATA_VALIDATION_PSI_THRESHOLD: float = 0.2
+DATA_VALIDATION_REFERENCE_SKETCH_FILE_NAME: str = "reference_sketch.yaml"
 PREPROCESSING_OBJECT_FILE_NAME = "preprocessing.pkl"
 
 """
@@ -46,6 +124,14 @@ DATA_TRANSFORMATION_DIR_NAME: str = "data_transformation"
 DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR: str = "transformed"
 DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR: str = "transformed_object"
 
+# Imputation strategy, see network_security/utils/ml_utils/impute/imputer.py:
+# "knn" (scikit-learn's KNNImputer), "chunked_knn" (same result, bounded
+# memory), "approximate_knn", "bounded_knn", "mode" or "conditional_mode"
+DATA_TRANSFORMATION_IMPUTER_STRATEGY: str = "chunked_knn"
+# The preprocessor shipped with the model imputes from at most this many
+# distinct training rows, so its size does not grow with the training set
+DATA_TRANSFORMATION_SERVING_INDEX_ROWS: int = 2048
+
 # KNN Imputer related constants
 DATA_TRANSFORMATION_IMPUTER_PARAMS: dict = {
     "missing_values": np.nan,
@@ -66,5 +152,32 @@ MODEL_TRAINER_TRAINED_MODEL_DIR: str = "trained_model"
 MODEL_TRAINER_TRAINED_MODEL_NAME: str = "model.pkl"
 MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
 MODEL_TRAINER_OVER_FITTING_UNDER_FITTING_THRESHOLD: float = 0.05
+MODEL_TRAINER_CV_FOLDS: int = 3
+# Worker processes of the hyperparameter search, -1 for one per core
+MODEL_TRAINER_N_JOBS: int = -1
+# Hyperparameter search: "grid" (exhaustive) or "halving" (successive halving,
+# optionally bounded by a wall-clock budget in seconds)
+MODEL_TRAINER_SEARCH_MODE: str = "grid"
+MODEL_TRAINER_HALVING_FACTOR: int = 3
+# Resource the halving rungs grow: a grid parameter or "n_samples" (rows)
+MODEL_TRAINER_HALVING_RESOURCE: str = "n_estimators"
+MODEL_TRAINER_SEARCH_BUDGET_SECONDS: Optional[float] = None
+# Score each n_estimators sweep of forests and boosting from one growing
+# ensemble (warm_start / staged_predict) instead of one fit per value
+MODEL_TRAINER_PATH_FITTING: bool = True
+# Flatten the chosen tree model into node arrays for low-latency prediction
+MODEL_TRAINER_COMPILE_MODEL: bool = True
+# Opt-in: attach a PredictionCache to the trained NetworkModel (the serving
+# layer attaches its own, see SERVING_PREDICTION_CACHE)
+MODEL_TRAINER_PREDICTION_CACHE: bool = False
+# Opt-in: fit on the distinct training rows, weighted by how often each occurs
+MODEL_TRAINER_DEDUPLICATE: bool = False
+MODEL_TRAINER_DEDUPE_REPORT_FILE_NAME: str = "dedupe_report.yaml"
+# Fold scores and fitted best estimators memoized across runs, keyed by the
+# training data fingerprint, estimator and parameters
+MODEL_TRAINER_CV_MEMO_ENABLED: bool = True
+MODEL_TRAINER_CV_MEMO_DIR: str = os.path.join(ARTIFACT_DIR, ".cv_memo")
+MODEL_TRAINER_CV_MEMO_MAX_BYTES: int = 512 * 2**20
+MODEL_TRAINER_CV_MEMO_MAX_AGE_SECONDS: float = 30 * 24 * 3600
 
 TRAINING_BUCKET_NAME = "networksecurity"
@@ -1,24 +1,54 @@
-from pydantic import BaseModel
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, ConfigDict, Field
+
+
+def InMemoryHandle():
+    """
+    Optional in-memory copy of an artifact, handed to the next stage in the same
+    process. Never serialised or printed; the file paths stay authoritative.
+    """
+    return Field(default=None, exclude=True, repr=False)
 
 
 class DataIngestionArtifact(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     train_file_path: str
     test_file_path: str
+    train_df: Optional[pd.DataFrame] = InMemoryHandle()
+    test_df: Optional[pd.DataFrame] = InMemoryHandle()
 
 
 class DataValidationArtifact(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     validation_status: bool
     valid_train_file_path: str
     valid_test_file_path: str
     invalid_train_file_path: str
     invalid_test_file_path: str
     drift_report_file_path: str
+    reference_sketch_file_path: str = ""
+    quarantine_train_file_path: str = ""
+    quarantine_test_file_path: str = ""
+    quarantine_report_file_path: str = ""
+    quarantined_rows: int = 0
+    train_df: Optional[pd.DataFrame] = InMemoryHandle()
+    test_df: Optional[pd.DataFrame] = InMemoryHandle()
 
 
 class DataTransformationArtifact(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     transformed_object_file_path: str
     transformed_train_file_path: str
     transformed_test_file_path: str
+    train_array: Optional[np.ndarray] = InMemoryHandle()
+    test_array: Optional[np.ndarray] = InMemoryHandle()
+    preprocessor: Optional[Any] = InMemoryHandle()
 
 class ClassificationMetricArtifact(BaseModel):
     f1_score: float
@@ -26,6 +56,9 @@ class ClassificationMetricArtifact(BaseModel):
     recall_score: float
 
 class ModelTrainerArtifact(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     trainer_model_file_path: str
     train_metric_artifact: ClassificationMetricArtifact
-    test_metric_artifact: ClassificationMetricArtifact
\ No newline at end of file
+    test_metric_artifact: ClassificationMetricArtifact
+    best_model: Optional[Any] = InMemoryHandle()
\ No newline at end of file
@@ -1,39 +1,94 @@
 import os
 from datetime import datetime
+from typing import Optional
 
 from network_security.constants import training_pipeline as tp
 
 
+def artifact_file_name(file_name: str, artifact_format: str) -> str:
+    """Swap the extension of a tabular artifact name for the one of `artifact_format`"""
+    return os.path.splitext(file_name)[0] + tp.ARTIFACT_FILE_EXTENSIONS[artifact_format]
+
+
 class TrainingPipelineConfig:
-    def __init__(self, timestamp=datetime.now()) -> None:
-        timestamp = timestamp.strftime("%m_%d_%Y_%H_%M_%S")
+    def __init__(
+        self,
+        timestamp=datetime.now(),
+        artifact_format: str = tp.ARTIFACT_FORMAT,
+        in_memory_handoff: bool = tp.IN_MEMORY_HANDOFF,
+    ) -> None:
+        timestamp = timestamp.strftime(tp.PIPELINE_TIMESTAMP_FORMAT)
         self.pipeline_name = tp.PIPELINE_NAME
         self.artifact_dir_name = tp.ARTIFACT_DIR
         self.artifact_dir = os.path.join(self.artifact_dir_name, timestamp)
         self.timestamp: str = timestamp
+        if artifact_format not in tp.ARTIFACT_FILE_EXTENSIONS:
+            raise ValueError(f"Unsupported artifact format: {artifact_format}")
+        self.artifact_format: str = artifact_format
+        self.in_memory_handoff: bool = in_memory_handoff
+        self.pipeline_state_file_path: str = os.path.join(
+            self.artifact_dir, tp.PIPELINE_STATE_FILE_NAME
+        )
 
 
 class DataIngestionConfig:
     def __init__(self, tp_config: TrainingPipelineConfig) -> None:
+        self.in_memory_handoff: bool = tp_config.in_memory_handoff
+        file_name = artifact_file_name(tp.FILE_NAME, tp_config.artifact_format)
+        train_file_name = artifact_file_name(tp.TRAIN_FILE_NAME, tp_config.artifact_format)
+        test_file_name = artifact_file_name(tp.TEST_FILE_NAME, tp_config.artifact_format)
         self.data_ingestion_dir: str = os.path.join(
             tp_config.artifact_dir, tp.DATA_INGESTION_DIR_NAME
         )
         self.feature_store_file_path: str = os.path.join(
-            self.data_ingestion_dir, tp.DATA_INGESTION_FEATURE_STORE_DIR, tp.FILE_NAME
+            self.data_ingestion_dir, tp.DATA_INGESTION_FEATURE_STORE_DIR, file_name
         )
         self.training_file_path: str = os.path.join(
-            self.data_ingestion_dir, tp.DATA_INGESTION_INGESTED_DIR, tp.TRAIN_FILE_NAME
+            self.data_ingestion_dir, tp.DATA_INGESTION_INGESTED_DIR, train_file_name
         )
         self.testing_file_path: str = os.path.join(
-            self.data_ingestion_dir, tp.DATA_INGESTION_INGESTED_DIR, tp.TEST_FILE_NAME
+            self.data_ingestion_dir, tp.DATA_INGESTION_INGESTED_DIR, test_file_name
         )
         self.train_test_split_ratio: float = tp.DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
+        self.grouped_split: bool = tp.DATA_INGESTION_GROUPED_SPLIT
         self.collection_name: str = tp.DATA_INGESTION_COLLECTION_NAME
         self.database_name: str = tp.DATA_INGESTION_DATABASE_NAME
+        self.export_mode: str = tp.DATA_INGESTION_EXPORT_MODE
+        self.batch_size: int = tp.DATA_INGESTION_BATCH_SIZE
+        self.num_workers: int = tp.DATA_INGESTION_NUM_WORKERS
+        self.partition_key: str = tp.DATA_INGESTION_PARTITION_KEY
+        self.incremental: bool = tp.DATA_INGESTION_INCREMENTAL
+        self.watermark_field: str = tp.DATA_INGESTION_WATERMARK_FIELD
+        self.incremental_store_dir: str = os.path.join(
+            tp_config.artifact_dir_name, tp.DATA_INGESTION_INCREMENTAL_STORE_DIR
+        )
+        self.incremental_feature_store_file_path: str = os.path.join(
+            self.incremental_store_dir, file_name
+        )
+        self.incremental_training_file_path: str = os.path.join(
+            self.incremental_store_dir, train_file_name
+        )
+        self.incremental_testing_file_path: str = os.path.join(
+            self.incremental_store_dir, test_file_name
+        )
+        self.watermark_file_path: str = os.path.join(
+            self.incremental_store_dir, tp.DATA_INGESTION_WATERMARK_FILE_NAME
+        )
+        self.missing_values: list = tp.DATA_INGESTION_MISSING_VALUES
+        self.drift_check: bool = tp.DATA_INGESTION_DRIFT_CHECK
+        self.reference_sketch_file_path: str = tp.REFERENCE_SKETCH_FILE_PATH
+        self.drift_report_file_path: str = os.path.join(
+            self.data_ingestion_dir,
+            tp.DATA_INGESTION_DRIFT_REPORT_DIR,
+            tp.DATA_INGESTION_DRIFT_REPORT_FILE_NAME,
+        )
 
 
 class DataValidationConfig:
     def __init__(self, tp_config: TrainingPipelineConfig) -> None:
+        self.in_memory_handoff: bool = tp_config.in_memory_handoff
+        train_file_name = artifact_file_name(tp.TRAIN_FILE_NAME, tp_config.artifact_format)
+        test_file_name = artifact_file_name(tp.TEST_FILE_NAME, tp_config.artifact_format)
         self.data_validation_dir: str = os.path.join(
             tp_config.artifact_dir, tp.DATA_VALIDATION_DIR_NAME
         )
@@ -44,26 +99,48 @@ class DataValidationConfig:
             self.data_validation_dir, tp.DATA_VALIDATION_INVALID_DIR
         )
         self.valid_train_file_path: str = os.path.join(
-            self.valid_data_dir, tp.TRAIN_FILE_NAME
+            self.valid_data_dir, train_file_name
         )
         self.valid_test_file_path: str = os.path.join(
-            self.valid_data_dir, tp.TEST_FILE_NAME
+            self.valid_data_dir, test_file_name
         )
         self.invalid_train_file_path: str = os.path.join(
-            self.invalid_data_dir, tp.TRAIN_FILE_NAME
+            self.invalid_data_dir, train_file_name
         )
         self.invalid_test_file_path: str = os.path.join(
-            self.invalid_data_dir, tp.TEST_FILE_NAME
+            self.invalid_data_dir, test_file_name
+        )
+        self.quarantine_dir: str = os.path.join(
+            self.data_validation_dir, tp.DATA_VALIDATION_QUARANTINE_DIR
+        )
+        # Always csv, so rejected rows stay readable. The streaming and parallel
+        # exports store cells they cannot parse as the invalid-value marker,
+        # which the quarantine report counts per column
+        self.quarantine_train_file_path: str = os.path.join(
+            self.quarantine_dir, tp.TRAIN_FILE_NAME
+        )
+        self.quarantine_test_file_path: str = os.path.join(
+            self.quarantine_dir, tp.TEST_FILE_NAME
+        )
+        self.quarantine_report_file_path: str = os.path.join(
+            self.quarantine_dir, tp.DATA_VALIDATION_QUARANTINE_REPORT_FILE_NAME
         )
         self.drift_report_file_path: str = os.path.join(
             self.data_validation_dir,
             tp.DATA_VALIDATION_DRIFT_REPORT_DIR,
             tp.DATA_VALIDATION_DRIFT_REPORT_FILE_NAME,
         )
+        self.drift_method: str = tp.DATA_VALIDATION_DRIFT_METHOD
+        self.drift_threshold: float = tp.DATA_VALIDATION_DRIFT_THRESHOLD
+        self.psi_threshold: float = tp.DATA_VALIDATION_PSI_THRESHOLD
+        self.reference_sketch_file_path: str = os.path.join(
+            self.data_validation_dir, tp.DATA_VALIDATION_REFERENCE_SKETCH_FILE_NAME
+        )
 
 
 class DataTransformationConfig:
     def __init__(self, tp_config: TrainingPipelineConfig) -> None:
+        self.in_memory_handoff: bool = tp_config.in_memory_handoff
         self.data_transformation_dir: str = os.path.join(
             tp_config.artifact_dir, tp.DATA_TRANSFORMATION_DIR_NAME
         )
@@ -85,6 +162,7 @@ class DataTransformationConfig:
 
 class ModelTrainerConfig:
     def __init__(self, tp_config: TrainingPipelineConfig) -> None:
+        self.in_memory_handoff: bool = tp_config.in_memory_handoff
         self.model_trainer_dir: str = os.path.join(
             tp_config.artifact_dir, tp.MODEL_TRAINER_DIR_NAME
         )
@@ -94,4 +172,21 @@ class ModelTrainerConfig:
             tp.MODEL_FILE_NAME
         )
         self.expected_accuracy: float = tp.MODEL_TRAINER_EXPECTED_SCORE
-        self.overfitting_threshold: float = tp.MODEL_TRAINER_OVER_FITTING_UNDER_FITTING_THRESHOLD
\ No newline at end of file
+        self.overfitting_threshold: float = tp.MODEL_TRAINER_OVER_FITTING_UNDER_FITTING_THRESHOLD
+        self.cv_folds: int = tp.MODEL_TRAINER_CV_FOLDS
+        self.n_jobs: int = tp.MODEL_TRAINER_N_JOBS
+        self.search_mode: str = tp.MODEL_TRAINER_SEARCH_MODE
+        self.halving_factor: int = tp.MODEL_TRAINER_HALVING_FACTOR
+        self.halving_resource: str = tp.MODEL_TRAINER_HALVING_RESOURCE
+        self.search_budget_seconds: Optional[float] = tp.MODEL_TRAINER_SEARCH_BUDGET_SECONDS
+        self.path_fitting: bool = tp.MODEL_TRAINER_PATH_FITTING
+        self.compile_model: bool = tp.MODEL_TRAINER_COMPILE_MODEL
+        self.prediction_cache: bool = tp.MODEL_TRAINER_PREDICTION_CACHE
+        self.deduplicate: bool = tp.MODEL_TRAINER_DEDUPLICATE
+        self.dedupe_report_file_path: str = os.path.join(
+            self.model_trainer_dir, tp.MODEL_TRAINER_DEDUPE_REPORT_FILE_NAME
+        )
+        self.cv_memo_enabled: bool = tp.MODEL_TRAINER_CV_MEMO_ENABLED
+        self.cv_memo_dir: str = tp.MODEL_TRAINER_CV_MEMO_DIR
+        self.cv_memo_max_bytes: int = tp.MODEL_TRAINER_CV_MEMO_MAX_BYTES
+        self.cv_memo_max_age_seconds: float = tp.MODEL_TRAINER_CV_MEMO_MAX_AGE_SECONDS
\ No newline at end of file
@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Type
+
+from pydantic import BaseModel
+
+from network_security.constants.training_pipeline import PIPELINE_MAX_WORKERS
+from network_security.exception.exception import NetworkSecurityException
+from network_security.logging.logger import logging
+from network_security.utils.main_utils.utils import (
+    read_yaml_file,
+    write_yaml_file,
+    pending_background_writes,
+)
+
+
+class PipelineStage:
+    """A node of the pipeline DAG: `run` receives the artifacts of `depends_on` in order"""
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[..., Optional[BaseModel]],
+        depends_on: Sequence[str] = (),
+        artifact_cls: Optional[Type[BaseModel]] = None,
+    ) -> None:
+        self.name = name
+        self.run = run
+        self.depends_on = list(depends_on)
+        self.artifact_cls = artifact_cls
+
+
+class PipelineRunner:
+    """
+    Runs pipeline stages as a DAG on a thread pool.
+
+    A stage starts as soon as all of its dependencies have finished, so
+    stages that only share dependencies (siblings) run concurrently. The
+    status, wall time and artifact of every stage are recorded in the state
+    file at `state_file_path`; a stage's state is only flushed once the
+    artifact files it queued for background writing are on disk. With
+    `resume=True` the stages the state file records as completed are skipped
+    and their recorded artifacts are handed to the stages that depend on them.
+    """
+
+    def __init__(
+        self, state_file_path: str, resume: bool = False, max_workers: int = PIPELINE_MAX_WORKERS
+    ) -> None:
+        try:
+            self.state_file_path = state_file_path
+            self._state: Dict = {"status": "running", "stages": {}}
+            if resume and os.path.exists(state_file_path):
+                self._state = read_yaml_file(state_file_path)
+                self._state["status"] = "running"
+                logging.info(f"Resuming pipeline run from {state_file_path}")
+
+            self.max_workers = max_workers
+            self.stage_timings: Dict[str, float] = {}
+            self._state_lock = threading.Lock()
+            # Single thread, so state snapshots hit the disk in order
+            self._state_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-state")
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _flush_state(self) -> None:
+        """Write a snapshot of the state once the writes queued so far are on disk"""
+        with self._state_lock:
+            snapshot = {
+                "status": self._state["status"],
+                "stages": {name: dict(stage) for name, stage in self._state["stages"].items()},
+            }
+        writes = pending_background_writes()
+
+        def write_state() -> None:
+            wait(writes)
+            write_yaml_file(self.state_file_path, snapshot)
+
+        self._state_writer.submit(write_state)
+
+    def _record_stage(self, name: str, status: str, seconds: float, artifact: Optional[BaseModel]) -> None:
+        with self._state_lock:
+            self._state["stages"][name] = {
+                "status": status,
+                "seconds": round(seconds, 3),
+                "artifact": artifact.model_dump(mode="json") if artifact is not None else None,
+            }
+        self._flush_state()
+
+    def _run_stage(self, stage: PipelineStage, inputs: list) -> Optional[BaseModel]:
+        started = time.perf_counter()
+        try:
+            artifact = stage.run(*inputs)
+        except Exception:
+            self._record_stage(stage.name, "failed", time.perf_counter() - started, None)
+            raise
+        seconds = time.perf_counter() - started
+        self.stage_timings[stage.name] = seconds
+        logging.info(f"Stage {stage.name} completed in {seconds:.2f}s")
+        self._record_stage(stage.name, "completed", seconds, artifact)
+        return artifact
+
+    def _completed_artifacts(self, stages: List[PipelineStage]) -> Dict[str, Optional[BaseModel]]:
+        """Artifacts of the stages a resumed run already completed"""
+        results = {}
+        for stage in stages:
+            recorded = self._state["stages"].get(stage.name)
+            if recorded is None or recorded["status"] != "completed":
+                continue
+            artifact = recorded["artifact"]
+            if stage.artifact_cls is not None and artifact is not None:
+                artifact = stage.artifact_cls.model_validate(artifact)
+            results[stage.name] = artifact
+            logging.info(f"Skipping stage {stage.name}, completed in a previous attempt")
+        return results
+
+    def run(self, stages: List[PipelineStage]) -> Dict[str, Optional[BaseModel]]:
+        """Run `stages` and return the artifact of every stage by name"""
+        try:
+            results = self._completed_artifacts(stages)
+            pending = {stage.name: stage for stage in stages if stage.name not in results}
+            running = {}
+
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline-stage") as executor:
+                while pending or running:
+                    for name, stage in list(pending.items()):
+                        if all(dependency in results for dependency in stage.depends_on):
+                            inputs = [results[dependency] for dependency in stage.depends_on]
+                            running[executor.submit(self._run_stage, stage, inputs)] = name
+                            del pending[name]
+                    if not running:
+                        raise ValueError(f"Unsatisfiable stage dependencies: {list(pending)}")
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[running.pop(future)] = future.result()
+
+            with self._state_lock:
+                self._state["status"] = "completed"
+            self._flush_state()
+            logging.info(f"Pipeline stage timings (s): {self.stage_timings}")
+            return results
+        except Exception as e:
+            with self._state_lock:
+                self._state["status"] = "failed"
+            self._flush_state()
+            raise NetworkSecurityException(e, sys)
+        finally:
+            self._state_writer.shutdown(wait=True)
@@ -0,0 +1,121 @@
+import os
+import sys
+from typing import Callable, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from network_security.constants.training_pipeline import STAGE_CACHE_DIR, STAGE_CACHE_ENABLED
+from network_security.exception.exception import NetworkSecurityException
+from network_security.logging.logger import logging
+from network_security.utils.main_utils.utils import get_fingerprint, get_artifact_format
+
+
+class StageCache:
+    """
+    Content-addressed cache of stage artifacts.
+
+    A stage's key is the fingerprint of its inputs and effective config (see the
+    components' `get_cache_key_inputs`). When an earlier run produced an artifact
+    under the same key and all of its files still exist, that artifact is reused
+    instead of recomputing the stage.
+
+    Entries are only written by `commit`, which must run after the artifacts
+    themselves have been persisted, so a key never points at a half-written file.
+    """
+
+    def __init__(self, cache_dir: str = STAGE_CACHE_DIR, enabled: bool = STAGE_CACHE_ENABLED) -> None:
+        try:
+            self.cache_dir = cache_dir
+            self.enabled = enabled
+            self._pending: Dict[Tuple[str, str], BaseModel] = {}
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @staticmethod
+    def make_key(stage: str, inputs: list) -> str:
+        return get_fingerprint(stage, *inputs)
+
+    def _entry_path(self, stage: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage, f"{key}.json")
+
+    @staticmethod
+    def _artifact_files(artifact: BaseModel) -> list:
+        paths = []
+        for name, value in artifact.model_dump().items():
+            if name.endswith("file_path") and isinstance(value, str) and value:
+                paths.append(value)
+        return paths
+
+    @staticmethod
+    def _is_complete(file_path: str) -> bool:
+        if not os.path.exists(file_path):
+            return False
+        try:
+            if get_artifact_format(file_path) == "npy":
+                # A column directory is only usable once its metadata is written
+                return os.path.exists(os.path.join(file_path, "_columns.yaml"))
+        except ValueError:
+            pass
+        return True
+
+    def lookup(self, stage: str, key: str, artifact_cls: Type[BaseModel]) -> Optional[BaseModel]:
+        try:
+            if not self.enabled:
+                return None
+            entry_path = self._entry_path(stage, key)
+            if not os.path.exists(entry_path):
+                return None
+            with open(entry_path) as entry_file:
+                artifact = artifact_cls.model_validate_json(entry_file.read())
+            if not all(self._is_complete(path) for path in self._artifact_files(artifact)):
+                logging.info(f"Stage cache entry {stage}/{key} refers to missing files")
+                return None
+            logging.info(f"Stage cache hit for {stage}: {key}")
+            return artifact
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def store(self, stage: str, key: str, artifact: BaseModel) -> None:
+        """Queue an entry; it is written by `commit`"""
+        if self.enabled:
+            self._pending[(stage, key)] = artifact
+
+    def commit(self) -> None:
+        try:
+            for (stage, key), artifact in self._pending.items():
+                entry_path = self._entry_path(stage, key)
+                os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+                with open(entry_path, "w") as entry_file:
+                    entry_file.write(artifact.model_dump_json())
+                logging.info(f"Stored stage cache entry {stage}/{key}")
+            self._pending.clear()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def run(
+        self,
+        stage: str,
+        component,
+        initiate: Callable[[], BaseModel],
+        artifact_cls: Type[BaseModel],
+        on_hit: Optional[Callable[[BaseModel], None]] = None,
+    ) -> BaseModel:
+        """
+        Return the cached artifact of `stage` for `component`'s inputs, or run
+        `initiate` and queue its artifact. `on_hit` replays side effects of the
+        stage that live outside its artifact (e.g. files under final_model/).
+        """
+        try:
+            if not self.enabled:
+                return initiate()
+            key = self.make_key(stage, component.get_cache_key_inputs())
+            artifact = self.lookup(stage, key, artifact_cls)
+            if artifact is not None:
+                if on_hit is not None:
+                    on_hit(artifact)
+                return artifact
+            artifact = initiate()
+            self.store(stage, key, artifact)
+            return artifact
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
@@ -0,0 +1,213 @@
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from network_security.components.data_ingestion import DataIngestion
+from network_security.components.data_validation import DataValidation
+from network_security.components.data_transformation import DataTransformation
+from network_security.components.model_trainer import ModelTrainer
+from network_security.constants.training_pipeline import (
+    ARTIFACT_DIR,
+    PIPELINE_MAX_WORKERS,
+    PIPELINE_STATE_FILE_NAME,
+    PIPELINE_TIMESTAMP_FORMAT,
+)
+from network_security.entity.artifact import (
+    DataIngestionArtifact,
+    DataValidationArtifact,
+    DataTransformationArtifact,
+    ModelTrainerArtifact,
+)
+from network_security.entity.config import (
+    TrainingPipelineConfig,
+    DataIngestionConfig,
+    DataValidationConfig,
+    DataTransformationConfig,
+    ModelTrainerConfig,
+)
+from network_security.exception.exception import NetworkSecurityException
+from network_security.logging.logger import logging
+from network_security.pipeline.pipeline_runner import PipelineRunner, PipelineStage
+from network_security.pipeline.stage_cache import StageCache
+from network_security.utils.main_utils.utils import read_yaml_file, wait_for_background_writes
+
+
+class TrainingPipeline:
+    """
+    The training stages as a DAG, run by a PipelineRunner.
+
+    Ingestion, validation, transformation and training form a chain; once
+    the model is trained, its MLflow logging and the persisting and
+    publishing of the artifacts (to final_model/, all files of one run at
+    once) are sibling stages that run concurrently.
+    The status, wall time and artifact of every stage are recorded in
+    `pipeline_state.yaml` inside the run's artifact directory.
+    `resume=True` picks up the most recent unfinished run and skips the
+    stages it already completed.
+    """
+
+    def __init__(
+        self,
+        training_pipeline_config: Optional[TrainingPipelineConfig] = None,
+        resume: bool = False,
+        max_workers: int = PIPELINE_MAX_WORKERS,
+    ) -> None:
+        try:
+            if resume and training_pipeline_config is None:
+                training_pipeline_config = self._find_unfinished_run()
+            self.training_pipeline_config = training_pipeline_config or TrainingPipelineConfig(
+                timestamp=datetime.now()
+            )
+            self.runner = PipelineRunner(
+                self.training_pipeline_config.pipeline_state_file_path,
+                resume=resume,
+                max_workers=max_workers,
+            )
+            self.stage_cache = StageCache()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @property
+    def stage_timings(self) -> Dict[str, float]:
+        return self.runner.stage_timings
+
+    @staticmethod
+    def _find_unfinished_run() -> Optional[TrainingPipelineConfig]:
+        """Config of the most recent run whose state is not completed, if any"""
+        if not os.path.isdir(ARTIFACT_DIR):
+            return None
+        runs = []
+        for name in os.listdir(ARTIFACT_DIR):
+            state_file_path = os.path.join(ARTIFACT_DIR, name, PIPELINE_STATE_FILE_NAME)
+            if not os.path.exists(state_file_path):
+                continue
+            try:
+                timestamp = datetime.strptime(name, PIPELINE_TIMESTAMP_FORMAT)
+            except ValueError:
+                continue
+            if read_yaml_file(state_file_path).get("status") != "completed":
+                runs.append(timestamp)
+        if not runs:
+            return None
+        return TrainingPipelineConfig(timestamp=max(runs))
+
+    def start_data_ingestion(self) -> DataIngestionArtifact:
+        try:
+            data_ingestion = DataIngestion(
+                data_ingestion_config=DataIngestionConfig(tp_config=self.training_pipeline_config)
+            )
+            logging.info("Initiating data ingestion")
+            return data_ingestion.initiate_data_ingestion()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def start_data_validation(self, data_ingestion_artifact: DataIngestionArtifact) -> DataValidationArtifact:
+        try:
+            data_validation = DataValidation(
+                data_ingestion_artifact=data_ingestion_artifact,
+                data_validation_config=DataValidationConfig(tp_config=self.training_pipeline_config),
+            )
+            logging.info("Initiating data validation")
+            return self.stage_cache.run(
+                "data_validation",
+                data_validation,
+                data_validation.initiate_data_validation,
+                DataValidationArtifact,
+            )
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def start_data_transformation(
+        self, data_validation_artifact: DataValidationArtifact
+    ) -> DataTransformationArtifact:
+        try:
+            data_transformation = DataTransformation(
+                data_validation_artifact=data_validation_artifact,
+                data_transformation_config=DataTransformationConfig(tp_config=self.training_pipeline_config),
+            )
+            logging.info("Initiating data transformation")
+            return self.stage_cache.run(
+                "data_transformation",
+                data_transformation,
+                data_transformation.initiate_data_transformation,
+                DataTransformationArtifact,
+            )
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def start_model_trainer(
+        self, data_transformation_artifact: DataTransformationArtifact
+    ) -> ModelTrainerArtifact:
+        try:
+            model_trainer = ModelTrainer(
+                model_trainer_config=ModelTrainerConfig(tp_config=self.training_pipeline_config),
+                data_transformation_artifact=data_transformation_artifact,
+            )
+            logging.info("Model Training Started")
+            return self.stage_cache.run(
+                "model_trainer",
+                model_trainer,
+                model_trainer.initiate_model_trainer,
+                ModelTrainerArtifact,
+            )
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def persist_artifacts(
+        self,
+        data_validation_artifact: DataValidationArtifact,
+        data_transformation_artifact: DataTransformationArtifact,
+        model_trainer_artifact: ModelTrainerArtifact,
+    ) -> None:
+        """
+        Wait for the background artifact writes, publish the run's reference
+        sketch, preprocessor and model to final_model/ together and commit the
+        stage cache. Nothing is published by a run that fails before.
+        """
+        try:
+            wait_for_background_writes()
+            DataValidation.export_reference_sketch(data_validation_artifact)
+            DataTransformation.export_final_preprocessor(data_transformation_artifact)
+            ModelTrainer.export_final_model(model_trainer_artifact)
+            self.stage_cache.commit()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def start_experiment_tracking(self, model_trainer_artifact: ModelTrainerArtifact) -> None:
+        try:
+            logging.info("Logging the trained model to MLflow")
+            ModelTrainer.track_experiments(model_trainer_artifact)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_stages(self) -> List[PipelineStage]:
+        return [
+            PipelineStage("data_ingestion", self.start_data_ingestion, [], DataIngestionArtifact),
+            PipelineStage(
+                "data_validation", self.start_data_validation, ["data_ingestion"], DataValidationArtifact
+            ),
+            PipelineStage(
+                "data_transformation",
+                self.start_data_transformation,
+                ["data_validation"],
+                DataTransformationArtifact,
+            ),
+            PipelineStage(
+                "model_trainer", self.start_model_trainer, ["data_transformation"], ModelTrainerArtifact
+            ),
+            # Siblings: both only need the trained model
+            PipelineStage("experiment_tracking", self.start_experiment_tracking, ["model_trainer"]),
+            PipelineStage(
+                "persist_artifacts",
+                self.persist_artifacts,
+                ["data_validation", "data_transformation", "model_trainer"],
+            ),
+        ]
+
+    def run_pipeline(self) -> ModelTrainerArtifact:
+        try:
+            results = self.runner.run(self.get_stages())
+            return results["model_trainer"]
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
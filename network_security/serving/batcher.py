@@ -0,0 +1,169 @@
+import sys
+import time
+import queue
+import threading
+import numpy as np
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, List, Sequence
+
+from network_security.constants.training_pipeline import (
+    SERVING_MAX_BATCH_SIZE,
+    SERVING_MAX_WAIT_MS,
+    SERVING_LATENCY_WINDOW,
+)
+from network_security.exception.exception import NetworkSecurityException
+from network_security.logging.logger import logging
+
+
+class LatencyStats:
+    """
+    Thread-safe serving counters: request, batch and error totals, throughput
+    since the start and p50/p99 over the last `window` request latencies.
+    """
+
+    def __init__(self, window: int = SERVING_LATENCY_WINDOW) -> None:
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latencies.clear()
+            self.requests = 0
+            self.batches = 0
+            self.errors = 0
+            self.started_at = time.perf_counter()
+
+    def record_batch(self, latencies: Sequence[float], failed: bool = False) -> None:
+        with self._lock:
+            self._latencies.extend(latencies)
+            self.requests += len(latencies)
+            self.batches += 1
+            if failed:
+                self.errors += len(latencies)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = np.asarray(self._latencies, dtype=np.float64)
+            elapsed = time.perf_counter() - self.started_at
+            requests, batches, errors = self.requests, self.batches, self.errors
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if len(latencies) else (0.0, 0.0)
+        return {
+            "requests": requests,
+            "batches": batches,
+            "errors": errors,
+            "mean_batch_size": requests / batches if batches else 0.0,
+            "throughput_rps": requests / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": float(p50),
+            "p99_ms": float(p99),
+        }
+
+
+class MicroBatcher:
+    """
+    Group concurrent single-item requests into batches for `predict_batch`.
+
+    `submit` queues an item and returns a Future. A worker thread takes the
+    oldest queued item, waits until `max_wait_ms` after it arrived for more
+    (or until `max_batch_size` items are queued), then calls `predict_batch`
+    once with the whole batch and resolves every Future with its element of
+    the result. A failing batch fails all of its Futures. With
+    `max_wait_ms=0` only the items already queued are batched.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = SERVING_MAX_BATCH_SIZE,
+        max_wait_ms: float = SERVING_MAX_WAIT_MS,
+        stats: LatencyStats = None,
+    ) -> None:
+        try:
+            if max_batch_size < 1:
+                raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+            self.predict_batch = predict_batch
+            self.max_batch_size = max_batch_size
+            self.max_wait = max_wait_ms / 1000
+            self.stats = stats if stats is not None else LatencyStats()
+            self._queue: queue.Queue = queue.Queue()
+            self._stopped = threading.Event()
+            # Orders `submit` against `stop`: nothing is queued once stopped
+            self._submit_lock = threading.Lock()
+            self._worker = None
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def start(self) -> "MicroBatcher":
+        if self._worker is None or not self._worker.is_alive():
+            self._stopped.clear()
+            self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._worker.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop after the requests already queued are answered"""
+        with self._submit_lock:
+            self._stopped.set()
+        if self._worker is not None:
+            self._worker.join()
+        # Requests the worker could not answer (it never ran or died) fail
+        # instead of waiting forever
+        leftover = 0
+        while True:
+            try:
+                _, _, future = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("The batcher is stopped"))
+            leftover += 1
+        if leftover:
+            logging.info(f"Failed {leftover} requests left in the queue of the stopped batcher")
+
+    def submit(self, item: Any) -> Future:
+        future: Future = Future()
+        with self._submit_lock:
+            if self._stopped.is_set():
+                raise RuntimeError("The batcher is stopped")
+            self._queue.put((time.perf_counter(), item, future))
+        return future
+
+    def predict(self, item: Any, timeout: float = None) -> Any:
+        """Submit one item and wait for its prediction"""
+        return self.submit(item).result(timeout=timeout)
+
+    def _next_batch(self) -> list:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = first[0] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Past the deadline, only take what is already queued
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not (self._stopped.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            items = [item for _, item, _ in batch]
+            try:
+                results = self.predict_batch(items)
+                failed = False
+            except Exception as e:
+                logging.info(f"Batch of {len(items)} requests failed: {e}")
+                results, failed = e, True
+            done = time.perf_counter()
+            for i, (_, _, future) in enumerate(batch):
+                if failed:
+                    future.set_exception(results)
+                else:
+                    future.set_result(results[i])
+            self.stats.record_batch([done - enqueued for enqueued, _, _ in batch], failed=failed)
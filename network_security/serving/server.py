@@ -0,0 +1,200 @@
+"""
+HTTP inference server for the published model.
+
+    python -m network_security.serving.server --port 8000
+
+POST /predict with the features of one URL as a JSON object returns
+{"prediction": 0 or 1}; absent features are imputed. GET /metrics returns the
+latency and throughput counters (and the prediction cache's), GET /health "ok".
+"""
+import sys
+import json
+import argparse
+import pandas as pd
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from network_security.constants.training_pipeline import (
+    TARGET_COLUMN,
+    SCHEMA_FILE_PATH,
+    FINAL_MODEL_FILE_PATH,
+    FINAL_PREPROCESSOR_FILE_PATH,
+    SERVING_HOST,
+    SERVING_PORT,
+    SERVING_MAX_BATCH_SIZE,
+    SERVING_MAX_WAIT_MS,
+    SERVING_PREDICTION_CACHE,
+)
+from network_security.exception.exception import NetworkSecurityException
+from network_security.logging.logger import logging
+from network_security.serving.batcher import LatencyStats, MicroBatcher
+from network_security.utils.main_utils.utils import get_schema_columns, load_object, read_yaml_file
+from network_security.utils.ml_utils.model.compiled import compile_model
+from network_security.utils.ml_utils.model.estimator import NetworkModel
+from network_security.utils.ml_utils.model.prediction_cache import PredictionCache
+
+
+class InferenceService:
+    """
+    A NetworkModel loaded once, behind a MicroBatcher: concurrent `predict`
+    calls are preprocessed and predicted together as one DataFrame.
+    """
+
+    def __init__(
+        self,
+        network_model: NetworkModel,
+        feature_names: Optional[List[str]] = None,
+        max_batch_size: int = SERVING_MAX_BATCH_SIZE,
+        max_wait_ms: float = SERVING_MAX_WAIT_MS,
+    ) -> None:
+        try:
+            self.network_model = network_model
+            if feature_names is None:
+                feature_names = self.get_feature_names(network_model.preprocessor)
+            self.feature_names = list(feature_names)
+            self.stats = LatencyStats()
+            self.batcher = MicroBatcher(
+                self.predict_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, stats=self.stats
+            )
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @classmethod
+    def from_final_model(
+        cls,
+        model_file_path: str = FINAL_MODEL_FILE_PATH,
+        preprocessor_file_path: str = FINAL_PREPROCESSOR_FILE_PATH,
+        prediction_cache: bool = SERVING_PREDICTION_CACHE,
+        **kwargs,
+    ) -> "InferenceService":
+        try:
+            model = load_object(model_file_path)
+            network_model = NetworkModel(
+                preprocessor=load_object(preprocessor_file_path),
+                model=model,
+                compiled_model=compile_model(model),
+                prediction_cache=PredictionCache() if prediction_cache else None,
+            )
+            logging.info(f"Loaded {model_file_path} and {preprocessor_file_path} for serving")
+            return cls(network_model, **kwargs)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @staticmethod
+    def get_feature_names(preprocessor) -> List[str]:
+        """Feature order the preprocessor was fitted with, or else the schema's"""
+        feature_names = getattr(preprocessor, "feature_names_in_", None)
+        if feature_names is not None:
+            return [str(name) for name in feature_names]
+        columns = get_schema_columns(read_yaml_file(SCHEMA_FILE_PATH))
+        return [col for col in columns if col != TARGET_COLUMN]
+
+    def predict_batch(self, rows: List[Dict]) -> List[int]:
+        # One DataFrame, one preprocessing and one prediction for the batch
+        features = pd.DataFrame.from_records(rows, columns=self.feature_names).astype("float64")
+        return [int(y) for y in self.network_model.predict(features)]
+
+    def get_metrics(self) -> dict:
+        metrics = self.stats.snapshot()
+        cache = getattr(self.network_model, "prediction_cache", None)
+        if cache is not None:
+            metrics["prediction_cache"] = cache.snapshot()
+        return metrics
+
+    def predict(self, row: Dict, timeout: Optional[float] = None) -> int:
+        return self.batcher.predict(row, timeout=timeout)
+
+    def start(self) -> "InferenceService":
+        self.batcher.start()
+        return self
+
+    def stop(self) -> None:
+        self.batcher.stop()
+
+
+def _make_handler(service: InferenceService):
+    class InferenceRequestHandler(BaseHTTPRequestHandler):
+        # Keep-alive connections, so clients do not reconnect per request
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status: int, payload) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if self.path == "/metrics":
+                self._send_json(200, service.get_metrics())
+            elif self.path == "/health":
+                self._send_json(200, "ok")
+            else:
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self) -> None:
+            if self.path != "/predict":
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+                return
+            try:
+                row = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if not isinstance(row, dict):
+                    raise ValueError("Expected the features of one URL as a JSON object")
+                # A bad value must not fail the batch it would be grouped into
+                if not all(value is None or isinstance(value, (int, float)) for value in row.values()):
+                    raise ValueError("Feature values must be numbers or null")
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            try:
+                self._send_json(200, {"prediction": service.predict(row)})
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+
+        def log_message(self, format: str, *args) -> None:
+            # Per-request access logs would dominate the cost of a prediction
+            pass
+
+    return InferenceRequestHandler
+
+
+class InferenceHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for many clients connecting at once (the default backlog is 5)
+    request_queue_size = 128
+
+
+def create_server(
+    service: InferenceService, host: str = SERVING_HOST, port: int = SERVING_PORT
+) -> ThreadingHTTPServer:
+    """A threaded HTTP server answering through `service` (started by the caller)"""
+    try:
+        return InferenceHTTPServer((host, port), _make_handler(service))
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=SERVING_HOST)
+    parser.add_argument("--port", type=int, default=SERVING_PORT)
+    parser.add_argument("--max-batch-size", type=int, default=SERVING_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=SERVING_MAX_WAIT_MS)
+    parser.add_argument("--no-prediction-cache", action="store_true")
+    args = parser.parse_args()
+
+    inference_service = InferenceService.from_final_model(
+        prediction_cache=not args.no_prediction_cache,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+    ).start()
+    http_server = create_server(inference_service, args.host, args.port)
+    print(f"Serving on http://{args.host}:{http_server.server_port}")
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        http_server.server_close()
+        inference_service.stop()
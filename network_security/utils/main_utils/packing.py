@@ -0,0 +1,231 @@
+"""
+2-bit packed rows of ternary features.
+
+Every feature takes one of the (at most three) values of `domain` or is
+missing, so it fits in 2 bits: the value's position in the sorted domain,
+and 3 for missing. A row is stored in uint64 words of 32 features each, the
+first feature in the most significant bits and unused slots zero, so the
+30 features of a URL take one word (8 bytes, against 240 as int64 and 30
+as int8). Packed rows order like the rows themselves, with missing after
+every value, and compare, hash and deduplicate as whole words.
+"""
+import sys
+import numpy as np
+import pandas as pd
+from typing import Sequence, Tuple
+
+from network_security.constants.training_pipeline import PACKED_FEATURE_DOMAIN
+from network_security.exception.exception import NetworkSecurityException
+
+BITS_PER_FEATURE: int = 2
+FEATURES_PER_WORD: int = 64 // BITS_PER_FEATURE
+MISSING_CODE: int = 2**BITS_PER_FEATURE - 1
+# The low bit of every 2-bit slot
+_LOW_BITS = np.uint64(0x5555555555555555)
+
+
+def _get_domain(domain: Sequence[float]) -> np.ndarray:
+    domain = np.unique(np.asarray(domain, dtype=np.float64))
+    if len(domain) > MISSING_CODE:
+        raise ValueError(f"At most {MISSING_CODE} values fit in {BITS_PER_FEATURE} bits, got {len(domain)}")
+    return domain
+
+
+def _as_float_array(X) -> np.ndarray:
+    if isinstance(X, pd.DataFrame):
+        return X.to_numpy(dtype=np.float64, na_value=np.nan)
+    X = np.asarray(X, dtype=np.float64)
+    return X[np.newaxis, :] if X.ndim == 1 else X
+
+
+def get_n_words(n_features: int) -> int:
+    return -(-n_features // FEATURES_PER_WORD)
+
+
+def _encode(X: np.ndarray, domain: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """2-bit codes of X and the mask of the values that are neither missing nor in the domain"""
+    index = np.minimum(np.searchsorted(domain, X), len(domain) - 1)
+    known = domain[index] == X
+    missing = np.isnan(X)
+    return np.where(missing, MISSING_CODE, index).astype(np.uint64), ~(known | missing)
+
+
+def get_packable_mask(X, domain: Sequence[float] = PACKED_FEATURE_DOMAIN, allow_missing: bool = True) -> np.ndarray:
+    """Rows of X whose values are all in `domain` (or missing, with `allow_missing`)"""
+    try:
+        X = _as_float_array(X)
+        codes, unknown = _encode(X, _get_domain(domain))
+        packable = ~unknown.any(axis=1)
+        if not allow_missing:
+            packable &= ~(codes == MISSING_CODE).any(axis=1)
+        return packable
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def pack_rows(X, domain: Sequence[float] = PACKED_FEATURE_DOMAIN) -> np.ndarray:
+    """(rows x words) uint64 packing of X; NaN is missing, any other value outside `domain` an error"""
+    try:
+        X = _as_float_array(X)
+        codes, unknown = _encode(X, _get_domain(domain))
+        if unknown.any():
+            row, col = np.argwhere(unknown)[0]
+            raise ValueError(f"Value {X[row, col]} of column {col} is not in the packing domain {list(domain)}")
+        n_rows, n_features = codes.shape
+        n_words = get_n_words(n_features)
+        slots = np.zeros((n_rows, n_words * FEATURES_PER_WORD), dtype=np.uint64)
+        slots[:, :n_features] = codes
+        slots = slots.reshape(n_rows, n_words, FEATURES_PER_WORD)
+        shifts = np.arange(FEATURES_PER_WORD - 1, -1, -1, dtype=np.uint64) * np.uint64(BITS_PER_FEATURE)
+        # Slots hold disjoint bits, so the sum is their bitwise or
+        return (slots << shifts).sum(axis=2, dtype=np.uint64)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def unpack_rows(packed: np.ndarray, n_features: int, domain: Sequence[float] = PACKED_FEATURE_DOMAIN) -> np.ndarray:
+    """float64 rows of a packing, NaN where missing"""
+    try:
+        packed = np.atleast_2d(np.asarray(packed, dtype=np.uint64))
+        shifts = np.arange(FEATURES_PER_WORD - 1, -1, -1, dtype=np.uint64) * np.uint64(BITS_PER_FEATURE)
+        codes = (packed[:, :, np.newaxis] >> shifts) & np.uint64(MISSING_CODE)
+        codes = codes.reshape(len(packed), -1)[:, :n_features].astype(np.intp)
+        values = np.append(_get_domain(domain), np.nan)
+        # Codes between the domain size and MISSING_CODE never occur in a packing
+        return values[np.minimum(codes, len(values) - 1)]
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def unpack_column(
+    packed: np.ndarray, column: int, dtype, domain: Sequence[float] = PACKED_FEATURE_DOMAIN
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Values of one packed column as `dtype`, 0 where missing, and the missing
+    mask; decoded from its 2-bit slot without a float intermediate.
+    """
+    try:
+        packed = np.atleast_2d(np.asarray(packed, dtype=np.uint64))
+        word, slot = divmod(column, FEATURES_PER_WORD)
+        shift = np.uint64((FEATURES_PER_WORD - 1 - slot) * BITS_PER_FEATURE)
+        codes = ((packed[:, word] >> shift) & np.uint64(MISSING_CODE)).astype(np.uint8)
+        # Codes between the domain size and MISSING_CODE never occur in a packing
+        table = np.zeros(MISSING_CODE + 1, dtype=dtype)
+        domain = _get_domain(domain)
+        table[: len(domain)] = domain
+        return table[codes], codes == MISSING_CODE
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def get_row_bytes(packed: np.ndarray) -> np.ndarray:
+    """
+    One opaque fixed-width bytes value per packed row, for use as a dict key
+    or with np.unique; big-endian, so rows keep their order.
+    """
+    packed = np.ascontiguousarray(np.atleast_2d(packed).astype(">u8"))
+    return packed.view(np.dtype((np.void, packed.shape[1] * 8))).ravel()
+
+
+def hash_rows(packed: np.ndarray) -> np.ndarray:
+    """uint64 hash of every packed row (splitmix64 finalizer, chained over the words)"""
+    try:
+        packed = np.atleast_2d(np.asarray(packed, dtype=np.uint64))
+        hashes = np.zeros(len(packed), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for word in packed.T:
+                h = hashes ^ (word + np.uint64(0x9E3779B97F4A7C15))
+                h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+                h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+                hashes = h ^ (h >> np.uint64(31))
+        return hashes
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def rows_equal(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Element-wise (broadcasting) equality of packed rows"""
+    return np.all(np.asarray(a, dtype=np.uint64) == np.asarray(b, dtype=np.uint64), axis=-1)
+
+
+def unique_rows(packed: np.ndarray, return_index: bool = False, return_inverse: bool = False, return_counts: bool = False):
+    """np.unique over packed rows: the distinct rows, sorted, plus the requested index arrays"""
+    try:
+        packed = np.atleast_2d(np.asarray(packed, dtype=np.uint64))
+        # A single word sorts as a plain integer; wider rows as big-endian bytes
+        keys = packed[:, 0] if packed.shape[1] == 1 else get_row_bytes(packed)
+        result = np.unique(
+            keys, return_index=True, return_inverse=return_inverse, return_counts=return_counts
+        )
+        first = result[1]
+        extras = [first] if return_index else []
+        if return_inverse:
+            extras.append(result[2].ravel())
+        if return_counts:
+            extras.append(result[-1])
+        unique = packed[first]
+        return (unique, *extras) if extras else unique
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    # SWAR popcount for numpy < 2
+    words = words - ((words >> np.uint64(1)) & _LOW_BITS)
+    words = (words & np.uint64(0x3333333333333333)) + ((words >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    words = (words + (words >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    with np.errstate(over="ignore"):
+        return ((words * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.uint8)
+
+
+def _missing_slots(packed: np.ndarray) -> np.ndarray:
+    """Low bit of every slot that holds MISSING_CODE"""
+    return packed & (packed >> np.uint64(1)) & _LOW_BITS
+
+
+def hamming_distances(a: np.ndarray, b: np.ndarray, ignore_missing: bool = False) -> np.ndarray:
+    """
+    (len(a) x len(b)) number of features in which the packed rows differ,
+    from one XOR and popcount per word. Missing is a value of its own unless
+    `ignore_missing`, which only counts features present in both rows.
+    """
+    try:
+        a = np.atleast_2d(np.asarray(a, dtype=np.uint64))[:, np.newaxis, :]
+        b = np.atleast_2d(np.asarray(b, dtype=np.uint64))[np.newaxis, :, :]
+        diff = a ^ b
+        # One bit per differing slot
+        diff = (diff | (diff >> np.uint64(1))) & _LOW_BITS
+        if ignore_missing:
+            diff &= ~(_missing_slots(a) | _missing_slots(b))
+        return _popcount(diff).sum(axis=2, dtype=np.int64)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def nearest_rows(
+    queries: np.ndarray,
+    reference: np.ndarray,
+    n_neighbors: int,
+    ignore_missing: bool = False,
+    chunk_size: int = 4096,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indices and Hamming distances of the `n_neighbors` rows of `reference`
+    closest to every query row (ties in reference order), in chunks of
+    `chunk_size` queries.
+    """
+    try:
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.uint64))
+        n_neighbors = min(n_neighbors, len(reference))
+        indices = np.empty((len(queries), n_neighbors), dtype=np.intp)
+        distances = np.empty((len(queries), n_neighbors), dtype=np.int64)
+        for start in range(0, len(queries), chunk_size):
+            chunk = hamming_distances(queries[start:start + chunk_size], reference, ignore_missing)
+            nearest = np.argsort(chunk, axis=1, kind="stable")[:, :n_neighbors]
+            indices[start:start + len(chunk)] = nearest
+            distances[start:start + len(chunk)] = np.take_along_axis(chunk, nearest, axis=1)
+        return indices, distances
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -1,16 +1,28 @@
 import os
 import sys
+import json
 import pickle
+import hashlib
 import yaml
+import shutil
+import pymongo
 import numpy as np
-from typing import Dict
+import pandas as pd
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
 
-from sklearn.metrics import r2_score
-from sklearn.model_selection import GridSearchCV
 
+from network_security.constants.training_pipeline import ARTIFACT_FILE_EXTENSIONS, ARTIFACT_NPY_PACK_TERNARY
 from network_security.exception.exception import NetworkSecurityException
+from network_security.utils.ml_utils.metric.classification import get_batch_scores
+from network_security.utils.ml_utils.model.search import run_search, fit_weighted
+from network_security.utils.main_utils.packing import get_n_words, get_packable_mask, pack_rows, unique_rows, unpack_column
 from network_security.logging.logger import logging
 
+NPY_COLUMNS_META_FILE_NAME = "_columns.yaml"
+
 
 def read_yaml_file(file_path: str) -> dict:
     try:
@@ -31,6 +43,435 @@ def write_yaml_file(file_path: str, data: object, replace: bool = False) -> None
     except Exception as e:
         raise NetworkSecurityException(e, sys)
 
+_background_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="artifact-writer")
+_pending_writes: List[Future] = []
+_pending_writes_lock = threading.Lock()
+
+
+def write_in_background(write_fn: Callable, *args, **kwargs) -> Future:
+    """
+    Run an artifact write (e.g. `save_dataframe`, `save_object`) on the
+    background writer so the calling stage can move on with the in-memory data.
+    """
+    future = _background_writer.submit(write_fn, *args, **kwargs)
+    with _pending_writes_lock:
+        _pending_writes.append(future)
+    return future
+
+
+def write_artifact(write_fn: Callable, *args, background: bool = False, **kwargs) -> None:
+    """Call `write_fn` now, or on the background writer when `background` is set"""
+    if background:
+        write_in_background(write_fn, *args, **kwargs)
+    else:
+        write_fn(*args, **kwargs)
+
+
+def pending_background_writes() -> List[Future]:
+    """Snapshot of the background writes submitted so far"""
+    with _pending_writes_lock:
+        return list(_pending_writes)
+
+
+def wait_for_background_writes() -> None:
+    """Block until every background write has finished, re-raising the first failure"""
+    with _pending_writes_lock:
+        pending = list(_pending_writes)
+        _pending_writes.clear()
+    errors = [future.exception() for future in pending]
+    errors = [error for error in errors if error is not None]
+    if errors:
+        raise errors[0]
+
+
+@lru_cache(maxsize=None)
+def get_mongo_client(uri: Optional[str], max_pool_size: int = 100) -> pymongo.MongoClient:
+    """
+    Return a process-wide MongoClient for `uri`.
+
+    MongoClient is thread-safe and keeps its own connection pool, so every
+    component (and every worker thread) shares one client per URI instead of
+    opening a new one per call.
+    """
+    try:
+        return pymongo.MongoClient(uri, maxPoolSize=max_pool_size)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+def get_schema_columns(schema_config: dict) -> Dict[str, str]:
+    """Return the ordered {column name: dtype} mapping declared in schema.yaml"""
+    try:
+        columns: Dict[str, str] = {}
+        for column in schema_config["columns"]:
+            for name, dtype in column.items():
+                columns[name.strip()] = str(dtype).strip()
+        return columns
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def get_category_domain(schema_config: dict) -> np.ndarray:
+    """Sorted union of the `allowed_values` of every column"""
+    try:
+        allowed_values = schema_config.get("allowed_values", {})
+        domain = sorted({value for values in allowed_values.values() for value in values})
+        return np.asarray(domain, dtype=np.float64)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def get_allowed_values(schema_config: dict) -> Dict[str, List[int]]:
+    """
+    Map every integer schema column to the values it may take, from the
+    `allowed_values` section (columns not listed fall back to `default`)
+    """
+    try:
+        allowed_values = schema_config.get("allowed_values", {})
+        domains: Dict[str, List[int]] = {}
+        for name, declared_dtype in get_schema_columns(schema_config).items():
+            domain = allowed_values.get(name, allowed_values.get("default"))
+            if domain is not None and np.issubdtype(np.dtype(declared_dtype), np.integer):
+                domains[name] = list(domain)
+        return domains
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def get_compact_dtype_plan(schema_config: dict, nullable: bool = True) -> Dict[str, str]:
+    """
+    Map every schema column to the smallest signed integer dtype that holds its
+    `allowed_values` plus a missing-value sentinel (the dtype minimum) and an
+    invalid-value marker (the dtype maximum). With
+    `nullable` the pandas masked dtype ("Int8") is returned instead of the
+    numpy one ("int8"). Columns without a known domain keep their declared dtype.
+    """
+    try:
+        columns = get_schema_columns(schema_config)
+        allowed_values = get_allowed_values(schema_config)
+        plan: Dict[str, str] = {}
+        for name, declared_dtype in columns.items():
+            domain = allowed_values.get(name)
+            if domain is None:
+                plan[name] = declared_dtype
+                continue
+            for dtype in (np.int8, np.int16, np.int32, np.int64):
+                info = np.iinfo(dtype)
+                if info.min < min(domain) and max(domain) < info.max:
+                    break
+            plan[name] = np.dtype(dtype).name
+        if nullable:
+            plan = {
+                name: "I" + dtype[1:] if dtype.startswith("int") else dtype
+                for name, dtype in plan.items()
+            }
+        return plan
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def get_missing_value_sentinel(dtype) -> int:
+    """Sentinel that encodes a missing value in a plain integer array"""
+    return int(np.iinfo(dtype).min)
+
+
+def get_invalid_value_marker(dtype) -> int:
+    """Marker stored in place of a value that does not fit a compact integer column"""
+    return int(np.iinfo(dtype).max)
+
+
+def get_fingerprint(*objects) -> str:
+    """
+    Fast content hash of DataFrames, arrays and plain (JSON-like) config values.
+    Equal content gives an equal fingerprint whether it was read from disk or
+    handed over in memory.
+    """
+    try:
+        digest = hashlib.blake2b(digest_size=16)
+        for obj in objects:
+            if isinstance(obj, pd.DataFrame):
+                digest.update(json.dumps(
+                    [[str(name), str(dtype)] for name, dtype in obj.dtypes.items()]
+                ).encode())
+                digest.update(pd.util.hash_pandas_object(obj, index=False).to_numpy().tobytes())
+            elif isinstance(obj, np.ndarray):
+                digest.update(f"{obj.dtype.str}{obj.shape}".encode())
+                digest.update(np.ascontiguousarray(obj).data)
+            else:
+                digest.update(json.dumps(obj, sort_keys=True, default=repr).encode())
+            digest.update(b"\x00")
+        return digest.hexdigest()
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def get_artifact_format(file_path: str) -> str:
+    """Infer the artifact format ("csv", "parquet" or "npy") from the file extension"""
+    for artifact_format, extension in ARTIFACT_FILE_EXTENSIONS.items():
+        if file_path.endswith(extension):
+            return artifact_format
+    raise ValueError(f"Unknown artifact format for file: {file_path}")
+
+
+def _read_npy_columns_meta(dir_path: str) -> dict:
+    meta_file_path = os.path.join(dir_path, NPY_COLUMNS_META_FILE_NAME)
+    if not os.path.exists(meta_file_path):
+        return {"columns": [], "parts": []}
+    return read_yaml_file(meta_file_path)
+
+
+def _get_packed_columns(arrays: List[Tuple[np.ndarray, Optional[np.ndarray]]]) -> List[int]:
+    """
+    Indices of the integer columns of a part whose values are all in the
+    packing domain (or missing), when packing them into 2-bit rows takes
+    fewer bytes than storing them one by one.
+    """
+    candidates = [i for i, (values, _) in enumerate(arrays) if values.dtype.kind == "i" and len(values)]
+    if not candidates:
+        return []
+    # One row per column, so the packable "rows" are the packable columns
+    columns = np.stack([
+        np.where(arrays[i][1], np.nan, arrays[i][0]) if arrays[i][1] is not None else arrays[i][0]
+        for i in candidates
+    ]).astype(np.float64)
+    packed = [i for i, packable in zip(candidates, get_packable_mask(columns)) if packable]
+    unpacked_bytes = sum(
+        arrays[i][0].nbytes + (arrays[i][1].nbytes if arrays[i][1] is not None else 0) for i in packed
+    )
+    packed_bytes = len(arrays[0][0]) * get_n_words(len(packed)) * 8
+    return packed if packed and packed_bytes < unpacked_bytes else []
+
+
+def _write_npy_columns_part(
+    dir_path: str, df: pd.DataFrame, pack_ternary: bool = ARTIFACT_NPY_PACK_TERNARY
+) -> None:
+    """
+    Add `df` as a new part of the .npy column directory at `dir_path`.
+
+    Each column is stored as `<part>/<index>.npy` plus `<index>.mask.npy` for
+    nullable columns with missing values. With `pack_ternary`, the integer
+    columns holding only ternary values are instead stored together as
+    2-bit packed rows (`<part>/packed.npy`, see packing.py) with their
+    indices in `<part>/packed_columns.npy`. The metadata file is rewritten
+    last, so a part whose write was interrupted is never referenced.
+    """
+    meta = _read_npy_columns_meta(dir_path)
+    if meta["columns"]:
+        names = [column["name"] for column in meta["columns"]]
+        df = df[names]
+    else:
+        meta["columns"] = [
+            {"name": str(name), "dtype": None, "nullable": False} for name in df.columns
+        ]
+
+    part = f"part-{len(meta['parts']):05d}"
+    part_path = os.path.join(dir_path, part)
+    if os.path.exists(part_path):
+        shutil.rmtree(part_path)
+    os.makedirs(part_path)
+
+    arrays: List[Tuple[np.ndarray, Optional[np.ndarray]]] = []
+    for name, column in zip(df.columns, meta["columns"]):
+        series = df[name]
+        if series.dtype == object:
+            series = pd.to_numeric(series)
+        if isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+            mask = series.isna().to_numpy()
+            values = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)
+            column["nullable"] = True
+        else:
+            mask, values = None, series.to_numpy()
+        column["dtype"] = column["dtype"] or values.dtype.str
+        arrays.append((values, mask))
+
+    packed_columns = _get_packed_columns(arrays) if pack_ternary else []
+    if packed_columns:
+        rows = np.column_stack([
+            np.where(arrays[i][1], np.nan, arrays[i][0]) if arrays[i][1] is not None else arrays[i][0]
+            for i in packed_columns
+        ])
+        np.save(os.path.join(part_path, "packed.npy"), pack_rows(rows))
+        np.save(os.path.join(part_path, "packed_columns.npy"), np.asarray(packed_columns, dtype=np.int64))
+
+    for index, (values, mask) in enumerate(arrays):
+        if index in packed_columns:
+            continue
+        if mask is not None:
+            # Integer columns encode missing values in place with a sentinel
+            # unless the sentinel is a real value of this part
+            if values.dtype.kind == "i" and not (
+                values == get_missing_value_sentinel(values.dtype)
+            ).any():
+                values[mask] = get_missing_value_sentinel(values.dtype)
+            elif mask.any() or values.dtype.kind == "i":
+                np.save(os.path.join(part_path, f"{index}.mask.npy"), mask)
+        np.save(os.path.join(part_path, f"{index}.npy"), values)
+
+    meta["parts"].append(part)
+    write_yaml_file(os.path.join(dir_path, NPY_COLUMNS_META_FILE_NAME), meta)
+
+
+def _load_packed_columns(part_path: str, columns: List[dict]) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    """{column index: (values with 0 where missing, missing mask)} of a part's packed columns"""
+    packed_file_path = os.path.join(part_path, "packed.npy")
+    if not os.path.exists(packed_file_path):
+        return {}
+    indices = np.load(os.path.join(part_path, "packed_columns.npy")).tolist()
+    packed = np.load(packed_file_path)
+    return {
+        index: unpack_column(packed, j, np.dtype(columns[index]["dtype"])) for j, index in enumerate(indices)
+    }
+
+
+def _load_npy_columns(dir_path: str, mmap: bool) -> pd.DataFrame:
+    meta = _read_npy_columns_meta(dir_path)
+    mmap_mode = "c" if mmap else None
+    # Packed columns are decoded once per part, not memory-mapped
+    packed = {
+        part: _load_packed_columns(os.path.join(dir_path, part), meta["columns"]) for part in meta["parts"]
+    }
+    data = {}
+    for index, column in enumerate(meta["columns"]):
+        dtype = np.dtype(column["dtype"])
+        values, masks = [], []
+        for part in meta["parts"]:
+            if index in packed[part]:
+                part_values, part_mask = packed[part][index]
+                values.append(part_values)
+                masks.append(part_mask)
+                continue
+            part_path = os.path.join(dir_path, part)
+            part_values = np.load(os.path.join(part_path, f"{index}.npy"), mmap_mode=mmap_mode)
+            mask_file_path = os.path.join(part_path, f"{index}.mask.npy")
+            values.append(part_values)
+            if os.path.exists(mask_file_path):
+                masks.append(np.load(mask_file_path))
+            elif column["nullable"] and part_values.dtype.kind == "i":
+                masks.append(part_values == get_missing_value_sentinel(part_values.dtype))
+            else:
+                masks.append(np.zeros(len(part_values), dtype=bool))
+        # A single part is used as-is (memory-mapped); several are stitched together
+        values = values[0] if len(values) == 1 else np.concatenate(values or [np.empty(0, dtype)])
+        if column["nullable"]:
+            mask = masks[0] if len(masks) == 1 else np.concatenate(masks or [np.empty(0, bool)])
+            if dtype.kind in "iu":
+                values = pd.arrays.IntegerArray(values, mask)
+            elif dtype.kind == "f":
+                values = pd.arrays.FloatingArray(values, mask)
+            else:
+                values = pd.arrays.BooleanArray(values, mask)
+        data[column["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def save_dataframe(file_path: str, df: pd.DataFrame) -> None:
+    """Write `df` as a tabular artifact, in the format given by the file extension"""
+    try:
+        artifact_format = get_artifact_format(file_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if artifact_format == "csv":
+            df.to_csv(file_path, index=False, header=True)
+        elif artifact_format == "parquet":
+            df.to_parquet(file_path, index=False)
+        else:
+            if os.path.exists(file_path):
+                shutil.rmtree(file_path)
+            _write_npy_columns_part(file_path, df)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def append_dataframe(file_path: str, df: pd.DataFrame) -> None:
+    """Append the rows of `df` to a tabular artifact, creating it if needed"""
+    try:
+        artifact_format = get_artifact_format(file_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if artifact_format == "csv":
+            write_header = not os.path.exists(file_path) or os.path.getsize(file_path) == 0
+            df.to_csv(file_path, mode="a", index=False, header=write_header)
+        elif artifact_format == "parquet":
+            if os.path.exists(file_path):
+                df = pd.concat([pd.read_parquet(file_path), df], ignore_index=True)
+            df.to_parquet(file_path, index=False)
+        else:
+            _write_npy_columns_part(file_path, df)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def load_dataframe(
+    file_path: str, mmap: bool = True, dtypes: Optional[Dict[str, str]] = None
+) -> pd.DataFrame:
+    """
+    Read a tabular artifact written by `save_dataframe`. Binary formats are
+    memory-mapped (copy-on-write) unless `mmap` is False. Columns named in
+    `dtypes` (e.g. a compact dtype plan) are parsed or cast to that dtype.
+    """
+    try:
+        artifact_format = get_artifact_format(file_path)
+        if artifact_format == "csv":
+            return pd.read_csv(file_path, dtype=dtypes, na_values=["na"])
+        if artifact_format == "parquet":
+            df = pd.read_parquet(file_path, memory_map=mmap)
+        else:
+            df = _load_npy_columns(file_path, mmap=mmap)
+        return cast_dataframe(df, dtypes)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def cast_dataframe(df: pd.DataFrame, dtypes: Optional[Dict[str, str]]) -> pd.DataFrame:
+    """Cast the columns named in `dtypes` that are not of that dtype yet"""
+    try:
+        casts = {
+            name: dtype for name, dtype in (dtypes or {}).items()
+            if name in df.columns and df[name].dtype != dtype
+        }
+        return df.astype(casts) if casts else df
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def get_dataframe_marker(file_path: str) -> int:
+    """
+    Return a marker of how much data a tabular artifact holds (bytes for csv,
+    rows for parquet, parts for npy) that `truncate_dataframe` can roll back to.
+    """
+    try:
+        if not os.path.exists(file_path):
+            return 0
+        artifact_format = get_artifact_format(file_path)
+        if artifact_format == "csv":
+            return os.path.getsize(file_path)
+        if artifact_format == "parquet":
+            return len(pd.read_parquet(file_path, columns=[]))
+        return len(_read_npy_columns_meta(file_path)["parts"])
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def truncate_dataframe(file_path: str, marker: int) -> None:
+    """Drop everything appended to a tabular artifact after `marker` was taken"""
+    try:
+        if not os.path.exists(file_path) or get_dataframe_marker(file_path) <= marker:
+            return
+        artifact_format = get_artifact_format(file_path)
+        if artifact_format == "csv":
+            with open(file_path, "r+b") as file_obj:
+                file_obj.truncate(marker)
+        elif artifact_format == "parquet":
+            pd.read_parquet(file_path).iloc[:marker].to_parquet(file_path, index=False)
+        else:
+            meta = _read_npy_columns_meta(file_path)
+            for part in meta["parts"][marker:]:
+                shutil.rmtree(os.path.join(file_path, part), ignore_errors=True)
+            meta["parts"] = meta["parts"][:marker]
+            if not meta["parts"]:
+                meta["columns"] = []
+            write_yaml_file(os.path.join(file_path, NPY_COLUMNS_META_FILE_NAME), meta)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
 def save_numpy_array(file_path: str, array: np.array) -> None:
     try:
         dir_path = os.path.dirname(file_path)
@@ -59,42 +500,128 @@ def load_object(file_path: str) -> object:
     except Exception as e:
         raise NetworkSecurityException(e, sys) from e
     
-def load_numpy_array(file_path: str) -> np.array:
+def load_numpy_array(file_path: str, mmap_mode: Optional[str] = None) -> np.array:
     try:
+        if mmap_mode is not None:
+            return np.load(file_path, mmap_mode=mmap_mode)
         with open(file_path, "rb") as file_obj:
             return np.load(file_obj)
     except Exception as e:
         raise NetworkSecurityException(e, sys) from e
     
+def get_row_groups(X) -> np.ndarray:
+    """
+    Group id of every row of X (DataFrame or 2D array): equal rows, missing
+    values included, share one. Ids are numbered in sorted row order.
+    """
+    try:
+        if isinstance(X, pd.DataFrame):
+            X = X.to_numpy(dtype=np.float64, na_value=np.nan)
+        X = np.asarray(X, dtype=np.float64)
+        if get_packable_mask(X).all():
+            # Ternary rows: one uint64 per row
+            _, groups = unique_rows(pack_rows(X), return_inverse=True)
+        else:
+            # NaN never equals itself, so rows are compared on a sentinel copy
+            _, groups = np.unique(np.where(np.isnan(X), np.inf, X), axis=0, return_inverse=True)
+        return groups.ravel()
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def deduplicate_rows(X, y) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Collapse identical (features, target) rows into one. Returns the distinct
+    rows in the order of their first occurrence, their targets and how often
+    each occurred, the `sample_weight` that stands in for the copies.
+    """
+    try:
+        X, y = np.asarray(X), np.asarray(y)
+        groups = get_row_groups(np.column_stack([X, y]))
+        _, first, counts = np.unique(groups, return_index=True, return_counts=True)
+        # First occurrence order keeps the (shuffled) order of the split
+        order = np.argsort(first, kind="stable")
+        rows = first[order]
+        logging.info(
+            f"Deduplicated {len(X)} rows to {len(rows)} (compression ratio {len(X) / max(len(rows), 1):.2f})"
+        )
+        return X[rows], y[rows], counts[order]
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
+def grouped_train_test_split(
+    df: pd.DataFrame, groups: np.ndarray, test_size: float, random_state: int = 42
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Split `df` into shuffled train and test sets so that every group of rows
+    (e.g. the copies of one feature vector, see `get_row_groups`) lands on a
+    single side. Whole groups are drawn in random order into the test set
+    until it holds `test_size` of the rows.
+    """
+    try:
+        groups = np.asarray(groups)
+        group_ids, inverse, sizes = np.unique(groups, return_inverse=True, return_counts=True)
+        rng = np.random.default_rng(random_state)
+        order = rng.permutation(len(group_ids))
+        n_test = int(np.ceil(test_size * len(df))) if test_size < 1 else int(test_size)
+        # The groups whose cumulative size (in drawing order) starts below n_test
+        in_test = np.zeros(len(group_ids), dtype=bool)
+        in_test[order] = np.cumsum(sizes[order]) - sizes[order] < n_test
+        test_mask = in_test[inverse.ravel()]
+        train_rows = rng.permutation(np.flatnonzero(~test_mask))
+        test_rows = rng.permutation(np.flatnonzero(test_mask))
+        return df.iloc[train_rows], df.iloc[test_rows]
+    except Exception as e:
+        raise NetworkSecurityException(e, sys) from e
+
+
 def evaluate_models(
         X_train, y_train,
         X_test, y_test,
-        models: Dict, params: Dict
+        models: Dict, params: Dict,
+        cv: int = 3, n_jobs: int = -1,
+        search_mode: str = "grid", memo=None, sample_weight=None, **search_params
 ):
+    """
+    Search the best parameters of every model and report its test r2 score.
+    Each model of `models` is replaced by its best estimator, fitted once on
+    the training data, or reused from `memo` (a `CVMemo`) when an earlier run
+    fitted it on the same data. With `sample_weight` (the counts of
+    deduplicated training rows), the search and the final fits are weighted
+    by it.
+    """
     try:
         report: Dict = {}
 
-        for i in range(len(list(models))):
-            model = list(models.values())[i]
-            param=params[list(models.keys())[i]]
-
-            gs = GridSearchCV(model,param,cv=3)
-            gs.fit(X_train,y_train)
-
-            model.set_params(**gs.best_params_)
-            model.fit(X_train,y_train)
+        # Search of every model at once, spread over `n_jobs` processes
+        search_results = run_search(
+            search_mode, models, params, X_train, y_train, cv=cv, n_jobs=n_jobs, memo=memo,
+            sample_weight=sample_weight, **search_params
+        )
+        data_fingerprint = memo.get_data_fingerprint(X_train, y_train, sample_weight) if memo is not None else None
+        y_test_preds = []
 
-            #model.fit(X_train, y_train)  # Train model
-
-            y_train_pred = model.predict(X_train)
-
-            y_test_pred = model.predict(X_test)
+        for i in range(len(list(models))):
+            name = list(models.keys())[i]
+            best_params = search_results[name]["best_params"]
 
-            train_model_score = r2_score(y_train, y_train_pred)
+            model = None
+            if memo is not None:
+                model = memo.get_estimator(data_fingerprint, models[name], best_params)
+            if model is None:
+                model = models[name].set_params(**best_params)
+                fit_weighted(model, X_train, y_train, sample_weight)
+                if memo is not None:
+                    memo.put_estimator(data_fingerprint, model)
+            models[name] = model
 
-            test_model_score = r2_score(y_test, y_test_pred)
+            y_test_preds.append(model.predict(X_test))
 
-            report[list(models.keys())[i]] = test_model_score
+        # Test r2 of every model from a single batched pass
+        test_model_scores = get_batch_scores(y_test, np.stack(y_test_preds))["r2"]
+        for name, test_model_score in zip(models, test_model_scores):
+            report[name] = float(test_model_score)
 
         return report
 
@@ -0,0 +1,408 @@
+import sys
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from typing import Optional
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.impute import KNNImputer
+
+from network_security.exception.exception import NetworkSecurityException
+from network_security.utils.main_utils.packing import get_packable_mask, pack_rows, unique_rows, unpack_rows
+
+
+def _as_float_array(X) -> np.ndarray:
+    if isinstance(X, pd.DataFrame):
+        return X.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.asarray(X, dtype=np.float64)
+
+
+class DiscreteImputer(ABC, TransformerMixin, BaseEstimator):
+    """
+    Base class of the imputers for the discrete (ternary) features.
+
+    `transform` only hands the rows that have a missing value to `_impute_rows`;
+    an input without missing values is returned as is. Columns that were
+    entirely missing during `fit` are filled with 0 and kept, so the output
+    always has the input's shape.
+    """
+
+    def __init__(self, missing_values=np.nan) -> None:
+        self.missing_values = missing_values
+
+    def fit(self, X, y=None):
+        try:
+            if not (isinstance(self.missing_values, float) and np.isnan(self.missing_values)):
+                raise ValueError("Only NaN is supported as missing value marker")
+            X = _as_float_array(X)
+            self.n_features_in_ = X.shape[1]
+            self._fit(X, np.isnan(X))
+            return self
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def transform(self, X) -> np.ndarray:
+        try:
+            source = X
+            X = _as_float_array(X)
+            missing = np.isnan(X)
+            rows = np.flatnonzero(missing.any(axis=1))
+            if rows.size == 0:
+                return X
+            if np.shares_memory(X, source):
+                X = X.copy()
+            X[rows] = self._impute_rows(X[rows], missing[rows])
+            return X
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @abstractmethod
+    def _fit(self, X: np.ndarray, missing: np.ndarray) -> None:
+        """Learn what `_impute_rows` needs from the float rows and their missing mask"""
+
+    @abstractmethod
+    def _impute_rows(self, X: np.ndarray, missing: np.ndarray) -> np.ndarray:
+        """Filled copy of rows that all have at least one missing cell"""
+
+
+class ModeImputer(DiscreteImputer):
+    """Fill every missing cell with the most frequent value of its column"""
+
+    def _fit(self, X: np.ndarray, missing: np.ndarray) -> None:
+        self.modes_ = np.zeros(X.shape[1])
+        for col in range(X.shape[1]):
+            values, counts = np.unique(X[~missing[:, col], col], return_counts=True)
+            if len(values):
+                self.modes_[col] = values[np.argmax(counts)]
+
+    def _impute_rows(self, X: np.ndarray, missing: np.ndarray) -> np.ndarray:
+        return np.where(missing, self.modes_, X)
+
+
+class ConditionalModeImputer(DiscreteImputer):
+    """
+    Fill a missing cell with the most frequent value of its column among the
+    training rows that share the value of the column's best predictor: the
+    other feature whose values predict the column most accurately during
+    `fit`. Falls back to the column mode when the predictor is missing too.
+
+    All pairwise joint counts come from one (chunked) product of the one-hot
+    encoded data, so fitting costs a single pass over the rows.
+    """
+
+    def __init__(self, missing_values=np.nan, chunk_size: int = 65_536) -> None:
+        super().__init__(missing_values=missing_values)
+        self.chunk_size = chunk_size
+
+    def _encode(self, X: np.ndarray) -> np.ndarray:
+        """Category codes, with `len(categories_)` for missing and unknown values"""
+        n_categories = len(self.categories_)
+        index = np.minimum(np.searchsorted(self.categories_, X), max(n_categories - 1, 0))
+        known = self.categories_[index] == X if n_categories else np.zeros(X.shape, dtype=bool)
+        return np.where(known, index, n_categories)
+
+    def _fit(self, X: np.ndarray, missing: np.ndarray) -> None:
+        self.categories_ = np.unique(X[~missing])
+        n_features = X.shape[1]
+        width = len(self.categories_) + 1
+        joint = np.zeros((n_features * width, n_features * width))
+        offsets = np.arange(n_features) * width
+        for start in range(0, len(X), self.chunk_size):
+            codes = self._encode(X[start:start + self.chunk_size]) + offsets
+            one_hot = np.zeros((len(codes), n_features * width), dtype=np.float32)
+            np.put_along_axis(one_hot, codes, 1.0, axis=1)
+            joint += one_hot.T @ one_hot
+        joint = joint.reshape(n_features, width, n_features, width)
+
+        # The last code of every table is "missing"
+        self.modes_ = np.zeros(n_features)
+        for col in range(n_features):
+            counts = joint[col, :-1, col, :-1].diagonal()
+            if counts.sum() > 0:
+                self.modes_[col] = self.categories_[np.argmax(counts)]
+
+        self.predictors_ = np.zeros(n_features, dtype=np.intp)
+        self.lookup_ = np.tile(self.modes_[:, None], (1, width))
+        for col in range(n_features):
+            tables = joint[col, :-1, :, :-1]  # (target value, predictor, predictor value)
+            accuracy = tables.max(axis=0).sum(axis=1)
+            accuracy[col] = -1
+            predictor = int(np.argmax(accuracy))
+            table = tables[:, predictor, :]
+            seen = table.sum(axis=0) > 0
+            self.predictors_[col] = predictor
+            self.lookup_[col, :-1] = np.where(
+                seen, self.categories_[np.argmax(table, axis=0)], self.modes_[col]
+            )
+
+    def _impute_rows(self, X: np.ndarray, missing: np.ndarray) -> np.ndarray:
+        out = X.copy()
+        for col in np.flatnonzero(missing.any(axis=0)):
+            rows = missing[:, col]
+            # Predictors are read from the input, an imputed one counts as missing
+            predictor_codes = self._encode(X[rows, self.predictors_[col]])
+            out[rows, col] = self.lookup_[col, predictor_codes]
+        return out
+
+
+class ChunkedKNNImputer(DiscreteImputer):
+    """
+    Exact `KNNImputer` semantics (nan-euclidean distance, same donor choice
+    and column-mean fallback) computed for the rows with missing values only,
+    in chunks whose distance matrix fits in `working_memory` megabytes. The
+    squared norms of the fitted rows are computed once in `fit` instead of
+    per chunk.
+    """
+
+    def __init__(
+        self,
+        missing_values=np.nan,
+        n_neighbors: int = 3,
+        weights: str = "uniform",
+        working_memory: int = 256,
+    ) -> None:
+        super().__init__(missing_values=missing_values)
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.working_memory = working_memory
+
+    def _fit(self, X: np.ndarray, missing: np.ndarray) -> None:
+        if self.weights not in ("uniform", "distance"):
+            raise ValueError(f"Unsupported weights {self.weights!r}")
+        self.fit_X_ = np.where(missing, 0.0, X)
+        self.fit_missing_ = missing
+        self.fit_norms_ = (self.fit_X_ * self.fit_X_).sum(axis=1)
+        present = ~missing
+        self.col_means_ = np.where(
+            present.any(axis=0),
+            self.fit_X_.sum(axis=0) / np.maximum(present.sum(axis=0), 1),
+            0.0,
+        )
+
+    def _distances(self, X: np.ndarray, missing: np.ndarray, donors: Optional[np.ndarray]) -> np.ndarray:
+        """nan-euclidean distances, in the same operation order as scikit-learn's"""
+        fit_X, fit_missing, fit_norms = self.fit_X_, self.fit_missing_, self.fit_norms_
+        if donors is not None:
+            fit_X, fit_missing, fit_norms = fit_X[donors], fit_missing[donors], fit_norms[donors]
+        X = np.where(missing, 0.0, X)
+        squared = X * X
+        distances = -2 * (X @ fit_X.T)
+        distances += squared.sum(axis=1)[:, None]
+        distances += fit_norms[None, :]
+        np.maximum(distances, 0, out=distances)
+        distances -= squared @ fit_missing.T
+        distances -= missing @ (fit_X * fit_X).T
+        np.clip(distances, 0, None, out=distances)
+        present_count = (~missing).astype(np.float64) @ (~fit_missing).T
+        distances[present_count == 0] = np.nan
+        np.maximum(1, present_count, out=present_count)
+        distances /= present_count
+        distances *= X.shape[1]
+        return np.sqrt(distances, out=distances)
+
+    def _donor_values(self, distances: np.ndarray, values: np.ndarray, n_neighbors: int) -> np.ndarray:
+        donors = np.argpartition(distances, n_neighbors - 1, axis=1)[:, :n_neighbors]
+        donor_distances = np.take_along_axis(distances, donors, axis=1)
+        if self.weights == "uniform":
+            weight = np.ones_like(donor_distances)
+        else:
+            with np.errstate(divide="ignore"):
+                weight = 1.0 / donor_distances
+            exact = np.isinf(weight)
+            has_exact = exact.any(axis=1)
+            weight[has_exact] = exact[has_exact]
+        weight[np.isnan(donor_distances)] = 0.0
+        return (values[donors] * weight).sum(axis=1) / weight.sum(axis=1)
+
+    def _knn_fill(
+        self,
+        X: np.ndarray,
+        missing: np.ndarray,
+        out: np.ndarray,
+        donors: Optional[np.ndarray] = None,
+        min_donors: int = 1,
+    ) -> None:
+        """
+        Impute the missing cells of `X` into `out` from `donors` (all fitted
+        rows by default). Cells with fewer than `min_donors` potential donors
+        are left untouched; with the default they get the column mean, like
+        `KNNImputer` does.
+        """
+        n_donors = len(self.fit_X_) if donors is None else len(donors)
+        chunk_rows = max(1, (self.working_memory * 2**20) // (16 * max(n_donors, 1)))
+        for start in range(0, len(X), chunk_rows):
+            chunk_missing = missing[start:start + chunk_rows]
+            distances = self._distances(X[start:start + chunk_rows], chunk_missing, donors)
+            for col in np.flatnonzero(chunk_missing.any(axis=0)):
+                receivers = np.flatnonzero(chunk_missing[:, col])
+                fit_col_missing = self.fit_missing_[:, col] if donors is None else self.fit_missing_[donors, col]
+                potential = np.flatnonzero(~fit_col_missing)
+                if len(potential) < min_donors:
+                    continue
+                subset = distances[receivers][:, potential]
+                all_nan = np.isnan(subset).all(axis=1)
+                if all_nan.any():
+                    if min_donors == 1:
+                        out[start + receivers[all_nan], col] = self.col_means_[col]
+                    receivers, subset = receivers[~all_nan], subset[~all_nan]
+                    if not len(receivers):
+                        continue
+                fit_values = self.fit_X_[:, col] if donors is None else self.fit_X_[donors, col]
+                out[start + receivers, col] = self._donor_values(
+                    subset, fit_values[potential], min(self.n_neighbors, len(potential))
+                )
+
+    def _impute_rows(self, X: np.ndarray, missing: np.ndarray) -> np.ndarray:
+        out = X.copy()
+        self._knn_fill(X, missing, out)
+        return out
+
+
+class ApproximateKNNImputer(ChunkedKNNImputer):
+    """
+    Nearest-neighbour imputation that only searches the training rows sharing
+    a hash bucket with the receiver.
+
+    The bucket key is the tuple of values (missing counts as a value) of the
+    most evenly spread features, as many as needed for buckets of about
+    `bucket_size` rows. Within a bucket donors are picked exactly as in
+    `ChunkedKNNImputer`; cells whose bucket has fewer than `n_neighbors`
+    potential donors fall back to the exact search over all rows.
+    """
+
+    def __init__(
+        self,
+        missing_values=np.nan,
+        n_neighbors: int = 3,
+        weights: str = "uniform",
+        working_memory: int = 256,
+        bucket_size: int = 256,
+    ) -> None:
+        super().__init__(
+            missing_values=missing_values,
+            n_neighbors=n_neighbors,
+            weights=weights,
+            working_memory=working_memory,
+        )
+        self.bucket_size = bucket_size
+
+    def _bucket_keys(self, X: np.ndarray) -> np.ndarray:
+        keys = np.zeros(len(X), dtype=np.int64)
+        for col in self.hash_features_:
+            codes = np.searchsorted(self.categories_, X[:, col])
+            known = np.isin(X[:, col], self.categories_)
+            keys = keys * (len(self.categories_) + 1) + np.where(known, codes, len(self.categories_))
+        return keys
+
+    def _fit(self, X: np.ndarray, missing: np.ndarray) -> None:
+        super()._fit(X, missing)
+        self.categories_ = np.unique(X[~missing])
+        n_symbols = len(self.categories_) + 1
+        n_hash = int(np.ceil(np.log(max(len(X) / self.bucket_size, 1)) / np.log(max(n_symbols, 2))))
+        n_hash = int(np.clip(n_hash, 1, max(X.shape[1] - 1, 1)))
+        entropy = np.zeros(X.shape[1])
+        for col in range(X.shape[1]):
+            _, counts = np.unique(np.where(missing[:, col], np.inf, X[:, col]), return_counts=True)
+            share = counts / counts.sum()
+            entropy[col] = -(share * np.log(share)).sum()
+        self.hash_features_ = np.argsort(-entropy, kind="stable")[:n_hash]
+        keys = self._bucket_keys(X)
+        self.bucket_order_ = np.argsort(keys, kind="stable")
+        self.bucket_keys_, self.bucket_starts_ = np.unique(keys[self.bucket_order_], return_index=True)
+        self.bucket_starts_ = np.append(self.bucket_starts_, len(keys))
+
+    def _impute_rows(self, X: np.ndarray, missing: np.ndarray) -> np.ndarray:
+        out = np.where(missing, np.nan, X)
+        receiver_keys = self._bucket_keys(X)
+        buckets = np.searchsorted(self.bucket_keys_, receiver_keys)
+        buckets[buckets == len(self.bucket_keys_)] = 0
+        found = self.bucket_keys_[buckets] == receiver_keys
+        for bucket in np.unique(buckets[found]):
+            rows = np.flatnonzero(found & (buckets == bucket))
+            donors = self.bucket_order_[self.bucket_starts_[bucket]:self.bucket_starts_[bucket + 1]]
+            bucket_out = out[rows]
+            self._knn_fill(X[rows], missing[rows], bucket_out, donors, min_donors=self.n_neighbors)
+            out[rows] = bucket_out
+
+        # Exact search for whatever the buckets could not fill
+        left = np.isnan(out) & missing
+        rows = np.flatnonzero(left.any(axis=1))
+        if rows.size:
+            exact = out[rows]
+            self._knn_fill(X[rows], missing[rows], exact)
+            out[rows] = np.where(left[rows], exact, out[rows])
+        return out
+
+
+class BoundedKNNImputer(ChunkedKNNImputer):
+    """
+    Nearest-neighbour imputation against a bounded index: at most
+    `max_index_rows` distinct training rows, sampled in proportion to how often
+    each occurs. The column means used as fallback still come from all
+    training rows. Pickled size, load time and the cost of imputing a row
+    depend on `max_index_rows` only, not on the size of the training set,
+    which makes it the imputer used at serving time.
+    """
+
+    def __init__(
+        self,
+        missing_values=np.nan,
+        n_neighbors: int = 3,
+        weights: str = "uniform",
+        working_memory: int = 256,
+        max_index_rows: int = 2048,
+        random_state: int = 42,
+    ) -> None:
+        super().__init__(
+            missing_values=missing_values,
+            n_neighbors=n_neighbors,
+            weights=weights,
+            working_memory=working_memory,
+        )
+        self.max_index_rows = max_index_rows
+        self.random_state = random_state
+
+    def _fit(self, X: np.ndarray, missing: np.ndarray) -> None:
+        if get_packable_mask(X).all():
+            # One uint64 per ternary row, in the same order as the rows themselves
+            packed, counts = unique_rows(pack_rows(X), return_counts=True)
+            rows = unpack_rows(packed, X.shape[1])
+            rows[np.isnan(rows)] = np.inf
+        else:
+            # NaN never equals itself, so distinct rows are found on a sentinel copy
+            rows, counts = np.unique(np.where(missing, np.inf, X), axis=0, return_counts=True)
+        if len(rows) > self.max_index_rows:
+            rng = np.random.default_rng(self.random_state)
+            keep = rng.choice(len(rows), self.max_index_rows, replace=False, p=counts / counts.sum())
+            rows = rows[np.sort(keep)]
+        index = np.where(np.isinf(rows), np.nan, rows)
+        super()._fit(index, np.isnan(index))
+        present = ~missing
+        self.col_means_ = np.where(
+            present.any(axis=0),
+            np.where(missing, 0.0, X).sum(axis=0) / np.maximum(present.sum(axis=0), 1),
+            0.0,
+        )
+
+
+IMPUTER_STRATEGIES = {
+    "knn": KNNImputer,
+    "chunked_knn": ChunkedKNNImputer,
+    "approximate_knn": ApproximateKNNImputer,
+    "bounded_knn": BoundedKNNImputer,
+    "mode": ModeImputer,
+    "conditional_mode": ConditionalModeImputer,
+}
+
+
+def get_imputer(strategy: str, params: Optional[dict] = None):
+    """Build the imputer of `strategy` with the entries of `params` it accepts"""
+    try:
+        if strategy not in IMPUTER_STRATEGIES:
+            raise ValueError(
+                f"Unknown imputer strategy {strategy!r}, expected one of {list(IMPUTER_STRATEGIES)}"
+            )
+        imputer_cls = IMPUTER_STRATEGIES[strategy]
+        accepted = imputer_cls._get_param_names()
+        return imputer_cls(**{key: value for key, value in (params or {}).items() if key in accepted})
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -1,22 +1,141 @@
 import sys
-from sklearn.metrics import f1_score, precision_score, recall_score
+import numpy as np
+from typing import Dict, List, Tuple
 
 from network_security.entity.artifact import ClassificationMetricArtifact
 from network_security.exception.exception import NetworkSecurityException
 
-def get_classification_score(y_true, y_pred) -> ClassificationMetricArtifact:
+
+def _as_prediction_matrix(y_true, y_preds) -> Tuple[np.ndarray, np.ndarray]:
+    y_true = np.asarray(y_true).ravel()
+    y_preds = np.asarray(y_preds)
+    if y_preds.ndim == 1:
+        y_preds = y_preds[None, :]
+    if y_preds.shape[1] != len(y_true):
+        raise ValueError(
+            f"Predictions have {y_preds.shape[1]} samples, y_true has {len(y_true)}"
+        )
+    return y_true, y_preds
+
+
+def get_confusion_counts(y_true, y_preds, pos_label=1) -> Tuple[np.ndarray, ...]:
+    """
+    (tp, fp, fn, tn) of every row of the (vectors x samples) prediction
+    matrix `y_preds` against `y_true`, counted in one vectorized pass. Any
+    label other than `pos_label` is negative.
+    """
+    try:
+        y_true, y_preds = _as_prediction_matrix(y_true, y_preds)
+        true_positive = y_true == pos_label
+        predicted_positive = y_preds == pos_label
+        tp = np.count_nonzero(predicted_positive & true_positive, axis=1)
+        fp = np.count_nonzero(predicted_positive, axis=1) - tp
+        fn = np.count_nonzero(true_positive) - tp
+        tn = len(y_true) - tp - fp - fn
+        return tp, fp, fn, tn
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def get_scores_from_counts(tp, fp, fn, tn) -> Dict[str, np.ndarray]:
+    """
+    Precision, recall and F1 of the positive class from confusion counts,
+    0 where undefined (scikit-learn's `zero_division` default).
+    """
+    tp, fp, fn, tn = (np.asarray(count, dtype=np.float64) for count in (tp, fp, fn, tn))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+        f1 = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+
+def get_batch_scores(y_true, y_preds, pos_label=1) -> Dict[str, np.ndarray]:
+    """
+    Metrics of many prediction vectors at once: `y_preds` is a (vectors x
+    samples) matrix, e.g. the predictions of every candidate of a search.
+    Returns arrays of one value per vector for "precision", "recall", "f1"
+    (binary, of `pos_label`), "accuracy" and "r2", equal to the scikit-learn
+    metrics of each vector.
+    """
+    try:
+        y_true, y_preds = _as_prediction_matrix(y_true, y_preds)
+        scores = get_scores_from_counts(*get_confusion_counts(y_true, y_preds, pos_label))
+        scores["accuracy"] = (
+            np.count_nonzero(y_preds == y_true, axis=1) / len(y_true)
+            if len(y_true) else np.zeros(len(y_preds))
+        )
+
+        y_true_float = y_true.astype(np.float64)
+        residual = np.square(y_preds - y_true_float).sum(axis=1)
+        total = np.square(y_true_float - y_true_float.mean()).sum() if len(y_true) else 0.0
+        if total > 0:
+            scores["r2"] = 1 - residual / total
+        else:
+            # Constant target: scikit-learn scores perfect predictions 1, others 0
+            scores["r2"] = np.where(residual == 0, 1.0, 0.0)
+        return scores
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def get_threshold_scores(y_true, y_score, thresholds, pos_label=1) -> Dict[str, np.ndarray]:
+    """
+    Precision, recall and F1 of `y_score >= threshold` for every threshold,
+    from one sort of the scores instead of one confusion matrix per threshold.
+    """
     try:
-        model_f1_score = f1_score(y_true=y_true, y_pred=y_pred)
-        model_recall_score = recall_score(y_true=y_true, y_pred=y_pred)
-        model_precision_score = precision_score(y_true=y_true, y_pred=y_pred)
-
-        classification_metric = ClassificationMetricArtifact(
-            f1_score=model_f1_score,
-            precision_score=model_precision_score,
-            recall_score=model_recall_score
+        y_true = np.asarray(y_true).ravel()
+        y_score = np.asarray(y_score, dtype=np.float64).ravel()
+        thresholds = np.asarray(thresholds, dtype=np.float64).ravel()
+        true_positive = y_true == pos_label
+        positive_scores = np.sort(y_score[true_positive])
+        negative_scores = np.sort(y_score[~true_positive])
+
+        # Rows scored at or above a threshold are predicted positive
+        tp = len(positive_scores) - np.searchsorted(positive_scores, thresholds, side="left")
+        fp = len(negative_scores) - np.searchsorted(negative_scores, thresholds, side="left")
+        fn = len(positive_scores) - tp
+        tn = len(negative_scores) - fp
+        return get_scores_from_counts(tp, fp, fn, tn)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def _to_metric_artifacts(scores: Dict[str, np.ndarray]) -> List[ClassificationMetricArtifact]:
+    return [
+        ClassificationMetricArtifact(
+            f1_score=float(f1), precision_score=float(precision), recall_score=float(recall)
         )
-        
+        for f1, precision, recall in zip(scores["f1"], scores["precision"], scores["recall"])
+    ]
+
+
+def get_classification_scores(y_true, y_preds, pos_label=1) -> List[ClassificationMetricArtifact]:
+    """`ClassificationMetricArtifact` of every row of a (vectors x samples) prediction matrix"""
+    try:
+        y_true, y_preds = _as_prediction_matrix(y_true, y_preds)
+        scores = get_scores_from_counts(*get_confusion_counts(y_true, y_preds, pos_label))
+        return _to_metric_artifacts(scores)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def get_threshold_classification_scores(
+    y_true, y_score, thresholds, pos_label=1
+) -> List[ClassificationMetricArtifact]:
+    """`ClassificationMetricArtifact` of `y_score >= threshold` for every threshold"""
+    try:
+        return _to_metric_artifacts(get_threshold_scores(y_true, y_score, thresholds, pos_label))
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def get_classification_score(y_true, y_pred) -> ClassificationMetricArtifact:
+    try:
+        classification_metric = get_classification_scores(y_true, y_pred)[0]
+
         return classification_metric
 
     except Exception as e:
-        raise NetworkSecurityException(e, sys)
\ No newline at end of file
+        raise NetworkSecurityException(e, sys)
@@ -0,0 +1,282 @@
+import sys
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple, Union
+from scipy.stats import chi2, kstwo
+
+from network_security.constants.training_pipeline import (
+    DATA_VALIDATION_DRIFT_METHOD,
+    DATA_VALIDATION_DRIFT_THRESHOLD,
+    DATA_VALIDATION_PSI_THRESHOLD,
+)
+from network_security.exception.exception import NetworkSecurityException
+from network_security.utils.main_utils.utils import read_yaml_file, write_yaml_file
+
+DRIFT_METHODS = ("ks", "chi2", "psi")
+# Floor for empty histogram cells so PSI stays finite
+PSI_EPSILON = 1e-4
+
+
+def get_category_codes(dataframe: pd.DataFrame, categories: np.ndarray) -> np.ndarray:
+    """
+    Encode a frame of discrete values as a (columns x rows) matrix of category
+    codes: `0..len(categories)-1` for the known categories, `len(categories)`
+    for any other value and `len(categories) + 1` for a missing value.
+    """
+    try:
+        n_categories = len(categories)
+        codes = np.empty((dataframe.shape[1], dataframe.shape[0]), dtype=np.int32)
+        for i, col in enumerate(dataframe.columns):
+            column = dataframe[col]
+            if not pd.api.types.is_numeric_dtype(column):
+                column = pd.to_numeric(column, errors="coerce")
+            values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+            index = np.minimum(np.searchsorted(categories, values), n_categories - 1)
+            codes[i] = np.where(categories[index] == values, index, n_categories)
+            codes[i][np.isnan(values)] = n_categories + 1
+        return codes
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def get_category_counts(dataframe: pd.DataFrame, categories: np.ndarray) -> np.ndarray:
+    """
+    (columns x categories) count matrix of a frame, built with a single
+    `bincount` over all columns. The last two columns of the matrix count
+    values outside `categories` and missing values.
+    """
+    try:
+        width = len(categories) + 2
+        codes = get_category_codes(dataframe, categories)
+        codes += (np.arange(codes.shape[0], dtype=np.int32) * width)[:, None]
+        counts = np.bincount(codes.ravel(), minlength=codes.shape[0] * width)
+        return counts.reshape(codes.shape[0], width)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def get_discrete_drift(base_counts: np.ndarray, current_counts: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Drift statistics of every column at once from two count matrices laid out
+    as returned by `get_category_counts`. Missing values are ignored.
+
+    - `ks_statistic` / `ks_p_value`: two sample Kolmogorov-Smirnov test over the
+      ordered categories, with the asymptotic p-value `ks_2samp` uses. Values
+      outside the known categories have no place in the order and are left out.
+    - `chi2_statistic` / `chi2_p_value`: chi-square test of homogeneity of the
+      2 x categories contingency table, including the "other" bucket.
+    - `psi`: population stability index of the current against the base data.
+    """
+    try:
+        base = base_counts[:, :-1].astype(np.float64)
+        current = current_counts[:, :-1].astype(np.float64)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Kolmogorov-Smirnov on the known, ordered categories
+            n1 = base[:, :-1].sum(axis=1)
+            n2 = current[:, :-1].sum(axis=1)
+            cdf1 = np.cumsum(base[:, :-1], axis=1) / n1[:, None]
+            cdf2 = np.cumsum(current[:, :-1], axis=1) / n2[:, None]
+            ks_statistic = np.abs(cdf1 - cdf2).max(axis=1)
+            effective_n = np.round(n1 * n2 / (n1 + n2))
+            ks_p_value = np.clip(kstwo.sf(ks_statistic, np.maximum(effective_n, 1)), 0, 1)
+
+            # Chi-square test of homogeneity
+            base_total = base.sum(axis=1, keepdims=True)
+            current_total = current.sum(axis=1, keepdims=True)
+            category_total = base + current
+            total = base_total + current_total
+            observed = np.stack([base, current])
+            expected = np.stack([base_total, current_total]) * category_total / total
+            cells = np.where(expected > 0, (observed - expected) ** 2 / expected, 0.0)
+            chi2_statistic = cells.sum(axis=(0, 2))
+            dof = (category_total > 0).sum(axis=1) - 1
+            chi2_p_value = np.where(dof > 0, chi2.sf(chi2_statistic, np.maximum(dof, 1)), 1.0)
+
+            # Population stability index
+            expected_share = np.maximum(base / base_total, PSI_EPSILON)
+            actual_share = np.maximum(current / current_total, PSI_EPSILON)
+            psi = ((actual_share - expected_share) * np.log(actual_share / expected_share)).sum(axis=1)
+
+        # Columns without data on either side cannot show drift
+        empty = (n1 == 0) | (n2 == 0)
+        ks_statistic[empty] = 0.0
+        ks_p_value[empty] = 1.0
+        psi[(base_total[:, 0] == 0) | (current_total[:, 0] == 0)] = 0.0
+
+        return {
+            "ks_statistic": ks_statistic,
+            "ks_p_value": ks_p_value,
+            "chi2_statistic": chi2_statistic,
+            "chi2_p_value": chi2_p_value,
+            "psi": psi,
+        }
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def get_drift_status(
+    drift: Dict[str, np.ndarray], method: str, threshold: float, psi_threshold: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Per column (p_value, drift_status) of the selected test"""
+    try:
+        if method not in DRIFT_METHODS:
+            raise ValueError(f"Unknown drift method {method!r}, expected one of {DRIFT_METHODS}")
+        if method == "psi":
+            # PSI has no p-value, the chi-square one is reported alongside it
+            return drift["chi2_p_value"], drift["psi"] >= psi_threshold
+        p_value = drift[f"{method}_p_value"]
+        return p_value, p_value < threshold
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def get_drift_report(
+    columns: list,
+    drift: Dict[str, np.ndarray],
+    method: str,
+    threshold: float,
+    psi_threshold: float,
+) -> Tuple[bool, dict]:
+    """
+    Build the per column drift report written by data validation. Returns
+    (True when no column drifted, report).
+    """
+    try:
+        p_value, drift_status = get_drift_status(drift, method, threshold, psi_threshold)
+        report = {}
+        for i, col in enumerate(columns):
+            report[col] = {
+                "p_value": float(p_value[i]),
+                "drift_status": bool(drift_status[i]),
+                "ks_statistic": float(drift["ks_statistic"][i]),
+                "chi2_p_value": float(drift["chi2_p_value"][i]),
+                "psi": float(drift["psi"][i]),
+            }
+        return not drift_status.any(), report
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def save_reference_sketch(
+    file_path: str, columns: List[str], categories: np.ndarray, counts: np.ndarray
+) -> None:
+    """
+    Persist the per column category histograms (plus the "other" and missing
+    counts) of the reference data, so drift can later be measured against it
+    without reloading the data.
+    """
+    try:
+        sketch = {
+            "categories": [float(category) for category in categories],
+            "rows": int(counts[0].sum()) if len(counts) else 0,
+            "columns": {
+                col: {
+                    "counts": [int(count) for count in counts[i, : len(categories)]],
+                    "other": int(counts[i, -2]),
+                    "missing": int(counts[i, -1]),
+                }
+                for i, col in enumerate(columns)
+            },
+        }
+        write_yaml_file(file_path, sketch)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def load_reference_sketch(file_path: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Read a sketch written by `save_reference_sketch` as (columns, categories, counts)"""
+    try:
+        sketch = read_yaml_file(file_path)
+        columns = list(sketch["columns"])
+        categories = np.asarray(sketch["categories"], dtype=np.float64)
+        counts = np.array(
+            [
+                histogram["counts"] + [histogram["other"], histogram["missing"]]
+                for histogram in sketch["columns"].values()
+            ],
+            dtype=np.int64,
+        ).reshape(len(columns), len(categories) + 2)
+        return columns, categories, counts
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+class DriftMonitor:
+    """
+    Incremental drift check against a persisted reference sketch.
+
+    Every `update` adds the category counts of a batch of new records (a
+    DataFrame, a list of documents or a 2D array in the sketch's column order)
+    to a running histogram and recomputes the drift statistics of all columns
+    from the two count matrices, so the cost of a check is one pass over the
+    batch. Columns missing from a batch (e.g. the target at inference time)
+    are counted as missing and never drift. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        reference_sketch_file_path: str,
+        method: str = DATA_VALIDATION_DRIFT_METHOD,
+        threshold: float = DATA_VALIDATION_DRIFT_THRESHOLD,
+        psi_threshold: float = DATA_VALIDATION_PSI_THRESHOLD,
+    ) -> None:
+        try:
+            self.columns, self.categories, self.reference_counts = load_reference_sketch(
+                reference_sketch_file_path
+            )
+            self.method = method
+            self.threshold = threshold
+            self.psi_threshold = psi_threshold
+            self._lock = threading.Lock()
+            self.reset()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def reset(self) -> None:
+        """Forget the batches seen so far"""
+        with self._lock:
+            self.current_counts = np.zeros_like(self.reference_counts)
+            self.rows_seen = 0
+
+    def _to_frame(self, batch: Union[pd.DataFrame, np.ndarray, list]) -> pd.DataFrame:
+        if isinstance(batch, pd.DataFrame):
+            dataframe = batch
+        elif isinstance(batch, np.ndarray):
+            dataframe = pd.DataFrame(batch, columns=self.columns[: batch.shape[1]])
+        else:
+            dataframe = pd.DataFrame.from_records(batch)
+        # Same column order as the sketch; absent columns become all missing
+        return dataframe.reindex(columns=self.columns)
+
+    def get_batch_counts(self, batch: Union[pd.DataFrame, np.ndarray, list]) -> np.ndarray:
+        try:
+            return get_category_counts(self._to_frame(batch), self.categories)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def check(self, counts: np.ndarray) -> Tuple[bool, dict]:
+        """(no drift, report) of a count matrix against the reference"""
+        try:
+            drift = get_discrete_drift(self.reference_counts, counts)
+            return get_drift_report(
+                self.columns, drift, self.method, self.threshold, self.psi_threshold
+            )
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def update(self, batch: Union[pd.DataFrame, np.ndarray, list]) -> Tuple[bool, dict]:
+        """
+        Add a batch to the running histogram and return (no drift, report) of
+        all records seen since the last `reset`.
+        """
+        try:
+            counts = self.get_batch_counts(batch)
+            with self._lock:
+                self.current_counts += counts
+                self.rows_seen += int(counts[0].sum()) if len(counts) else 0
+                current_counts = self.current_counts.copy()
+            return self.check(current_counts)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
@@ -0,0 +1,220 @@
+import sys
+import numpy as np
+from typing import List, Optional
+
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.dummy import DummyClassifier
+
+from network_security.exception.exception import NetworkSecurityException
+from network_security.logging.logger import logging
+
+# Inputs within this range take the int8 path; -128 is left out so clipped
+# thresholds keep their meaning
+INT8_INPUT_RANGE = (-127, 127)
+
+
+class CompiledTreeEnsemble:
+    """
+    A fitted tree or tree ensemble flattened into contiguous node arrays, with
+    a vectorized NumPy predictor that gives the same predictions as the
+    scikit-learn model.
+
+    All trees share one node table (`feature`, `threshold`, `children`,
+    `missing_go_to_left`, leaf `value`), and a batch walks all of its
+    (row, tree) pairs together, one tree level per step, dropping the pairs
+    that reached a leaf. Comparisons follow
+    scikit-learn: the input cast to float32 against the float64 threshold,
+    and NaN follows `missing_go_to_left`. For integer inputs such as the
+    ternary features, the thresholds are also kept floored as int8 (for an
+    integer x, x <= t exactly when x <= floor(t)), so the walk runs on a
+    compact int8 copy of the rows.
+
+    The leaf values are combined as the source model does, in the same
+    order, so ties break the same way:
+
+    - "tree": a single decision tree, argmax of the leaf value.
+    - "forest": mean of the per-tree class distributions, argmax.
+    - "boosting": initial raw prediction plus learning_rate times each
+      stage's leaf value; `>= 0` for two classes, argmax otherwise.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        classes: np.ndarray,
+        trees: list,
+        n_outputs_per_stage: int = 1,
+        learning_rate: float = 1.0,
+        init_raw_prediction: Optional[np.ndarray] = None,
+    ) -> None:
+        try:
+            self.kind = kind
+            self.classes_ = np.asarray(classes)
+            self.n_trees = len(trees)
+            self.n_outputs_per_stage = n_outputs_per_stage
+            self.learning_rate = learning_rate
+            self.init_raw_prediction = init_raw_prediction
+            self._flatten(trees)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def _flatten(self, trees: list) -> None:
+        node_counts = [tree.node_count for tree in trees]
+        offsets = np.concatenate([[0], np.cumsum(node_counts)[:-1]]).astype(np.int32)
+        n_nodes = int(sum(node_counts))
+
+        self.roots = offsets
+        self.feature = np.zeros(n_nodes, dtype=np.int32)
+        self.threshold = np.zeros(n_nodes, dtype=np.float64)
+        # children[2 * node] is the left child, children[2 * node + 1] the right one
+        self.children = np.empty(2 * n_nodes, dtype=np.int32)
+        self.missing_go_to_left = np.zeros(n_nodes, dtype=bool)
+        self.is_leaf = np.zeros(n_nodes, dtype=bool)
+        values = []
+        for offset, tree in zip(offsets, trees):
+            nodes = np.arange(offset, offset + tree.node_count, dtype=np.int32)
+            leaf = tree.children_left == -1
+            self.is_leaf[nodes] = leaf
+            self.feature[nodes] = np.where(leaf, 0, tree.feature)
+            self.threshold[nodes] = np.where(leaf, 0.0, tree.threshold)
+            self.children[2 * nodes] = np.where(leaf, nodes, tree.children_left + offset)
+            self.children[2 * nodes + 1] = np.where(leaf, nodes, tree.children_right + offset)
+            if hasattr(tree, "missing_go_to_left"):
+                self.missing_go_to_left[nodes] = np.asarray(tree.missing_go_to_left, dtype=bool)
+            values.append(self._leaf_values(tree))
+        self.value = np.concatenate(values)
+
+        floored = np.floor(self.threshold)
+        self.int8_threshold = np.clip(floored, -128, 127).astype(np.int8)
+
+    def _leaf_values(self, tree) -> np.ndarray:
+        if self.kind == "boosting":
+            # Regression trees: one value per node, pre-scaled as predict_stages does
+            return self.learning_rate * tree.value[:, 0, 0]
+        value = tree.value[:, 0, : len(self.classes_)]
+        if self.kind == "forest":
+            # As DecisionTreeClassifier.predict_proba
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            value = value / normalizer
+        return value
+
+    def apply(self, X) -> np.ndarray:
+        """(rows x trees) matrix of the leaf every row reaches in every tree"""
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        X = X.astype(np.float32, copy=False)
+        has_missing = np.isnan(X).any()
+        if has_missing and self.kind == "boosting":
+            # Gradient boosting rejects missing values, so does its compiled form
+            raise ValueError("Input X contains NaN")
+        low, high = INT8_INPUT_RANGE
+        if not has_missing and np.array_equal(X, np.rint(X)) and X.size and low <= X.min() and X.max() <= high:
+            X, threshold = X.astype(np.int8), self.int8_threshold
+        else:
+            threshold = self.threshold
+
+        # Walk all (row, tree) pairs one level per step over the flat rows.
+        # Leaves are their own children, so pairs that are done can keep
+        # stepping; they are only dropped once most pairs are done, which pays
+        # off for deep forests but not for shallow boosting trees
+        n_rows, n_features = X.shape
+        X = np.ascontiguousarray(X).ravel()
+        nodes = np.tile(self.roots, n_rows)
+        row_starts = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, self.n_trees)
+        active = None
+        while True:
+            current = nodes if active is None else nodes[active]
+            starts = row_starts if active is None else row_starts[active]
+            x = X[starts + self.feature[current]]
+            go_right = ~(x <= threshold[current])
+            if has_missing:
+                go_right &= ~(np.isnan(x) & self.missing_go_to_left[current])
+            current = self.children[2 * current + go_right]
+            if active is None:
+                nodes = current
+            else:
+                nodes[active] = current
+            inner = ~self.is_leaf[current]
+            n_inner = np.count_nonzero(inner)
+            if n_inner == 0:
+                break
+            if n_inner < inner.size // 2:
+                active = np.flatnonzero(inner) if active is None else active[inner]
+        return nodes.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities of a "forest" ensemble"""
+        try:
+            if self.kind != "forest":
+                raise ValueError(f"predict_proba is only compiled for forests, not {self.kind!r}")
+            leaf_values = self.value[self.apply(X)]
+            # Sequential sum over the trees, in tree order, as the forest does
+            return np.cumsum(leaf_values, axis=1)[:, -1] / self.n_trees
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def decision_function(self, X) -> np.ndarray:
+        """Raw predictions of a "boosting" ensemble"""
+        try:
+            if self.kind != "boosting":
+                raise ValueError(f"decision_function is only compiled for boosting, not {self.kind!r}")
+            leaves = self.apply(X)
+            n_rows, K = len(leaves), self.n_outputs_per_stage
+            # Trees are laid out stage by stage, K per stage
+            stage_values = self.value[leaves].reshape(n_rows, -1, K)
+            init = np.broadcast_to(self.init_raw_prediction, (n_rows, 1, K))
+            raw = np.cumsum(np.concatenate([init, stage_values], axis=1), axis=1)[:, -1]
+            return raw.ravel() if K == 1 else raw
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def predict(self, X) -> np.ndarray:
+        try:
+            if self.kind == "boosting":
+                raw = self.decision_function(X)
+                encoded = (raw >= 0).astype(int) if raw.ndim == 1 else np.argmax(raw, axis=1)
+            elif self.kind == "forest":
+                encoded = np.argmax(self.predict_proba(X), axis=1)
+            else:
+                encoded = np.argmax(self.value[self.apply(X)[:, 0]], axis=1)
+            return self.classes_[encoded]
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+
+def compile_model(model) -> Optional[CompiledTreeEnsemble]:
+    """
+    Compile a fitted single-output DecisionTreeClassifier, RandomForest or
+    ExtraTrees classifier, or GradientBoostingClassifier (with the default
+    prior as init); None for any other model, which is then served as is.
+    """
+    try:
+        if getattr(model, "n_outputs_", 1) != 1:
+            return None
+        if isinstance(model, DecisionTreeClassifier):
+            compiled = CompiledTreeEnsemble("tree", model.classes_, [model.tree_])
+        elif isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+            trees: List = [estimator.tree_ for estimator in model.estimators_]
+            compiled = CompiledTreeEnsemble("forest", model.classes_, trees)
+        elif isinstance(model, GradientBoostingClassifier):
+            if not isinstance(model.init_, DummyClassifier):
+                return None
+            n_features = model.n_features_in_
+            compiled = CompiledTreeEnsemble(
+                "boosting",
+                model.classes_,
+                [estimator.tree_ for estimator in model.estimators_.ravel()],
+                n_outputs_per_stage=model.estimators_.shape[1],
+                learning_rate=model.learning_rate,
+                # The prior does not depend on the row
+                init_raw_prediction=model._raw_predict_init(np.zeros((1, n_features), dtype=np.float32))[0],
+            )
+        else:
+            return None
+        logging.info(f"Compiled {type(model).__name__} into {len(compiled.feature)} nodes")
+        return compiled
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import time
+import threading
+from typing import List, Optional
+
+from sklearn.base import clone
+
+from network_security.constants.training_pipeline import (
+    MODEL_TRAINER_CV_MEMO_DIR,
+    MODEL_TRAINER_CV_MEMO_MAX_BYTES,
+    MODEL_TRAINER_CV_MEMO_MAX_AGE_SECONDS,
+)
+from network_security.exception.exception import NetworkSecurityException
+from network_security.logging.logger import logging
+from network_security.utils.main_utils.utils import get_fingerprint, save_object, load_object
+
+
+class CVMemo:
+    """
+    On-disk memo of cross-validation results that outlives a pipeline run.
+
+    Fold scores are keyed by (training data fingerprint, estimator class,
+    estimator parameters, CV splitter) and fitted estimators by (training
+    data fingerprint, estimator class, estimator parameters), so a rerun on
+    unchanged data, or a grid that only gained new points, only computes what
+    is new. Entries are files under `memo_dir`; a hit refreshes the entry's
+    modification time and `evict` drops entries older than `max_age_seconds`,
+    then the least recently used ones until the memo fits in `max_bytes`.
+    """
+
+    SCORES_EXTENSION = ".json"
+    ESTIMATOR_EXTENSION = ".pkl"
+
+    def __init__(
+        self,
+        memo_dir: str = MODEL_TRAINER_CV_MEMO_DIR,
+        max_bytes: int = MODEL_TRAINER_CV_MEMO_MAX_BYTES,
+        max_age_seconds: float = MODEL_TRAINER_CV_MEMO_MAX_AGE_SECONDS,
+    ) -> None:
+        try:
+            self.memo_dir = memo_dir
+            self.max_bytes = max_bytes
+            self.max_age_seconds = max_age_seconds
+            self.hits = 0
+            self.misses = 0
+            self._lock = threading.Lock()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    @staticmethod
+    def get_data_fingerprint(X, y, sample_weight=None) -> str:
+        # Unweighted data keeps the fingerprint it had before weights existed
+        return get_fingerprint(X, y) if sample_weight is None else get_fingerprint(X, y, sample_weight)
+
+    @staticmethod
+    def _estimator_key(data_fingerprint: str, estimator, params: dict, *extra) -> str:
+        estimator = clone(estimator).set_params(**params)
+        estimator_cls = type(estimator)
+        return get_fingerprint(
+            data_fingerprint,
+            f"{estimator_cls.__module__}.{estimator_cls.__qualname__}",
+            estimator.get_params(deep=True),
+            *extra,
+        )
+
+    def _entry_path(self, key: str, extension: str) -> str:
+        return os.path.join(self.memo_dir, key[:2], key + extension)
+
+    def _read(self, file_path: str, loader):
+        if not os.path.exists(file_path):
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            value = loader(file_path)
+        except Exception:
+            # A torn or stale entry is a miss, not a failure of the search
+            logging.info(f"Ignoring unreadable CV memo entry {file_path}")
+            with self._lock:
+                self.misses += 1
+            return None
+        os.utime(file_path)
+        with self._lock:
+            self.hits += 1
+        return value
+
+    @staticmethod
+    def _write(file_path: str, writer) -> None:
+        # Write next to the entry and rename, so readers never see half a file
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        writer(tmp_path)
+        os.replace(tmp_path, file_path)
+
+    @staticmethod
+    def _load_scores(file_path: str) -> List[float]:
+        with open(file_path) as memo_file:
+            return json.load(memo_file)["fold_scores"]
+
+    def get_scores(self, data_fingerprint: str, estimator, params: dict, cv) -> Optional[List[float]]:
+        """Fold scores of `estimator` with `params` under splitter `cv`, if memoized"""
+        try:
+            key = self._estimator_key(data_fingerprint, estimator, params, "scores", repr(cv))
+            return self._read(self._entry_path(key, self.SCORES_EXTENSION), self._load_scores)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def put_scores(
+        self, data_fingerprint: str, estimator, params: dict, cv, fold_scores: List[float]
+    ) -> None:
+        try:
+            key = self._estimator_key(data_fingerprint, estimator, params, "scores", repr(cv))
+            file_path = self._entry_path(key, self.SCORES_EXTENSION)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+            def writer(tmp_path: str) -> None:
+                with open(tmp_path, "w") as memo_file:
+                    json.dump({"fold_scores": [float(score) for score in fold_scores]}, memo_file)
+
+            self._write(file_path, writer)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def get_estimator(self, data_fingerprint: str, estimator, params: dict):
+        """`estimator` with `params` fitted on the data of `data_fingerprint`, if memoized"""
+        try:
+            key = self._estimator_key(data_fingerprint, estimator, params, "estimator")
+            return self._read(self._entry_path(key, self.ESTIMATOR_EXTENSION), load_object)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def put_estimator(self, data_fingerprint: str, fitted_estimator) -> None:
+        try:
+            key = self._estimator_key(data_fingerprint, fitted_estimator, {}, "estimator")
+            file_path = self._entry_path(key, self.ESTIMATOR_EXTENSION)
+            self._write(file_path, lambda tmp_path: save_object(tmp_path, fitted_estimator))
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used ones over the size limit"""
+        try:
+            if not os.path.isdir(self.memo_dir):
+                return 0
+            entries = []
+            for dir_path, _, file_names in os.walk(self.memo_dir):
+                for file_name in file_names:
+                    file_path = os.path.join(dir_path, file_name)
+                    try:
+                        stat = os.stat(file_path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, file_path))
+
+            now = time.time()
+            entries.sort()
+            total_bytes = sum(size for _, size, _ in entries)
+            evicted = 0
+            for mtime, size, file_path in entries:
+                if now - mtime <= self.max_age_seconds and total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+                total_bytes -= size
+                evicted += 1
+            for dir_path, dir_names, file_names in os.walk(self.memo_dir, topdown=False):
+                if dir_path != self.memo_dir and not dir_names and not file_names:
+                    try:
+                        os.rmdir(dir_path)
+                    except OSError:
+                        pass
+            if evicted:
+                logging.info(f"Evicted {evicted} CV memo entries, {total_bytes} bytes left")
+            return evicted
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
@@ -0,0 +1,188 @@
+import sys
+import time
+import pickle
+import hashlib
+import threading
+import numpy as np
+from typing import Optional, Tuple
+
+from network_security.constants.training_pipeline import (
+    PREDICTION_CACHE_MAX_ENTRIES,
+    PREDICTION_CACHE_TTL_SECONDS,
+)
+from network_security.exception.exception import NetworkSecurityException
+from network_security.logging.logger import logging
+from network_security.utils.main_utils.packing import get_packable_mask, get_row_bytes, pack_rows
+
+
+def get_model_fingerprint(*objects) -> str:
+    """Content hash of fitted objects (preprocessor, model), via their pickles"""
+    try:
+        digest = hashlib.blake2b(digest_size=16)
+        for obj in objects:
+            digest.update(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+        return digest.hexdigest()
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def get_row_keys(X) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Packed keys of the cacheable rows of X: the fully observed rows whose
+    values are all in the ternary feature domain. Returns the positions of
+    those rows and their 2-bit packing (see packing.py) as one fixed-width
+    bytes key per row.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    positions = np.flatnonzero(get_packable_mask(X, allow_missing=False))
+    return positions, get_row_bytes(pack_rows(X[positions]))
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache of per-row predictions with a time to live.
+
+    Keys are packed rows (see get_row_keys). The entries are held in arrays
+    sorted by key: `get_many` finds a whole batch of keys with one
+    `np.searchsorted` and returns the cached predictions with a mask of the
+    hits, and `put_many` merges the predictions of the misses in, evicting
+    the least recently used entries beyond `max_entries`. Entries older than
+    `ttl_seconds` count as misses. The cache is bound to the fingerprint of
+    the model that filled it and is emptied when bound to another one, and a
+    pickled cache keeps its settings but not its entries.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = PREDICTION_CACHE_MAX_ENTRIES,
+        ttl_seconds: Optional[float] = PREDICTION_CACHE_TTL_SECONDS,
+    ) -> None:
+        try:
+            if max_entries < 1:
+                raise ValueError(f"max_entries must be at least 1, got {max_entries}")
+            self.max_entries = max_entries
+            self.ttl_seconds = ttl_seconds
+            self._lock = threading.Lock()
+            self.model_fingerprint = None
+            self.clear()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
+
+    def clear(self) -> None:
+        with self._lock:
+            # Sorted keys and, aligned with them, the predictions, expiry times
+            # and the tick of the last lookup or store of every entry
+            self._keys: Optional[np.ndarray] = None
+            self._values: Optional[np.ndarray] = None
+            self._expires_at = np.empty(0, dtype=np.float64)
+            self._last_used = np.empty(0, dtype=np.int64)
+            self._tick = 0
+            self.hits = 0
+            self.misses = 0
+            self.bypassed = 0
+            self.evictions = 0
+            self.expirations = 0
+
+    def bind(self, model_fingerprint: str) -> None:
+        """Tie the cache to a model, dropping the entries of any other one"""
+        if model_fingerprint != self.model_fingerprint:
+            if self.model_fingerprint is not None:
+                logging.info(f"Model changed, invalidating {len(self)} cached predictions")
+            self.clear()
+            self.model_fingerprint = model_fingerprint
+
+    def __len__(self) -> int:
+        return 0 if self._keys is None else len(self._keys)
+
+    def _find(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions of `keys` in the entries and the mask of the keys present"""
+        if not len(self):
+            return np.zeros(len(keys), dtype=np.intp), np.zeros(len(keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        return positions, self._keys[positions] == keys
+
+    def _keep(self, keep: np.ndarray) -> None:
+        self._keys = self._keys[keep]
+        self._values = self._values[keep]
+        self._expires_at = self._expires_at[keep]
+        self._last_used = self._last_used[keep]
+
+    def get_many(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cached predictions of `keys` and the hit mask; the values at misses
+        are undefined
+        """
+        now = time.monotonic()
+        with self._lock:
+            positions, found = self._find(keys)
+            if len(self):
+                values = self._values[positions]
+                expired = found & (self._expires_at[positions] <= now)
+                found &= ~expired
+                self._tick += 1
+                self._last_used[positions[found]] = self._tick
+                if expired.any():
+                    keep = np.ones(len(self), dtype=bool)
+                    keep[positions[expired]] = False
+                    self.expirations += len(keep) - int(keep.sum())
+                    self._keep(keep)
+            else:
+                values = np.empty(len(keys), dtype=object)
+            n_hits = int(found.sum())
+            self.hits += n_hits
+            self.misses += len(keys) - n_hits
+        return values, found
+
+    def put_many(self, keys: np.ndarray, values) -> None:
+        expires_at = np.inf if self.ttl_seconds is None else time.monotonic() + self.ttl_seconds
+        keys, first = np.unique(keys, return_index=True)
+        values = np.asarray(values)[first]
+        with self._lock:
+            self._tick += 1
+            if not len(self):
+                self._keys, self._values = keys, values
+                self._expires_at = np.full(len(keys), expires_at)
+                self._last_used = np.full(len(keys), self._tick, dtype=np.int64)
+            else:
+                # Keys already present are refreshed in place, the others inserted in order
+                positions, present = self._find(keys)
+                self._values = self._values.astype(np.result_type(self._values, values), copy=False)
+                refreshed = positions[present]
+                self._values[refreshed] = values[present]
+                self._expires_at[refreshed] = expires_at
+                self._last_used[refreshed] = self._tick
+                keys, values = keys[~present], values[~present]
+                at = np.searchsorted(self._keys, keys)
+                self._keys = np.insert(self._keys, at, keys)
+                self._values = np.insert(self._values, at, values)
+                self._expires_at = np.insert(self._expires_at, at, expires_at)
+                self._last_used = np.insert(self._last_used, at, self._tick)
+            overflow = len(self) - self.max_entries
+            if overflow > 0:
+                keep = np.ones(len(self), dtype=bool)
+                keep[np.argpartition(self._last_used, overflow - 1)[:overflow]] = False
+                self._keep(keep)
+                self.evictions += overflow
+
+    def record_bypassed(self, n_rows: int) -> None:
+        with self._lock:
+            self.bypassed += n_rows
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self),
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __getstate__(self) -> dict:
+        return {"max_entries": self.max_entries, "ttl_seconds": self.ttl_seconds}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
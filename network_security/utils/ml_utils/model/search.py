@@ -0,0 +1,411 @@
+import sys
+import time
+import inspect
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from joblib import Parallel, delayed
+from sklearn.base import clone, is_classifier
+from sklearn.model_selection import ParameterGrid, check_cv
+from sklearn.utils.validation import has_fit_parameter
+
+from network_security.exception.exception import NetworkSecurityException
+from network_security.logging.logger import logging
+from network_security.utils.ml_utils.metric.classification import get_batch_scores
+
+
+def fit_weighted(model, X, y, sample_weight: Optional[np.ndarray] = None):
+    """
+    Fit `model` with integer `sample_weight` (the counts of deduplicated
+    rows). Estimators whose `fit` takes no sample_weight are fitted on the
+    rows repeated by their counts instead.
+    """
+    if sample_weight is None:
+        return model.fit(X, y)
+    if has_fit_parameter(model, "sample_weight"):
+        return model.fit(X, y, sample_weight=sample_weight)
+    repeats = np.asarray(sample_weight, dtype=np.intp)
+    return model.fit(np.repeat(X, repeats, axis=0), np.repeat(y, repeats))
+
+
+def _take_weights(sample_weight: Optional[np.ndarray], rows: np.ndarray) -> Optional[np.ndarray]:
+    return None if sample_weight is None else sample_weight[rows]
+
+
+def _fit_and_score(
+    estimator, params: dict, X, y, train: np.ndarray, test: np.ndarray, sample_weight=None
+) -> float:
+    model = clone(estimator).set_params(**params)
+    fit_weighted(model, X[train], y[train], _take_weights(sample_weight, train))
+    return float(model.score(X[test], y[test], sample_weight=_take_weights(sample_weight, test)))
+
+
+# Ensemble size parameter whose sweeps are fitted as one growing ensemble
+PATH_PARAMETER = "n_estimators"
+
+
+def supports_path_fitting(estimator) -> bool:
+    """
+    True for classifiers that can be scored at every `n_estimators` of a sweep
+    from a single growing ensemble: through `staged_predict` (boosting) or by
+    adding trees with `warm_start` (forests).
+    """
+    params = estimator.get_params()
+    return (
+        is_classifier(estimator)
+        and PATH_PARAMETER in params
+        and (hasattr(estimator, "staged_predict") or "warm_start" in params)
+    )
+
+
+def _fit_and_score_path(
+    estimator, params: dict, path: List[int], X, y, train: np.ndarray, test: np.ndarray,
+    sample_weight=None
+) -> List[float]:
+    """
+    Scores of `estimator` with `params` and each `n_estimators` of the
+    ascending `path`, from one ensemble grown to the largest of them. With a
+    fixed `random_state` they equal the scores of separate fits.
+    """
+    X_train, y_train, X_test, y_test = X[train], y[train], X[test], y[test]
+    w_train, w_test = _take_weights(sample_weight, train), _take_weights(sample_weight, test)
+    if hasattr(estimator, "staged_predict"):
+        model = clone(estimator).set_params(**params, **{PATH_PARAMETER: path[-1]})
+        fit_weighted(model, X_train, y_train, w_train)
+        checkpoints = set(path)
+        staged_preds = [
+            y_pred for stage, y_pred in enumerate(model.staged_predict(X_test), start=1)
+            if stage in checkpoints
+        ]
+        # Accuracy, as ClassifierMixin.score, of all checkpoints in one pass
+        if not staged_preds:
+            scores = []
+        elif w_test is None:
+            scores = get_batch_scores(y_test, np.stack(staged_preds))["accuracy"].tolist()
+        else:
+            scores = np.average(np.stack(staged_preds) == y_test, axis=1, weights=w_test).tolist()
+        # Boosting that stopped early (e.g. on a perfect fit) keeps its last stage
+        scores += [float(model.score(X_test, y_test, sample_weight=w_test))] * (len(path) - len(scores))
+        return scores
+
+    model = clone(estimator).set_params(**params, warm_start=True)
+    scores = []
+    for n_estimators in path:
+        fit_weighted(model.set_params(**{PATH_PARAMETER: n_estimators}), X_train, y_train, w_train)
+        scores.append(float(model.score(X_test, y_test, sample_weight=w_test)))
+    return scores
+
+
+def _fit_and_score_group(
+    estimator, params: List[dict], X, y, train: np.ndarray, test: np.ndarray, sample_weight=None
+) -> List[float]:
+    # A group is a single candidate or an n_estimators path of one estimator
+    if len(params) == 1:
+        return [_fit_and_score(estimator, params[0], X, y, train, test, sample_weight)]
+    base_params = {key: value for key, value in params[0].items() if key != PATH_PARAMETER}
+    path = [combination[PATH_PARAMETER] for combination in params]
+    return _fit_and_score_path(estimator, base_params, path, X, y, train, test, sample_weight)
+
+
+def _get_candidate_groups(
+    models: Dict, candidates: List[Tuple[str, dict]], path_fitting: bool
+) -> List[List[int]]:
+    """
+    Partition the candidates into fit tasks: with `path_fitting`, the
+    candidates of a path-fitting model that only differ by `n_estimators` form
+    one group ordered by it; every other candidate is a group of its own.
+    """
+    groups: Dict[tuple, List[int]] = {}
+    for c, (name, combination) in enumerate(candidates):
+        if path_fitting and PATH_PARAMETER in combination and supports_path_fitting(models[name]):
+            base_params = {key: value for key, value in combination.items() if key != PATH_PARAMETER}
+            key = (name, repr(sorted(base_params.items())))
+        else:
+            key = (c,)
+        groups.setdefault(key, []).append(c)
+    return [
+        sorted(group, key=lambda c: candidates[c][1].get(PATH_PARAMETER, 0))
+        for group in groups.values()
+    ]
+
+
+def _task_cost(params: dict) -> float:
+    # Fit time grows with the size of the ensemble
+    return float(params.get("n_estimators", 1))
+
+
+def get_candidates(models: Dict, params: Dict) -> List[Tuple[str, dict]]:
+    """Every (model name, parameter combination) of the grids, in GridSearchCV order"""
+    return [(name, dict(combination)) for name in models for combination in ParameterGrid(params[name])]
+
+
+def _score_candidates(
+    models: Dict, candidates: List[Tuple[str, dict]], X, y, cv_splitter,
+    n_jobs: int, deadline: Optional[float] = None, memo=None, path_fitting: bool = True,
+    sample_weight: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    (candidates x folds) matrix of the validation scores of every candidate on
+    every split of `cv_splitter`, fitted in parallel. With `path_fitting`, the
+    `n_estimators` sweep of a forest or boosting model is one task per fold
+    (see `_fit_and_score_path`). Candidates found in `memo` (a `CVMemo`) are
+    not refitted, and the others are added to it. Past `deadline` (a
+    `time.monotonic` value) no further task is started and the scores not
+    computed are NaN. With `sample_weight` (row counts), fits and scores
+    are weighted by it.
+    """
+    splits = list(cv_splitter.split(X, y))
+    fold_scores = np.full((len(candidates), len(splits)), np.nan)
+
+    data_fingerprint = None
+    if memo is not None:
+        data_fingerprint = memo.get_data_fingerprint(X, y, sample_weight)
+        for c, (name, combination) in enumerate(candidates):
+            memoized = memo.get_scores(data_fingerprint, models[name], combination, cv_splitter)
+            if memoized is not None and len(memoized) == len(splits):
+                fold_scores[c] = memoized
+        logging.info(f"{int((~np.isnan(fold_scores[:, 0])).sum())} of {len(candidates)} candidates memoized")
+
+    groups = _get_candidate_groups(models, candidates, path_fitting)
+    tasks = [
+        (g, f) for g, group in enumerate(groups) for f in range(len(splits))
+        if np.isnan(fold_scores[group, f]).any()
+    ]
+    # Without a deadline the longest fits go first, for the best load balance;
+    # with one the cheapest go first, so as many candidates as possible finish
+    direction = 1 if deadline is not None else -1
+    tasks.sort(key=lambda task: direction * _task_cost(candidates[groups[task[0]][-1]][1]))
+
+    results = Parallel(n_jobs=n_jobs, max_nbytes="1M", mmap_mode="r", return_as="generator")(
+        delayed(_fit_and_score_group)(
+            models[candidates[groups[g][0]][0]], [candidates[c][1] for c in groups[g]], X, y, *splits[f],
+            sample_weight
+        )
+        for g, f in tasks
+    )
+    memoized = ~np.isnan(fold_scores).any(axis=1)
+    for (g, f), scores in zip(tasks, results):
+        fold_scores[groups[g], f] = scores
+        for c in groups[g]:
+            if memo is not None and not memoized[c] and not np.isnan(fold_scores[c]).any():
+                name, combination = candidates[c]
+                memo.put_scores(data_fingerprint, models[name], combination, cv_splitter, fold_scores[c].tolist())
+                memoized[c] = True
+        if deadline is not None and time.monotonic() > deadline:
+            # Leaving the generator cancels the tasks still queued
+            logging.info("Search budget exhausted, pending fits are cancelled")
+            break
+    return fold_scores
+
+
+def _get_search_results(
+    models: Dict, candidates: List[Tuple[str, dict]], fold_scores: np.ndarray
+) -> Dict[str, dict]:
+    # Per model best combination, the first one of the grid on ties
+    results: Dict[str, dict] = {
+        name: {"best_params": None, "best_score": -np.inf, "cv_results": []} for name in models
+    }
+    for c, (name, combination) in enumerate(candidates):
+        if np.isnan(fold_scores[c]).any():
+            continue
+        mean_score = float(np.mean(fold_scores[c]))
+        result = results[name]
+        result["cv_results"].append((combination, mean_score, fold_scores[c].tolist()))
+        if mean_score > result["best_score"]:
+            result["best_params"], result["best_score"] = combination, mean_score
+    return results
+
+
+def parallel_grid_search(
+    models: Dict, params: Dict, X, y, cv: int = 3, n_jobs: int = -1, memo=None,
+    path_fitting: bool = True, sample_weight: Optional[np.ndarray] = None
+) -> Dict[str, dict]:
+    """
+    Exhaustive cross-validated search over the grids of all models at once.
+
+    Every (model, parameter combination, fold) fit is an independent task and
+    all of them are spread over one pool of `n_jobs` worker processes, longest
+    first. joblib hands `X` and `y` to the workers as read-only memory maps
+    (file-backed arrays are mapped in place, in-memory ones are dumped once),
+    so the data is not pickled per task.
+
+    Folds and scoring are those of `GridSearchCV(model, grid, cv=cv)`:
+    stratified folds without shuffling and the estimator's `score`; ties go to
+    the first combination of the grid. With `path_fitting`, each model's
+    `n_estimators` sweep is fitted as one growing ensemble per fold. With a
+    `memo` (a `CVMemo`), fold scores computed by earlier runs on the same
+    data are reused. `sample_weight` holds the counts of deduplicated rows:
+    the folds split the distinct rows, and fits and scores are weighted by
+    their counts (see `fit_weighted`). Returns, per model,
+    {"best_params", "best_score", "cv_results": [(params, mean score, fold scores)]}.
+    """
+    try:
+        cv_splitter = check_cv(cv, y, classifier=True)
+        candidates = get_candidates(models, params)
+        logging.info(
+            f"Searching {len(candidates)} candidates x {cv_splitter.get_n_splits()} folds with n_jobs={n_jobs}"
+        )
+
+        fold_scores = _score_candidates(
+            models, candidates, X, y, cv_splitter, n_jobs, memo=memo, path_fitting=path_fitting,
+            sample_weight=sample_weight
+        )
+        return _get_search_results(models, candidates, fold_scores)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+def _get_stratified_order(y, random_state: int) -> np.ndarray:
+    # Shuffled row order in which every prefix keeps the class proportions
+    y = np.asarray(y)
+    shuffled = np.random.default_rng(random_state).permutation(len(y))
+    ranks = np.empty(len(y))
+    for label in np.unique(y):
+        rows = shuffled[y[shuffled] == label]
+        ranks[rows] = (np.arange(len(rows)) + 0.5) / len(rows)
+    return np.argsort(ranks, kind="stable")
+
+
+def successive_halving_search(
+    models: Dict, params: Dict, X, y, cv: int = 3, n_jobs: int = -1,
+    factor: int = 3, resource: str = "n_estimators", min_samples: Optional[int] = None,
+    budget_seconds: Optional[float] = None, random_state: int = 42, memo=None,
+    path_fitting: bool = True, sample_weight: Optional[np.ndarray] = None
+) -> Dict[str, dict]:
+    """
+    Successive halving over the grids of all models at once.
+
+    Every rung cross-validates the surviving candidates with a larger
+    resource, and only the best `1 / factor` of them move on, so poor
+    configurations are dropped after a few cheap fits instead of being fully
+    fitted on every fold. Each rung is scored with the process pool of
+    `parallel_grid_search`. The resource is either
+
+    - "n_samples": the rows. The first rung scores every candidate on a small
+      stratified sample, each following one on `factor` times as many rows,
+      the last one on all of them. A model's best parameters are those of its
+      best candidate on the highest rung it reached.
+    - a parameter of the grids, e.g. "n_estimators": candidates are the grid
+      points without it and rung `i` fits them with its `i`-th smallest grid
+      value, on all rows. Candidates without the parameter are scored on the
+      first rung only. Every rung scores real grid points on the same data,
+      so a model's best parameters are those of its best scored grid point.
+
+    With `budget_seconds`, no fit is started once the budget is spent and the
+    search keeps the best parameters found so far; a model without any scored
+    candidate falls back to the first combination of its grid. A `memo` and
+    `sample_weight` are used as by `parallel_grid_search`.
+
+    Returns the same structure as `parallel_grid_search`, plus each model's
+    "n_samples" (rows its best parameters were scored on).
+    """
+    try:
+        deadline = None if budget_seconds is None else time.monotonic() + budget_seconds
+        n_rows = len(y)
+
+        if resource == "n_samples":
+            base_candidates = get_candidates(models, params)
+            if min_samples is None:
+                # Enough rows for every class in every fold
+                min_samples = 2 * cv * len(np.unique(y))
+            n_rungs = 1 + int(np.ceil(np.log(max(len(base_candidates), 1)) / np.log(factor)))
+            n_rungs = max(1, min(n_rungs, 1 + int(np.log(max(n_rows / min_samples, 1)) / np.log(factor))))
+            order = _get_stratified_order(y, random_state)
+        else:
+            grids = {
+                name: {key: values for key, values in params[name].items() if key != resource}
+                for name in models
+            }
+            base_candidates = get_candidates(models, grids)
+            resource_values = [sorted(params[name].get(resource, [None])) for name, _ in base_candidates]
+            n_rungs = max(len(values) for values in resource_values)
+
+        best: Dict[str, dict] = {}
+        alive = list(range(len(base_candidates)))
+        for rung in range(n_rungs):
+            if resource == "n_samples":
+                n_samples = n_rows if rung == n_rungs - 1 else n_rows // factor ** (n_rungs - 1 - rung)
+                rows = np.sort(order[:n_samples])
+                X_rung, y_rung, w_rung = X[rows], y[rows], _take_weights(sample_weight, rows)
+                rung_candidates = [base_candidates[c] for c in alive]
+            else:
+                n_samples, X_rung, y_rung, w_rung = n_rows, X, y, sample_weight
+                rung_candidates = []
+                for c in alive:
+                    name, combination = base_candidates[c]
+                    value = resource_values[c][rung]
+                    rung_candidates.append(
+                        (name, combination if value is None else {**combination, resource: value})
+                    )
+            cv_splitter = check_cv(cv, y_rung, classifier=True)
+            logging.info(
+                f"Halving rung {rung}: {len(rung_candidates)} candidates on {n_samples} rows"
+            )
+
+            fold_scores = _score_candidates(
+                models, rung_candidates, X_rung, y_rung, cv_splitter, n_jobs, deadline, memo, path_fitting,
+                w_rung
+            )
+            rung_results = _get_search_results(models, rung_candidates, fold_scores)
+            for name, result in rung_results.items():
+                if result["best_params"] is None:
+                    continue
+                if resource == "n_samples" or name not in best:
+                    best[name] = dict(result, n_samples=n_samples)
+                    continue
+                best[name]["cv_results"] += result["cv_results"]
+                if result["best_score"] > best[name]["best_score"]:
+                    best[name]["best_params"] = result["best_params"]
+                    best[name]["best_score"] = result["best_score"]
+
+            if deadline is not None and time.monotonic() > deadline:
+                logging.info(f"Search budget of {budget_seconds}s spent at rung {rung}")
+                break
+            # Only candidates with a larger resource left stay in the race
+            completed = ~np.isnan(fold_scores).any(axis=1)
+            mean_scores = np.where(completed, fold_scores.mean(axis=1), -np.inf)
+            racing = [
+                i for i, c in enumerate(alive)
+                if resource == "n_samples" or rung + 1 < len(resource_values[c])
+            ]
+            n_keep = int(np.ceil(len(racing) / factor))
+            # Stable sort: the first candidate of the grids wins ties
+            keep = sorted(racing, key=lambda i: -mean_scores[i])[:n_keep]
+            alive = [alive[i] for i in sorted(keep)]
+            if not alive:
+                break
+
+        results: Dict[str, dict] = {}
+        for name in models:
+            if name in best:
+                results[name] = best[name]
+            else:
+                logging.info(f"No candidate of {name} was scored within the budget, using its first grid point")
+                results[name] = {
+                    "best_params": dict(next(iter(ParameterGrid(params[name])))),
+                    "best_score": -np.inf,
+                    "cv_results": [],
+                    "n_samples": 0,
+                }
+        return results
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
+
+
+SEARCH_MODES = {
+    "grid": parallel_grid_search,
+    "halving": successive_halving_search,
+}
+
+
+def run_search(mode: str, models: Dict, params: Dict, X, y, **search_params) -> Dict[str, dict]:
+    """Run the hyperparameter search selected by `mode` (one of `SEARCH_MODES`)"""
+    try:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {mode!r}, expected one of {list(SEARCH_MODES)}")
+        search = SEARCH_MODES[mode]
+        # Options of the other modes (e.g. the halving budget) do not apply
+        accepted = inspect.signature(search).parameters
+        search_params = {key: value for key, value in search_params.items() if key in accepted}
+        return search(models, params, X, y, **search_params)
+    except Exception as e:
+        raise NetworkSecurityException(e, sys)
@@ -1,62 +1,227 @@
 import os
 import sys
-import json
-import certifi
+import time
+import struct
+import hashlib
+import argparse
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, ALL_COMPLETED, FIRST_COMPLETED, wait
+from typing import Iterator, List, Set, Tuple
 from dotenv import load_dotenv
 
-from pymongo.mongo_client import MongoClient
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
 
 from network_security.exception.exception import NetworkSecurityException
 from network_security.logging.logger import logging
+from network_security.utils.main_utils.utils import (
+    get_mongo_client,
+    read_yaml_file,
+    write_yaml_file,
+)
 
 load_dotenv()
 
 uri = os.getenv("MONGO_DB_URI")
-ca = certifi.where()
+
+DUPLICATE_KEY_ERROR_CODE = 11000
+CHECKPOINT_DIR = os.path.join("network_data", ".load_checkpoints")
 
 
 class NetworkDataExtractor:
-    def __init__(self) -> None:
+    """
+    Bulk loader for the phishing CSV.
+
+    The CSV is read in chunks of `batch_size` rows and each chunk is turned into
+    documents straight from its typed columns. Batches are written with
+    unordered `insert_many` calls by `num_writers` concurrent writers sharing
+    one pooled client.
+
+    Every document gets a deterministic `_id` built from the load start time,
+    a fingerprint of the file and the row number. The checkpoint file holding
+    the load start time is written before the first batch, and every batch is
+    recorded in it as soon as it finishes, even when another one failed.
+    Re-running a load that failed half way skips the finished batches and lets
+    the server reject any duplicate rows of the batches that were in flight,
+    so no row is inserted twice. Because the `_id`s start with the load start
+    time they also increase from one load to the next.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 10_000,
+        num_writers: int = 4,
+        checkpoint_dir: str = CHECKPOINT_DIR,
+    ) -> None:
         try:
-            pass
+            self.batch_size = batch_size
+            self.num_writers = num_writers
+            self.checkpoint_dir = checkpoint_dir
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    def convert_csv_to_json(self, file_path: str):
+    @staticmethod
+    def file_fingerprint(file_path: str) -> str:
         try:
-            data = pd.read_csv(file_path)
-            data.reset_index(drop=True, inplace=True)
-            records = list(json.loads(data.T.to_json()).values())
+            digest = hashlib.blake2b(digest_size=16)
+            with open(file_path, "rb") as file_obj:
+                for block in iter(lambda: file_obj.read(1 << 20), b""):
+                    digest.update(block)
+            return digest.hexdigest()
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
 
-            return records
+    @staticmethod
+    def build_documents(chunk: pd.DataFrame, ids: List[ObjectId]) -> List[dict]:
+        """Build documents column-wise, mapping missing values to None"""
+        try:
+            columns = []
+            for col in chunk.columns:
+                values = chunk[col].to_numpy()
+                if values.dtype.kind == "f":
+                    # Integer columns with gaps are parsed as float
+                    missing = np.isnan(values).tolist()
+                    cast = int if np.array_equal(values, np.round(values), equal_nan=True) else float
+                    columns.append(
+                        [None if m else cast(v) for v, m in zip(values.tolist(), missing)]
+                    )
+                else:
+                    columns.append(values.tolist())
+
+            names = ["_id"] + chunk.columns.to_list()
+            return [dict(zip(names, row)) for row in zip(ids, *columns)]
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
-    def insert_data_to_mongodb(self, records: list, db_name: str, collection_name: str):
+    def iter_batches(
+        self, file_path: str, load_timestamp: int, fingerprint: str,
+        skip_batches: Set[int] = frozenset(),
+    ) -> Iterator[Tuple[int, List[dict]]]:
         try:
-            self.db_name = db_name
-            self.collection_name = collection_name
-            self.records = records
-            self.client = MongoClient(uri)
+            prefix = struct.pack(">I", load_timestamp) + bytes.fromhex(fingerprint)[:4]
+            reader = pd.read_csv(file_path, chunksize=self.batch_size, na_values=["na"])
+            for batch_index, chunk in enumerate(reader):
+                if batch_index in skip_batches:
+                    continue
+                first_row = batch_index * self.batch_size
+                ids = [
+                    ObjectId(prefix + struct.pack(">I", row))
+                    for row in range(first_row, first_row + len(chunk))
+                ]
+                yield batch_index, self.build_documents(chunk, ids)
+        except Exception as e:
+            raise NetworkSecurityException(e, sys)
 
-            self.db_name = self.client[self.db_name]
-            self.collection_name = self.db_name[self.collection_name]
-            self.collection_name.insert_many(self.records)
+    @staticmethod
+    def insert_batch(collection, documents: List[dict]) -> int:
+        """Insert one batch unordered, treating duplicate keys as already loaded"""
+        try:
+            result = collection.insert_many(documents, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as bwe:
+            errors = bwe.details.get("writeErrors", [])
+            if any(error["code"] != DUPLICATE_KEY_ERROR_CODE for error in errors):
+                raise
+            return bwe.details.get("nInserted", 0)
 
-            return len(self.records)
+    def load_checkpoint(self, checkpoint_file_path: str) -> dict:
+        if os.path.exists(checkpoint_file_path):
+            return read_yaml_file(checkpoint_file_path)
+        return {"load_timestamp": int(time.time()), "completed_batches": []}
+
+    def insert_data_to_mongodb(
+        self, file_path: str, db_name: str, collection_name: str
+    ) -> dict:
+        try:
+            fingerprint = self.file_fingerprint(file_path)
+            checkpoint_file_path = os.path.join(
+                self.checkpoint_dir, f"{db_name}.{collection_name}.{fingerprint}.yaml"
+            )
+            checkpoint = self.load_checkpoint(checkpoint_file_path)
+            completed = set(checkpoint["completed_batches"])
+            if completed:
+                logging.info(
+                    f"Resuming load of {file_path}: {len(completed)} batches already loaded"
+                )
+
+            # Persist the load timestamp before any row is written, so a rerun
+            # after a failure rebuilds the same _ids
+            write_yaml_file(checkpoint_file_path, checkpoint)
+
+            collection = get_mongo_client(uri)[db_name][collection_name]
+            inserted = 0
+            started = time.perf_counter()
+
+            with ThreadPoolExecutor(max_workers=self.num_writers) as executor:
+                in_flight = {}
+
+                def drain(return_when) -> int:
+                    done, _ = wait(in_flight, return_when=return_when)
+                    if any(future.exception() is not None for future in done):
+                        # Let the other writers finish so their batches are recorded
+                        done, _ = wait(in_flight, return_when=ALL_COMPLETED)
+                    count, error = 0, None
+                    for future in done:
+                        batch_index = in_flight.pop(future)
+                        if future.exception() is not None:
+                            error = error or future.exception()
+                            continue
+                        count += future.result()
+                        completed.add(batch_index)
+                    checkpoint["completed_batches"] = sorted(completed)
+                    write_yaml_file(checkpoint_file_path, checkpoint)
+                    if error is not None:
+                        raise error
+                    return count
+
+                batches = self.iter_batches(
+                    file_path, checkpoint["load_timestamp"], fingerprint, set(completed)
+                )
+                try:
+                    for batch_index, documents in batches:
+                        # Bound the number of batches held in memory
+                        if len(in_flight) >= 2 * self.num_writers:
+                            inserted += drain(FIRST_COMPLETED)
+                        future = executor.submit(self.insert_batch, collection, documents)
+                        in_flight[future] = batch_index
+                finally:
+                    # Also record the batches in flight when reading the file failed
+                    if in_flight:
+                        inserted += drain(ALL_COMPLETED)
+
+            elapsed = time.perf_counter() - started
+            stats = {
+                "inserted": inserted,
+                "seconds": round(elapsed, 3),
+                "rows_per_sec": round(inserted / elapsed, 1) if elapsed else 0.0,
+            }
+            logging.info(f"Loaded {file_path} into {db_name}.{collection_name}: {stats}")
+
+            # The load is complete, a new run of the same file is a new load
+            if os.path.exists(checkpoint_file_path):
+                os.remove(checkpoint_file_path)
+            return stats
         except Exception as e:
             raise NetworkSecurityException(e, sys)
 
 
 if __name__ == "__main__":
-    FILE_PATH = os.path.join("network_data", "phisingData.csv")
-    DB_NAME = "NetworkSecurity"
-    COLLECTION_NAME = "PhishingData"
-    networkobject = NetworkDataExtractor()
-    records = networkobject.convert_csv_to_json(FILE_PATH)
-    if records is not None:
-        number_of_records = networkobject.insert_data_to_mongodb(
-            records, DB_NAME, COLLECTION_NAME
-        )
-        print(f"Number of records inserted to MongoDB: {number_of_records}")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file-path", default=os.path.join("network_data", "phisingData.csv"))
+    parser.add_argument("--db-name", default="NetworkSecurity")
+    parser.add_argument("--collection-name", default="PhishingData")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--num-writers", type=int, default=4)
+    args = parser.parse_args()
+
+    networkobject = NetworkDataExtractor(
+        batch_size=args.batch_size, num_writers=args.num_writers
+    )
+    stats = networkobject.insert_data_to_mongodb(
+        args.file_path, args.db_name, args.collection_name
+    )
+    print(
+        f"Number of records inserted to MongoDB: {stats['inserted']} "
+        f"({stats['rows_per_sec']:,.0f} rows/sec)"
+    )
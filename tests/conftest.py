@@ -0,0 +1,62 @@
+import os
+
+import mongomock
+import numpy as np
+import pandas as pd
+import pytest
+
+SAMPLE_FILE_PATH = os.path.join("network_data", "phisingData.csv")
+
+
+@pytest.fixture(scope="session")
+def sample_df() -> pd.DataFrame:
+    """The first rows of the sample CSV"""
+    return pd.read_csv(SAMPLE_FILE_PATH, nrows=400)
+
+
+@pytest.fixture
+def mongo_collection(sample_df, monkeypatch):
+    """
+    In-memory collection holding the sample rows as push_data stores them,
+    with a few cells missing or marked "na"; every client of the data
+    ingestion module gets it.
+    """
+    from network_security.components import data_ingestion
+
+    client = mongomock.MongoClient()
+    collection = client["NetworkSecurity"]["PhishingData"]
+    documents = sample_df.to_dict(orient="records")
+    rng = np.random.default_rng(0)
+    for doc in rng.choice(documents, 20, replace=False):
+        column = rng.choice(list(doc)[:-1])
+        if rng.random() < 0.5:
+            doc[column] = None
+        else:
+            doc[column] = "na"
+    collection.insert_many(documents)
+    monkeypatch.setattr(data_ingestion, "get_mongo_client", lambda uri: client)
+    return collection
+
+
+@pytest.fixture
+def ingestion_config(tmp_path):
+    """DataIngestionConfig writing below `tmp_path`"""
+    from network_security.entity.config import DataIngestionConfig, TrainingPipelineConfig
+
+    tp_config = TrainingPipelineConfig()
+    tp_config.artifact_dir_name = str(tmp_path / "Artifacts")
+    tp_config.artifact_dir = os.path.join(tp_config.artifact_dir_name, tp_config.timestamp)
+    config = DataIngestionConfig(tp_config)
+    config.drift_check = False
+    config.batch_size = 64
+    return config
+
+
+@pytest.fixture
+def validation_config(tmp_path):
+    """DataValidationConfig writing below `tmp_path`"""
+    from network_security.entity.config import DataValidationConfig, TrainingPipelineConfig
+
+    tp_config = TrainingPipelineConfig(in_memory_handoff=True)
+    tp_config.artifact_dir = str(tmp_path / "Artifacts" / tp_config.timestamp)
+    return DataValidationConfig(tp_config)
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from network_security.serving.batcher import MicroBatcher
+
+
+def double_all(items):
+    return [2 * item for item in items]
+
+
+def test_concurrent_requests_are_batched():
+    sizes = []
+
+    def predict_batch(items):
+        sizes.append(len(items))
+        return double_all(items)
+
+    batcher = MicroBatcher(predict_batch, max_batch_size=8, max_wait_ms=50).start()
+    futures = [batcher.submit(i) for i in range(20)]
+    assert [future.result(timeout=5) for future in futures] == [2 * i for i in range(20)]
+    batcher.stop()
+    assert max(sizes) == 8
+    assert batcher.stats.snapshot()["requests"] == 20
+
+
+def test_a_failing_batch_fails_all_its_requests():
+    def predict_batch(items):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(predict_batch, max_batch_size=4, max_wait_ms=20).start()
+    futures = [batcher.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+    batcher.stop()
+    assert batcher.stats.snapshot()["errors"] == 3
+
+
+def test_stop_answers_queued_requests_then_rejects_new_ones():
+    def slow_predict_batch(items):
+        time.sleep(0.01)
+        return double_all(items)
+
+    batcher = MicroBatcher(slow_predict_batch, max_batch_size=2, max_wait_ms=0).start()
+    futures = [batcher.submit(i) for i in range(10)]
+    batcher.stop()
+    assert all(future.done() for future in futures)
+    assert [future.result() for future in futures] == [2 * i for i in range(10)]
+    with pytest.raises(RuntimeError):
+        batcher.submit(1)
+
+
+def test_stop_fails_requests_no_worker_answered():
+    batcher = MicroBatcher(double_all)
+    future = batcher.submit(1)
+    batcher.stop()
+    with pytest.raises(RuntimeError):
+        future.result(timeout=0)
+
+
+def test_no_future_is_left_pending_when_stop_races_submit():
+    for _ in range(20):
+        batcher = MicroBatcher(double_all, max_batch_size=16, max_wait_ms=0).start()
+        futures, start = [], threading.Event()
+
+        def client():
+            start.wait()
+            for i in range(200):
+                try:
+                    futures.append(batcher.submit(i))
+                except RuntimeError:
+                    return
+
+        threads = [threading.Thread(target=client) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        batcher.stop()
+        for thread in threads:
+            thread.join()
+        assert all(future.done() for future in futures)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from sklearn.metrics import accuracy_score, f1_score, precision_score, r2_score, recall_score
+
+from network_security.utils.ml_utils.metric.classification import (
+    get_batch_scores,
+    get_classification_score,
+    get_threshold_scores,
+)
+
+SKLEARN_METRICS = {
+    "precision": lambda y_true, y_pred: precision_score(y_true, y_pred, zero_division=0),
+    "recall": lambda y_true, y_pred: recall_score(y_true, y_pred, zero_division=0),
+    "f1": lambda y_true, y_pred: f1_score(y_true, y_pred, zero_division=0),
+    "accuracy": accuracy_score,
+    "r2": r2_score,
+}
+
+
+@pytest.fixture
+def predictions():
+    rng = np.random.default_rng(3)
+    y_true = rng.integers(0, 2, 200)
+    y_preds = np.where(rng.random((12, 200)) < 0.8, y_true, 1 - y_true)
+    # Degenerate vectors: all negative, all positive and perfect
+    y_preds[0], y_preds[1], y_preds[2] = 0, 1, y_true
+    return y_true, y_preds
+
+
+def test_batch_scores_match_sklearn(predictions):
+    y_true, y_preds = predictions
+    scores = get_batch_scores(y_true, y_preds)
+    for name, metric in SKLEARN_METRICS.items():
+        expected = [metric(y_true, y_pred) for y_pred in y_preds]
+        np.testing.assert_allclose(scores[name], expected, rtol=1e-12, err_msg=name)
+
+
+def test_constant_target_r2_matches_sklearn():
+    y_true = np.ones(10, dtype=int)
+    y_preds = np.stack([np.ones(10, dtype=int), np.r_[np.ones(9, dtype=int), 0]])
+    expected = [r2_score(y_true, y_pred) for y_pred in y_preds]
+    np.testing.assert_array_equal(get_batch_scores(y_true, y_preds)["r2"], expected)
+
+
+def test_threshold_scores_match_thresholded_predictions(predictions):
+    y_true, _ = predictions
+    y_score = np.random.default_rng(4).random(len(y_true)).round(2)
+    thresholds = np.array([0.0, 0.25, 0.5, 0.51, 0.99, 1.5])
+    scores = get_threshold_scores(y_true, y_score, thresholds)
+    for i, threshold in enumerate(thresholds):
+        y_pred = (y_score >= threshold).astype(int)
+        for name in ("precision", "recall", "f1"):
+            assert scores[name][i] == pytest.approx(SKLEARN_METRICS[name](y_true, y_pred))
+
+
+def test_classification_score_of_one_vector(predictions):
+    y_true, y_preds = predictions
+    metric = get_classification_score(y_true, y_preds[5])
+    assert metric.f1_score == pytest.approx(f1_score(y_true, y_preds[5]))
+    assert metric.precision_score == pytest.approx(precision_score(y_true, y_preds[5]))
+    assert metric.recall_score == pytest.approx(recall_score(y_true, y_preds[5]))
@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from network_security.constants.training_pipeline import SCHEMA_FILE_PATH
+from network_security.utils.main_utils.utils import (
+    get_compact_dtype_plan,
+    get_invalid_value_marker,
+    get_missing_value_sentinel,
+    load_dataframe,
+    read_yaml_file,
+)
+
+
+def test_schema_plan_is_int8():
+    schema_config = read_yaml_file(SCHEMA_FILE_PATH)
+    plan = get_compact_dtype_plan(schema_config)
+    assert list(plan) == [name for column in schema_config["columns"] for name in column]
+    assert set(plan.values()) == {"Int8"}
+    assert set(get_compact_dtype_plan(schema_config, nullable=False).values()) == {"int8"}
+
+
+def test_plan_keeps_sentinel_and_marker_outside_the_domain():
+    schema_config = {
+        "columns": [{"a": "int64"}, {"b": "int64"}, {"c": "float64"}],
+        "allowed_values": {"a": [-1, 0, 1], "b": [0, 127]},
+    }
+    plan = get_compact_dtype_plan(schema_config, nullable=False)
+    # 127 is the int8 maximum, the invalid-value marker
+    assert plan == {"a": "int8", "b": "int16", "c": "float64"}
+    for name, domain in schema_config["allowed_values"].items():
+        assert get_missing_value_sentinel(plan[name]) not in domain
+        assert get_invalid_value_marker(plan[name]) not in domain
+
+
+def test_compact_frame_matches_default_read(tmp_path):
+    baseline = pd.read_csv(os.path.join("network_data", "phisingData.csv"), na_values=["na"])
+    plan = get_compact_dtype_plan(read_yaml_file(SCHEMA_FILE_PATH))
+    file_path = str(tmp_path / "data.csv")
+    with_missing = baseline.astype("float64")
+    with_missing.iloc[::13, 5] = np.nan
+    with_missing.to_csv(file_path, index=False, na_rep="na")
+
+    compact = load_dataframe(file_path, dtypes=plan)
+    assert (compact.dtypes == "Int8").all()
+    np.testing.assert_array_equal(
+        compact.to_numpy(dtype=np.float64, na_value=np.nan), with_missing.to_numpy()
+    )
+    # 1 byte per value plus the mask, against 8 bytes per value
+    assert compact.memory_usage(index=False).sum() * 4 == baseline.memory_usage(index=False).sum()
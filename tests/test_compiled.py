@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from network_security.constants.training_pipeline import TARGET_COLUMN
+from network_security.utils.ml_utils.model.compiled import compile_model
+
+MODELS = {
+    "tree": lambda: DecisionTreeClassifier(random_state=0),
+    "random_forest": lambda: RandomForestClassifier(n_estimators=20, random_state=0),
+    "extra_trees": lambda: ExtraTreesClassifier(n_estimators=20, random_state=0),
+    "boosting": lambda: GradientBoostingClassifier(n_estimators=20, random_state=0),
+}
+
+
+@pytest.fixture(scope="module")
+def data(sample_df):
+    X = sample_df.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float64)
+    y = sample_df[TARGET_COLUMN].to_numpy()
+    return X, y
+
+
+def inputs(X):
+    """The ternary rows (int8 path), scaled non-integer rows and rows with missing values"""
+    rng = np.random.default_rng(0)
+    with_missing = X.copy()
+    with_missing[rng.random(X.shape) < 0.1] = np.nan
+    return {"ternary": X, "float": X * 0.7 + 0.05, "missing": with_missing}
+
+
+@pytest.mark.parametrize("name", MODELS)
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_compiled_predictions_match_the_source_model(data, name, n_classes):
+    X, y = data
+    if n_classes == 3:
+        y = np.where(X[:, 0] == 0, 0, y)
+    model = MODELS[name]().fit(X, y)
+    compiled = compile_model(model)
+    assert compiled is not None
+
+    for input_name, X_input in inputs(X).items():
+        if input_name == "missing" and name == "boosting":
+            with pytest.raises(Exception):
+                compiled.predict(X_input)
+            continue
+        np.testing.assert_array_equal(compiled.predict(X_input), model.predict(X_input))
+        if compiled.kind == "forest":
+            np.testing.assert_array_equal(compiled.predict_proba(X_input), model.predict_proba(X_input))
+        if compiled.kind == "boosting":
+            np.testing.assert_array_equal(compiled.decision_function(X_input), model.decision_function(X_input))
+        # Single rows, as served
+        np.testing.assert_array_equal(compiled.predict(X_input[0]), model.predict(X_input[:1]))
+
+
+def test_tree_leaves_match_apply(data):
+    X, y = data
+    model = DecisionTreeClassifier(random_state=0).fit(X, y)
+    np.testing.assert_array_equal(compile_model(model).apply(X)[:, 0], model.apply(X.astype(np.float32)))
+
+
+def test_unsupported_models_are_not_compiled(data):
+    X, y = data
+    assert compile_model(LogisticRegression().fit(X, y)) is None
+    multi_output = DecisionTreeClassifier().fit(X, np.column_stack([y, y]))
+    assert compile_model(multi_output) is None
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.model_selection import StratifiedKFold
+from sklearn.tree import DecisionTreeClassifier
+
+from network_security.utils.ml_utils.model.cv_memo import CVMemo
+from network_security.utils.ml_utils.model.search import parallel_grid_search
+
+X = np.array([[-1, 0, 1], [1, 1, 0], [0, -1, -1], [1, 0, 1]] * 6, dtype=np.float64)
+y = np.array([0, 1, 0, 1] * 6)
+
+
+@pytest.fixture
+def memo(tmp_path):
+    return CVMemo(memo_dir=str(tmp_path / "cv_memo"), max_bytes=10**6, max_age_seconds=3600)
+
+
+def memo_files(memo):
+    return sorted(
+        os.path.join(dir_path, name)
+        for dir_path, _, names in os.walk(memo.memo_dir) for name in names
+    )
+
+
+def test_scores_hit_only_for_the_same_data_params_and_folds(memo):
+    estimator, cv = DecisionTreeClassifier(), StratifiedKFold(3)
+    fingerprint = memo.get_data_fingerprint(X, y)
+    assert memo.get_scores(fingerprint, estimator, {"max_depth": 2}, cv) is None
+    memo.put_scores(fingerprint, estimator, {"max_depth": 2}, cv, [0.5, 0.75, 1.0])
+
+    assert memo.get_scores(fingerprint, estimator, {"max_depth": 2}, cv) == [0.5, 0.75, 1.0]
+    assert memo.get_scores(fingerprint, estimator, {"max_depth": 3}, cv) is None
+    assert memo.get_scores(fingerprint, estimator, {"max_depth": 2}, StratifiedKFold(5)) is None
+    weighted = memo.get_data_fingerprint(X, y, np.full(len(y), 2))
+    assert memo.get_scores(weighted, estimator, {"max_depth": 2}, cv) is None
+    assert (memo.hits, memo.misses) == (1, 4)
+
+
+def test_estimator_round_trip(memo):
+    fingerprint = memo.get_data_fingerprint(X, y)
+    fitted = DecisionTreeClassifier(max_depth=2, random_state=0).fit(X, y)
+    memo.put_estimator(fingerprint, fitted)
+    loaded = memo.get_estimator(fingerprint, DecisionTreeClassifier(random_state=0), {"max_depth": 2})
+    np.testing.assert_array_equal(loaded.predict(X), fitted.predict(X))
+    assert memo.get_estimator(fingerprint, DecisionTreeClassifier(), {"max_depth": 2}) is None
+
+
+def test_search_reuses_memoized_scores(memo):
+    models = {"Decision Tree": DecisionTreeClassifier(random_state=0)}
+    params = {"Decision Tree": {"max_depth": [1, 2]}}
+    first = parallel_grid_search(models, params, X, y, n_jobs=1, memo=memo)
+    assert memo.hits == 0
+    second = parallel_grid_search(models, params, X, y, n_jobs=1, memo=memo)
+    assert memo.hits == 2
+    assert second == first
+
+
+def test_evict_drops_expired_then_least_recently_used(memo):
+    estimator, cv = DecisionTreeClassifier(), StratifiedKFold(3)
+    fingerprint = memo.get_data_fingerprint(X, y)
+    for depth in range(4):
+        memo.put_scores(fingerprint, estimator, {"max_depth": depth}, cv, [float(depth)] * 3)
+    files = memo_files(memo)
+    now = os.stat(files[0]).st_mtime
+    # depth 0 expired, then depths 1, 2, 3 from least to most recently used
+    ages = {0: 2 * memo.max_age_seconds, 1: 30, 2: 20, 3: 10}
+    for depth, age in ages.items():
+        key = memo._estimator_key(fingerprint, estimator, {"max_depth": depth}, "scores", repr(cv))
+        os.utime(memo._entry_path(key, memo.SCORES_EXTENSION), (now - age, now - age))
+    # A hit makes depth 1 the most recently used
+    assert memo.get_scores(fingerprint, estimator, {"max_depth": 1}, cv) == [1.0] * 3
+
+    memo.max_bytes = 2 * os.path.getsize(files[0])
+    assert memo.evict() == 2
+    assert memo.get_scores(fingerprint, estimator, {"max_depth": 0}, cv) is None
+    assert memo.get_scores(fingerprint, estimator, {"max_depth": 2}, cv) is None
+    assert memo.get_scores(fingerprint, estimator, {"max_depth": 1}, cv) == [1.0] * 3
+    assert memo.get_scores(fingerprint, estimator, {"max_depth": 3}, cv) == [3.0] * 3
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from network_security.components.data_ingestion import DataIngestion
+from network_security.utils.main_utils.utils import append_dataframe, load_dataframe
+
+# The full export must not rely on pandas' deprecated silent downcasting
+pytestmark = pytest.mark.filterwarnings("error::FutureWarning")
+
+
+def export(config, export_mode: str) -> pd.DataFrame:
+    config.export_mode = export_mode
+    return DataIngestion(config).export_collection_as_df()
+
+
+def test_streaming_export_matches_full_export(mongo_collection, ingestion_config):
+    full = export(ingestion_config, "full")
+    streamed = export(ingestion_config, "streaming")
+    assert full.isna().any().any()
+    pd.testing.assert_frame_equal(streamed, full)
+
+
+def test_parallel_export_matches_full_export(mongo_collection, ingestion_config):
+    full = export(ingestion_config, "full")
+    ingestion_config.num_workers = 3
+    parallel = export(ingestion_config, "parallel")
+    pd.testing.assert_frame_equal(parallel, full)
+
+
+def test_incremental_run_rolls_back_uncommitted_appends(mongo_collection, sample_df, ingestion_config):
+    ingestion = DataIngestion(ingestion_config)
+    feature_store_file_path = ingestion_config.incremental_feature_store_file_path
+    ingestion.initiate_incremental_data_ingestion()
+    committed = load_dataframe(feature_store_file_path, mmap=False)
+    assert len(committed) == mongo_collection.count_documents({})
+
+    # A run that crashed after appending, before committing its watermark
+    for file_path in [
+        ingestion_config.incremental_feature_store_file_path,
+        ingestion_config.incremental_training_file_path,
+    ]:
+        append_dataframe(file_path, committed.head(10))
+
+    mongo_collection.insert_many(sample_df.head(30).to_dict(orient="records"))
+    artifact = ingestion.initiate_incremental_data_ingestion()
+
+    store = load_dataframe(feature_store_file_path, mmap=False)
+    assert len(store) == mongo_collection.count_documents({})
+    pd.testing.assert_frame_equal(store.iloc[: len(committed)], committed)
+    n_train = len(load_dataframe(artifact.train_file_path, mmap=False))
+    n_test = len(load_dataframe(artifact.test_file_path, mmap=False))
+    assert n_train + n_test == len(store)
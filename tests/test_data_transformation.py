@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import KNNImputer
+from sklearn.pipeline import Pipeline
+
+from network_security.components.data_transformation import DataTransformation
+from network_security.constants.training_pipeline import TARGET_COLUMN
+from network_security.utils.main_utils.utils import load_numpy_array
+from network_security.utils.ml_utils.impute.imputer import ModeImputer
+
+
+@pytest.fixture
+def frame(sample_df):
+    features = sample_df.drop(columns=[TARGET_COLUMN]).astype("Int8")
+    features.iloc[::7, 3] = pd.NA
+    features.iloc[::11, 9] = pd.NA
+    return features, sample_df[TARGET_COLUMN].replace(-1, 0)
+
+
+@pytest.mark.parametrize(
+    "imputer, dtype",
+    # Modes are whole numbers, KNN averages of 3 neighbours are not
+    [(ModeImputer(), np.int8), (KNNImputer(n_neighbors=3), np.float32)],
+)
+def test_memmap_output_matches_dense_transform(frame, tmp_path, imputer, dtype):
+    features, target = frame
+    preprocessor = Pipeline([("imputer", imputer)]).fit(features)
+    file_path = str(tmp_path / "train.npy")
+    array = DataTransformation.write_transformed_array(file_path, preprocessor, features, target, chunk_size=64)
+
+    # The baseline: the whole frame through the preprocessor, then np.c_
+    baseline = np.c_[preprocessor.transform(features), np.array(target)]
+    assert isinstance(array, np.memmap) and array.dtype == dtype
+    np.testing.assert_array_equal(array, baseline.astype(dtype))
+    np.testing.assert_allclose(array, baseline, rtol=1e-6)
+    np.testing.assert_array_equal(load_numpy_array(file_path), array)
+
+
+def test_rows_without_missing_values_skip_the_preprocessor(frame, tmp_path):
+    features, target = frame
+
+    class CountingImputer(ModeImputer):
+        rows = 0
+
+        def transform(self, X):
+            CountingImputer.rows += len(X)
+            return super().transform(X)
+
+    preprocessor = Pipeline([("imputer", CountingImputer())]).fit(features)
+    DataTransformation.write_transformed_array(str(tmp_path / "train.npy"), preprocessor, features, target)
+    missing = features[features.isna().any(axis=1)]
+    # Copies of a row with missing values are imputed once
+    assert CountingImputer.rows == len(missing.drop_duplicates())
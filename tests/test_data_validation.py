@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from network_security.components.data_ingestion import DataIngestion
+from network_security.components.data_validation import DataValidation
+from network_security.entity.artifact import DataIngestionArtifact
+from network_security.pipeline.stage_cache import StageCache
+from network_security.utils.main_utils.utils import load_dataframe, read_yaml_file
+
+BAD_CELLS = {4: ("having_IP_Address", 5), 10: ("URL_Length", "abc"), 251: ("SSLfinal_State", 0.5), 261: ("Page_Rank", 300)}
+
+
+def test_failing_rows_are_quarantined(mongo_collection, sample_df, ingestion_config, validation_config):
+    for row, (col, value) in BAD_CELLS.items():
+        document = mongo_collection.find().sort("_id", 1).skip(row).limit(1)[0]
+        mongo_collection.update_one({"_id": document["_id"]}, {"$set": {col: value}})
+    dataframe = DataIngestion(ingestion_config).export_collection_as_df()
+    # Bad cells at even rows go to train, at odd rows to test
+    train_df, test_df = dataframe.iloc[::2], dataframe.iloc[1::2]
+
+    validation = DataValidation(
+        DataIngestionArtifact(train_file_path="", test_file_path="", train_df=train_df, test_df=test_df),
+        validation_config,
+    )
+    artifact = validation.initiate_data_validation()
+
+    assert artifact.validation_status
+    assert artifact.quarantined_rows == len(BAD_CELLS)
+    quarantined = pd.concat(
+        [load_dataframe(artifact.quarantine_train_file_path), load_dataframe(artifact.quarantine_test_file_path)]
+    )
+    np.testing.assert_array_equal(
+        quarantined.to_numpy(dtype=np.float64, na_value=np.nan),
+        dataframe.loc[sorted(BAD_CELLS)].to_numpy(dtype=np.float64, na_value=np.nan),
+    )
+    # Every row ends up either valid or quarantined
+    valid = pd.concat([artifact.train_df, artifact.test_df])
+    assert len(valid) + len(quarantined) == len(dataframe)
+    assert not set(valid.index) & set(BAD_CELLS)
+    pd.testing.assert_frame_equal(
+        valid.sort_index(), dataframe.drop(index=list(BAD_CELLS)).astype(valid.dtypes.to_dict())
+    )
+
+    report = read_yaml_file(artifact.quarantine_report_file_path)
+    assert report["train"]["failed_cells"] == {"having_IP_Address": 1, "URL_Length": 1}
+    assert report["test"]["failed_cells"] == {"SSLfinal_State": 1, "Page_Rank": 1}
+    # The exported cells that did not fit int8 hold the invalid-value marker
+    assert report["train"]["marked_cells"] == {"URL_Length": 1}
+    assert report["test"]["marked_cells"] == {"SSLfinal_State": 1, "Page_Rank": 1}
+
+
+@pytest.mark.parametrize(
+    "setting, value", [("drift_method", "psi"), ("drift_threshold", 0.01), ("psi_threshold", 0.1)]
+)
+def test_cache_key_covers_drift_settings(sample_df, validation_config, setting, value):
+    artifact = DataIngestionArtifact(
+        train_file_path="", test_file_path="", train_df=sample_df.iloc[::2], test_df=sample_df.iloc[1::2]
+    )
+    key = StageCache.make_key("data_validation", DataValidation(artifact, validation_config).get_cache_key_inputs())
+    setattr(validation_config, setting, value)
+    changed = StageCache.make_key(
+        "data_validation", DataValidation(artifact, validation_config).get_cache_key_inputs()
+    )
+    assert changed != key
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from network_security.utils.ml_utils.metric.drift import (
+    PSI_EPSILON,
+    get_category_counts,
+    get_discrete_drift,
+)
+
+CATEGORIES = np.array([-1.0, 0.0, 1.0])
+
+
+def random_frame(rng, n_rows: int, p: list) -> pd.DataFrame:
+    values = rng.choice(CATEGORIES, size=(n_rows, 6), p=p)
+    values[rng.random(values.shape) < 0.05] = np.nan
+    # One value outside the known categories
+    values[0, 0] = 5.0
+    return pd.DataFrame(values, columns=[f"f{i}" for i in range(6)])
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(7)
+    return random_frame(rng, 500, [0.3, 0.2, 0.5]), random_frame(rng, 300, [0.4, 0.2, 0.4])
+
+
+def test_drift_matches_scipy(frames):
+    base, current = frames
+    drift = get_discrete_drift(
+        get_category_counts(base, CATEGORIES), get_category_counts(current, CATEGORIES)
+    )
+    for i, col in enumerate(base.columns):
+        a, b = base[col].dropna(), current[col].dropna()
+        ks = stats.ks_2samp(a[a.isin(CATEGORIES)], b[b.isin(CATEGORIES)], method="asymp")
+        assert drift["ks_statistic"][i] == pytest.approx(ks.statistic)
+        assert drift["ks_p_value"][i] == pytest.approx(ks.pvalue)
+
+        table = pd.crosstab(
+            np.repeat([0, 1], [len(a), len(b)]), np.concatenate([a, b])
+        ).to_numpy()
+        chi2_statistic, chi2_p_value, _, _ = stats.chi2_contingency(table, correction=False)
+        assert drift["chi2_statistic"][i] == pytest.approx(chi2_statistic)
+        assert drift["chi2_p_value"][i] == pytest.approx(chi2_p_value)
+
+        # Known categories plus the "other" bucket, as shares
+        buckets = list(CATEGORIES) + [None]
+        expected = np.array([(a == c).mean() if c is not None else (~a.isin(CATEGORIES)).mean() for c in buckets])
+        actual = np.array([(b == c).mean() if c is not None else (~b.isin(CATEGORIES)).mean() for c in buckets])
+        expected, actual = np.maximum(expected, PSI_EPSILON), np.maximum(actual, PSI_EPSILON)
+        psi = np.sum((actual - expected) * np.log(actual / expected))
+        assert drift["psi"][i] == pytest.approx(psi)
+
+
+def test_identical_data_does_not_drift(frames):
+    base, _ = frames
+    counts = get_category_counts(base, CATEGORIES)
+    drift = get_discrete_drift(counts, counts)
+    assert np.all(drift["ks_statistic"] == 0)
+    assert np.allclose(drift["chi2_p_value"], 1.0)
+    assert np.allclose(drift["psi"], 0.0)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from network_security.components.data_ingestion import DataIngestion
+from network_security.constants.training_pipeline import TARGET_COLUMN
+from network_security.utils.main_utils.utils import (
+    deduplicate_rows,
+    get_row_groups,
+    grouped_train_test_split,
+)
+
+
+@pytest.fixture
+def features(sample_df) -> pd.DataFrame:
+    df = sample_df.drop(columns=[TARGET_COLUMN]).astype("Float64")
+    df.iloc[::11, 4] = pd.NA
+    return df
+
+
+def assert_same_partition(groups: np.ndarray, expected: np.ndarray):
+    # Same rows grouped together, whatever the ids
+    pairs = pd.DataFrame({"groups": groups, "expected": expected}).drop_duplicates()
+    assert pairs["groups"].is_unique and pairs["expected"].is_unique
+
+
+@pytest.mark.parametrize("ternary", [True, False])
+def test_row_groups_match_groupby(features, ternary):
+    if not ternary:
+        # Takes the np.unique path instead of the packed one
+        features = features * 1.5
+    expected = features.groupby(list(features.columns), dropna=False, sort=True).ngroup().to_numpy()
+    groups = get_row_groups(features)
+    assert_same_partition(groups, expected)
+    assert groups.max() + 1 == len(np.unique(expected))
+
+
+def test_grouped_split_keeps_groups_on_one_side(sample_df):
+    groups = get_row_groups(sample_df.drop(columns=[TARGET_COLUMN]))
+    # The sample has copies, or the test would prove nothing
+    assert len(np.unique(groups)) < len(sample_df)
+    train_df, test_df = grouped_train_test_split(sample_df, groups, test_size=0.2)
+
+    train_groups = set(groups[sample_df.index.get_indexer(train_df.index)])
+    test_groups = set(groups[sample_df.index.get_indexer(test_df.index)])
+    assert not train_groups & test_groups
+    assert sorted(train_df.index.append(test_df.index)) == list(sample_df.index)
+    assert len(test_df) >= 0.2 * len(sample_df)
+    assert len(test_df) < 0.2 * len(sample_df) + np.bincount(groups).max()
+
+
+def test_ingestion_grouped_split_does_not_leak(sample_df, ingestion_config):
+    ingestion_config.grouped_split = True
+    train_df, test_df = DataIngestion(ingestion_config)._train_test_split(sample_df)
+    features = [col for col in sample_df.columns if col != TARGET_COLUMN]
+    leaked = train_df[features].merge(test_df[features].drop_duplicates(), on=features)
+    assert leaked.empty
+
+
+def test_deduplicate_rows_counts_copies(sample_df):
+    X = sample_df.drop(columns=[TARGET_COLUMN]).to_numpy()
+    y = sample_df[TARGET_COLUMN].to_numpy()
+    X_unique, y_unique, counts = deduplicate_rows(X, y)
+
+    rows = pd.DataFrame(np.column_stack([X, y]))
+    expected = rows.value_counts(sort=False)
+    assert len(X_unique) == len(expected) and counts.sum() == len(X)
+    for row, target, count in zip(X_unique, y_unique, counts):
+        assert expected[tuple(row) + (target,)] == count
+    # Distinct rows come in the order of their first occurrence
+    first = rows.drop_duplicates().to_numpy()
+    np.testing.assert_array_equal(np.column_stack([X_unique, y_unique]), first)
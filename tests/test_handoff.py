@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from network_security.components import data_transformation, data_validation
+from network_security.components.data_ingestion import DataIngestion
+from network_security.components.data_transformation import DataTransformation
+from network_security.components.data_validation import DataValidation
+from network_security.entity.config import (
+    DataIngestionConfig,
+    DataTransformationConfig,
+    DataValidationConfig,
+    TrainingPipelineConfig,
+)
+from network_security.utils.main_utils.utils import (
+    load_dataframe,
+    load_numpy_array,
+    load_object,
+    read_yaml_file,
+    wait_for_background_writes,
+)
+
+
+def run_stages(artifact_dir: str, in_memory_handoff: bool):
+    """Ingestion, validation and transformation artifacts of one run"""
+    tp_config = TrainingPipelineConfig(in_memory_handoff=in_memory_handoff)
+    tp_config.artifact_dir_name = artifact_dir
+    tp_config.artifact_dir = os.path.join(artifact_dir, tp_config.timestamp)
+    ingestion_config = DataIngestionConfig(tp_config)
+    ingestion_config.drift_check = False
+    ingestion_config.grouped_split = False
+
+    ingestion_artifact = DataIngestion(ingestion_config).initiate_data_ingestion()
+    validation_artifact = DataValidation(
+        ingestion_artifact, DataValidationConfig(tp_config)
+    ).initiate_data_validation()
+    transformation_artifact = DataTransformation(
+        validation_artifact, DataTransformationConfig(tp_config)
+    ).initiate_data_transformation()
+    wait_for_background_writes()
+    return ingestion_artifact, validation_artifact, transformation_artifact
+
+
+@pytest.fixture
+def final_model_dir(tmp_path, monkeypatch):
+    """final_model/ below `tmp_path`"""
+    final_model_dir = tmp_path / "final_model"
+    monkeypatch.setattr(
+        data_validation, "REFERENCE_SKETCH_FILE_PATH", str(final_model_dir / "reference_sketch.yaml")
+    )
+    monkeypatch.setattr(
+        data_transformation, "FINAL_PREPROCESSOR_FILE_PATH", str(final_model_dir / "preprocessor.pkl")
+    )
+    return final_model_dir
+
+
+@pytest.fixture
+def runs(mongo_collection, tmp_path, final_model_dir):
+    return {
+        in_memory_handoff: run_stages(str(tmp_path / f"handoff-{in_memory_handoff}"), in_memory_handoff)
+        for in_memory_handoff in [True, False]
+    }
+
+
+def test_in_memory_handoff_matches_disk_round_trip(runs, sample_df):
+    memory_ingestion, memory_validation, memory_transformation = runs[True]
+    disk_ingestion, disk_validation, disk_transformation = runs[False]
+
+    # Nothing is handed over in memory without the handoff
+    assert disk_ingestion.train_df is None and disk_validation.train_df is None
+    assert disk_transformation.train_array is None and disk_transformation.preprocessor is None
+    assert memory_validation.validation_status and disk_validation.validation_status
+
+    # The frames handed over are the ones the next stage would read back
+    plan = memory_validation.train_df.dtypes.to_dict()
+    for df, file_path in [
+        (memory_ingestion.train_df, disk_ingestion.train_file_path),
+        (memory_ingestion.test_df, disk_ingestion.test_file_path),
+    ]:
+        pd.testing.assert_frame_equal(
+            df.astype(plan).reset_index(drop=True), load_dataframe(file_path, dtypes=plan)
+        )
+
+    for array, file_path in [
+        (memory_transformation.train_array, disk_transformation.transformed_train_file_path),
+        (memory_transformation.test_array, disk_transformation.transformed_test_file_path),
+    ]:
+        disk_array = load_numpy_array(file_path)
+        assert array.dtype == disk_array.dtype
+        np.testing.assert_array_equal(array, disk_array)
+
+    # The persisted preprocessor is the one handed over
+    X = sample_df.drop(columns=["Result"]).astype("float64")
+    X.iloc[::5, 3] = np.nan
+    np.testing.assert_array_equal(
+        memory_transformation.preprocessor.transform(X),
+        load_object(disk_transformation.transformed_object_file_path).transform(X),
+    )
+
+
+def test_stages_publish_nothing_before_the_model_is_persisted(runs, final_model_dir):
+    # final_model/ is only written by the pipeline's persist_artifacts stage
+    assert not final_model_dir.exists()
+    _, validation_artifact, transformation_artifact = runs[False]
+    DataValidation.export_reference_sketch(validation_artifact)
+    DataTransformation.export_final_preprocessor(transformation_artifact)
+    assert read_yaml_file(str(final_model_dir / "reference_sketch.yaml")) == read_yaml_file(
+        validation_artifact.reference_sketch_file_path
+    )
+    assert (final_model_dir / "preprocessor.pkl").read_bytes() == open(
+        transformation_artifact.transformed_object_file_path, "rb"
+    ).read()
@@ -0,0 +1,123 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import KNNImputer, SimpleImputer
+from sklearn.pipeline import Pipeline
+
+from network_security.components.data_transformation import DataTransformation
+from network_security.constants.training_pipeline import TARGET_COLUMN
+from network_security.utils.ml_utils.impute.imputer import (
+    BoundedKNNImputer,
+    ChunkedKNNImputer,
+    ConditionalModeImputer,
+    DiscreteImputer,
+    ModeImputer,
+    get_imputer,
+)
+
+
+@pytest.fixture(scope="module")
+def ternary(sample_df):
+    """Train and test rows of the ternary features, about 5% of the cells missing"""
+    X = sample_df.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float64)
+    X[np.random.default_rng(1).random(X.shape) < 0.05] = np.nan
+    return X[:300], X[300:]
+
+
+def check_fills_only_missing_cells(imputed, X):
+    observed = ~np.isnan(X)
+    assert imputed.shape == X.shape
+    assert not np.isnan(imputed).any()
+    np.testing.assert_array_equal(imputed[observed], X[observed])
+
+
+def test_discrete_imputer_is_abstract():
+    with pytest.raises(TypeError):
+        DiscreteImputer()
+
+
+@pytest.mark.parametrize("weights", ["uniform", "distance"])
+def test_chunked_knn_matches_knn_imputer(ternary, weights):
+    X_train, X_test = ternary
+    reference = KNNImputer(n_neighbors=3, weights=weights).fit(X_train)
+    # A tiny working memory forces many chunks
+    imputer = ChunkedKNNImputer(n_neighbors=3, weights=weights, working_memory=1).fit(X_train)
+    for X in (X_train, X_test):
+        np.testing.assert_allclose(imputer.transform(X), reference.transform(X), rtol=0, atol=1e-12)
+
+
+def test_mode_matches_most_frequent(ternary):
+    X_train, X_test = ternary
+    reference = SimpleImputer(strategy="most_frequent").fit(X_train)
+    imputer = ModeImputer().fit(X_train)
+    for X in (X_train, X_test):
+        imputed = imputer.transform(X)
+        check_fills_only_missing_cells(imputed, X)
+        np.testing.assert_array_equal(imputed, reference.transform(X))
+
+
+def test_conditional_mode_uses_the_best_predictor(ternary):
+    X_train, X_test = ternary
+    imputer = ConditionalModeImputer(chunk_size=64).fit(X_train)
+    imputed = imputer.transform(X_test)
+    check_fills_only_missing_cells(imputed, X_test)
+    # Imputed values stay in the ternary domain, unlike KNNImputer's averages
+    assert np.isin(imputed, [-1, 0, 1]).all()
+
+    for row, col in np.argwhere(np.isnan(X_test)):
+        predictor_value = X_test[row, imputer.predictors_[col]]
+        donors = X_train[:, imputer.predictors_[col]] == predictor_value
+        values, counts = np.unique(X_train[donors, col][~np.isnan(X_train[donors, col])], return_counts=True)
+        expected = values[np.argmax(counts)] if len(values) else imputer.modes_[col]
+        assert imputed[row, col] == expected
+
+
+def test_conditional_mode_recovers_a_copied_column(ternary):
+    X_train, _ = ternary
+    X = np.column_stack([X_train, X_train[:, 0]])
+    rows = np.flatnonzero(~np.isnan(X_train[:, 0]))[::10]
+    X[rows, -1] = np.nan
+    imputed = ConditionalModeImputer().fit(X).transform(X)
+    np.testing.assert_array_equal(imputed[rows, -1], X_train[rows, 0])
+
+
+def test_get_imputer_drops_unknown_params():
+    imputer = get_imputer("knn", {"n_neighbors": 5, "max_index_rows": 10})
+    assert isinstance(imputer, KNNImputer)
+    assert imputer.n_neighbors == 5
+
+
+@pytest.mark.parametrize("weights", ["uniform", "distance"])
+def test_bounded_knn_matches_knn_imputer_on_the_distinct_rows(ternary, weights):
+    X_train, X_test = ternary
+    distinct = np.unique(np.where(np.isnan(X_train), np.inf, X_train), axis=0)
+    distinct[np.isinf(distinct)] = np.nan
+    reference = KNNImputer(n_neighbors=3, weights=weights).fit(distinct)
+    # The index holds every distinct row, so nothing is sampled away
+    imputer = BoundedKNNImputer(n_neighbors=3, weights=weights, max_index_rows=len(distinct)).fit(X_train)
+    np.testing.assert_allclose(imputer.transform(X_test), reference.transform(X_test))
+
+
+def test_bounded_knn_index_does_not_grow_with_the_training_set(ternary):
+    X_train, X_test = ternary
+    small = BoundedKNNImputer(max_index_rows=50).fit(X_train)
+    large = BoundedKNNImputer(max_index_rows=50).fit(np.tile(X_train, (20, 1)))
+    assert small.fit_X_.shape == large.fit_X_.shape == (50, X_train.shape[1])
+    assert abs(len(pickle.dumps(large)) - len(pickle.dumps(small))) < 1024
+    check_fills_only_missing_cells(large.transform(X_test), X_test)
+    # The fallback means still come from every training row
+    np.testing.assert_allclose(small.col_means_, np.nanmean(X_train, axis=0))
+
+
+def test_serving_preprocessor_replaces_only_knn_imputers(ternary):
+    X_train, X_test = ternary
+    features = pd.DataFrame(X_train)
+    knn = Pipeline([("imputer", KNNImputer(n_neighbors=3))]).fit(features)
+    serving = DataTransformation.get_serving_transformer_object(knn, features)
+    assert isinstance(serving.named_steps["imputer"], BoundedKNNImputer)
+    check_fills_only_missing_cells(serving.transform(pd.DataFrame(X_test)), X_test)
+
+    mode = Pipeline([("imputer", ModeImputer())]).fit(features)
+    assert DataTransformation.get_serving_transformer_object(mode, features) is mode
@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from network_security.utils.main_utils.packing import (
+    get_packable_mask,
+    hamming_distances,
+    pack_rows,
+    unique_rows,
+    unpack_column,
+    unpack_rows,
+)
+from network_security.utils.main_utils.utils import _write_npy_columns_part, append_dataframe, load_dataframe
+
+
+def ternary_rows(n_rows: int, n_features: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    X = rng.choice([-1.0, 0.0, 1.0], size=(n_rows, n_features))
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X
+
+
+def test_pack_unpack_round_trip():
+    # 40 features take two words, the second one partly filled
+    X = ternary_rows(200, 40)
+    packed = pack_rows(X)
+    assert packed.shape == (200, 2) and packed.dtype == np.uint64
+    np.testing.assert_array_equal(unpack_rows(packed, 40), X)
+
+
+def test_unpack_column_matches_unpack_rows():
+    X = ternary_rows(200, 40)
+    packed = pack_rows(X)
+    for column in [0, 31, 32, 39]:
+        values, missing = unpack_column(packed, column, np.int8)
+        assert values.dtype == np.int8
+        np.testing.assert_array_equal(missing, np.isnan(X[:, column]))
+        np.testing.assert_array_equal(values, np.nan_to_num(unpack_rows(packed, 40)[:, column]))
+
+
+def test_packable_mask():
+    X = np.array([[1, 0, -1], [1, 2, -1], [np.nan, 0, 0]])
+    np.testing.assert_array_equal(get_packable_mask(X), [True, False, True])
+    np.testing.assert_array_equal(get_packable_mask(X, allow_missing=False), [True, False, False])
+
+
+def test_unique_rows_matches_np_unique():
+    X = ternary_rows(300, 3, seed=1)
+    X = np.where(np.isnan(X), 0, X)
+    packed = pack_rows(X)
+    unique, index, inverse, counts = unique_rows(
+        packed, return_index=True, return_inverse=True, return_counts=True
+    )
+    expected, expected_counts = np.unique(X, axis=0, return_counts=True)
+    # Packed rows order like the rows themselves
+    np.testing.assert_array_equal(unpack_rows(unique, 3), expected)
+    np.testing.assert_array_equal(counts, expected_counts)
+    np.testing.assert_array_equal(unique[inverse.ravel()], packed)
+    np.testing.assert_array_equal(packed[index], unique)
+
+
+def test_hamming_distances_match_float_comparison():
+    X = ternary_rows(30, 35, seed=2)
+    Y = ternary_rows(20, 35, seed=3)
+    distances = hamming_distances(pack_rows(X), pack_rows(Y))
+    # Missing matches missing and nothing else
+    equal = (X[:, None, :] == Y[None, :, :]) | (np.isnan(X)[:, None, :] & np.isnan(Y)[None, :, :])
+    np.testing.assert_array_equal(distances, (~equal).sum(axis=2))
+
+
+def test_npy_column_store_packs_ternary_columns(sample_df, tmp_path):
+    df = sample_df.head(50).astype("Int8")
+    df.iloc[::9, 3] = pd.NA
+    df.iloc[0, 5] = 7
+    file_path = str(tmp_path / "train.cols")
+    _write_npy_columns_part(file_path, df, pack_ternary=True)
+
+    part_path = os.path.join(file_path, "part-00000")
+    packed_columns = np.load(os.path.join(part_path, "packed_columns.npy")).tolist()
+    assert 5 not in packed_columns and len(packed_columns) == df.shape[1] - 1
+    assert not os.path.exists(os.path.join(part_path, "3.npy"))
+    assert os.path.exists(os.path.join(part_path, "5.npy"))
+
+    for mmap in [True, False]:
+        pd.testing.assert_frame_equal(load_dataframe(file_path, mmap=mmap), df)
+
+
+def test_npy_column_store_is_unpacked_and_memory_mapped_by_default(sample_df, tmp_path):
+    df = sample_df.head(50).astype("Int8")
+    df.iloc[::9, 3] = pd.NA
+    file_path = str(tmp_path / "train.cols")
+    append_dataframe(file_path, df)
+
+    assert not os.path.exists(os.path.join(file_path, "part-00000", "packed.npy"))
+    loaded = load_dataframe(file_path)
+    pd.testing.assert_frame_equal(loaded, df)
+    assert isinstance(loaded.iloc[:, 0].array._data, np.memmap)
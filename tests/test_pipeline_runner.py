@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+from network_security.entity.artifact import DataIngestionArtifact
+from network_security.exception.exception import NetworkSecurityException
+from network_security.pipeline.pipeline_runner import PipelineRunner, PipelineStage
+from network_security.utils.main_utils.utils import read_yaml_file
+
+
+def make_artifact(name: str) -> DataIngestionArtifact:
+    return DataIngestionArtifact(train_file_path=f"{name}/train.csv", test_file_path=f"{name}/test.csv")
+
+
+class Stages:
+    """A diamond a -> (b, c) -> d that records which stages ran with which inputs"""
+
+    def __init__(self, fail: set = frozenset()) -> None:
+        self.fail = set(fail)
+        self.calls = {}
+
+    def stage(self, name: str, *depends_on: str) -> PipelineStage:
+        def run(*inputs):
+            self.calls[name] = list(inputs)
+            if name in self.fail:
+                raise RuntimeError(f"{name} failed")
+            return make_artifact(name)
+
+        return PipelineStage(name, run, depends_on, DataIngestionArtifact)
+
+    def get_stages(self) -> list:
+        return [
+            self.stage("a"),
+            self.stage("b", "a"),
+            self.stage("c", "a"),
+            self.stage("d", "b", "c"),
+        ]
+
+
+def test_stages_receive_their_dependencies_artifacts(tmp_path):
+    stages = Stages()
+    results = PipelineRunner(str(tmp_path / "state.yaml")).run(stages.get_stages())
+    assert results == {name: make_artifact(name) for name in "abcd"}
+    assert stages.calls == {
+        "a": [], "b": [make_artifact("a")], "c": [make_artifact("a")], "d": [make_artifact("b"), make_artifact("c")]
+    }
+
+
+def test_sibling_stages_run_concurrently(tmp_path):
+    # Each sibling waits for the other one to start
+    barrier = threading.Barrier(2, timeout=5)
+
+    def sibling(_):
+        barrier.wait()
+
+    stages = [
+        PipelineStage("trainer", lambda: None),
+        PipelineStage("tracking", sibling, ["trainer"]),
+        PipelineStage("persist", sibling, ["trainer"]),
+    ]
+    PipelineRunner(str(tmp_path / "state.yaml"), max_workers=2).run(stages)
+
+
+def test_stage_timings_are_recorded(tmp_path):
+    state_file_path = str(tmp_path / "state.yaml")
+    stages = [
+        PipelineStage("slow", lambda: time.sleep(0.05)),
+        PipelineStage("fast", lambda _: None, ["slow"]),
+    ]
+    runner = PipelineRunner(state_file_path)
+    runner.run(stages)
+
+    assert set(runner.stage_timings) == {"slow", "fast"}
+    assert runner.stage_timings["slow"] >= 0.05
+    state = read_yaml_file(state_file_path)
+    assert state["status"] == "completed"
+    for name, seconds in runner.stage_timings.items():
+        assert state["stages"][name]["status"] == "completed"
+        assert state["stages"][name]["seconds"] == round(seconds, 3)
+
+
+def test_resume_after_failure_skips_completed_stages(tmp_path):
+    state_file_path = str(tmp_path / "state.yaml")
+    failing = Stages(fail={"c"})
+    with pytest.raises(NetworkSecurityException):
+        PipelineRunner(state_file_path).run(failing.get_stages())
+    state = read_yaml_file(state_file_path)
+    assert state["status"] == "failed"
+    assert state["stages"]["c"]["status"] == "failed"
+    assert "d" not in failing.calls and "d" not in state["stages"]
+
+    resumed = Stages()
+    results = PipelineRunner(state_file_path, resume=True).run(resumed.get_stages())
+    # Only the failed stage and the ones after it run again, with the recorded artifacts
+    assert set(resumed.calls) == {"c", "d"}
+    assert resumed.calls["c"] == [make_artifact("a")]
+    assert results["a"] == make_artifact("a") and results["b"] == make_artifact("b")
+    assert read_yaml_file(state_file_path)["status"] == "completed"
+
+
+def test_without_resume_every_stage_runs_again(tmp_path):
+    state_file_path = str(tmp_path / "state.yaml")
+    PipelineRunner(state_file_path).run(Stages().get_stages())
+    stages = Stages()
+    PipelineRunner(state_file_path).run(stages.get_stages())
+    assert set(stages.calls) == set("abcd")
+
+
+def test_unsatisfiable_dependencies_fail(tmp_path):
+    with pytest.raises(NetworkSecurityException, match="Unsatisfiable"):
+        PipelineRunner(str(tmp_path / "state.yaml")).run([PipelineStage("a", lambda _: None, ["missing"])])
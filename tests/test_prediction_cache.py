@@ -0,0 +1,170 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import SimpleImputer
+from sklearn.tree import DecisionTreeClassifier
+
+from network_security.constants.training_pipeline import TARGET_COLUMN
+from network_security.utils.ml_utils.model import prediction_cache as prediction_cache_module
+from network_security.utils.ml_utils.model.estimator import NetworkModel
+from network_security.utils.ml_utils.model.prediction_cache import PredictionCache, get_row_keys
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache_module.time, "monotonic", clock)
+    return clock
+
+
+def keys(*rows):
+    return get_row_keys(np.array(rows, dtype=np.float64))[1]
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    cache.put_many(keys([1, 0], [0, 1]), [1, -1])
+    clock.now += 59
+    values, found = cache.get_many(keys([1, 0], [0, 1], [1, 1]))
+    assert found.tolist() == [True, True, False]
+    assert values[:2].tolist() == [1, -1]
+
+    clock.now += 1
+    _, found = cache.get_many(keys([1, 0], [0, 1]))
+    assert not found.any()
+    snapshot = cache.snapshot()
+    assert (snapshot["hits"], snapshot["misses"], snapshot["expirations"], snapshot["entries"]) == (2, 3, 2, 0)
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = PredictionCache(max_entries=2, ttl_seconds=None)
+    cache.put_many(keys([1, 0], [0, 1]), [1, 2])
+    # Reading [1, 0] makes [0, 1] the least recently used entry
+    cache.get_many(keys([1, 0]))
+    cache.put_many(keys([1, 1]), [3])
+    values, found = cache.get_many(keys([1, 0], [0, 1], [1, 1]))
+    assert found.tolist() == [True, False, True]
+    assert values[[0, 2]].tolist() == [1, 3]
+    assert cache.snapshot()["evictions"] == 1
+    assert len(cache) == 2
+
+
+def test_binding_another_model_empties_the_cache():
+    cache = PredictionCache()
+    cache.bind("a")
+    cache.put_many(keys([1, 0]), [1])
+    cache.bind("a")
+    assert len(cache) == 1
+    cache.bind("b")
+    assert len(cache) == 0
+
+
+def test_pickled_cache_keeps_settings_only():
+    cache = PredictionCache(max_entries=5, ttl_seconds=7)
+    cache.put_many(keys([1, 0]), [1])
+    restored = pickle.loads(pickle.dumps(cache))
+    assert (restored.max_entries, restored.ttl_seconds, len(restored)) == (5, 7, 0)
+
+
+def test_only_fully_observed_ternary_rows_get_keys():
+    positions, row_keys = get_row_keys(np.array([[1, 0], [np.nan, 1], [2, 0], [-1, -1]]))
+    assert positions.tolist() == [0, 3]
+    assert len(set(row_keys.tolist())) == 2
+
+
+@pytest.fixture(scope="module")
+def frame(sample_df):
+    X = sample_df.drop(columns=[TARGET_COLUMN]).astype(np.float64)
+    X.iloc[::9, 4] = np.nan
+    return X, sample_df[TARGET_COLUMN].to_numpy()
+
+
+@pytest.mark.parametrize("labels", [None, {-1: "legitimate", 1: "phishing"}])
+def test_cached_predictions_equal_uncached_and_keep_the_dtype(frame, labels):
+    X, y = frame
+    if labels is not None:
+        y = np.array([labels[label] for label in y], dtype=object)
+    preprocessor = SimpleImputer(strategy="most_frequent").fit(X)
+    model = DecisionTreeClassifier(random_state=0).fit(preprocessor.transform(X), y)
+    reference = NetworkModel(preprocessor, model).predict(X)
+    network_model = NetworkModel(preprocessor, model, prediction_cache=PredictionCache())
+
+    first = network_model.predict(X)
+    misses = network_model.prediction_cache.snapshot()["misses"]
+    # Everything cacheable was seen: a batch of only cached rows
+    repeated = X[X.notna().all(axis=1)].iloc[::3]
+    second = network_model.predict(repeated)
+    for predictions, expected in ((first, reference), (second, reference[repeated.index])):
+        np.testing.assert_array_equal(predictions, expected)
+        assert predictions.dtype == expected.dtype
+
+    snapshot = network_model.prediction_cache.snapshot()
+    assert snapshot["misses"] == misses
+    assert snapshot["hits"] == len(repeated.drop_duplicates())
+    assert snapshot["bypassed"] == int(X.isna().any(axis=1).sum())
+
+
+def test_replacing_the_model_invalidates_the_cache(frame):
+    X, y = frame
+    preprocessor = SimpleImputer(strategy="most_frequent").fit(X)
+    X_fit = preprocessor.transform(X)
+    network_model = NetworkModel(
+        preprocessor, DecisionTreeClassifier(random_state=0).fit(X_fit, y), prediction_cache=PredictionCache()
+    )
+    network_model.predict(X)
+    network_model.model = DecisionTreeClassifier(max_depth=1, random_state=0).fit(X_fit, y)
+    np.testing.assert_array_equal(network_model.predict(X), network_model.model.predict(X_fit))
+
+
+def test_refitting_in_place_and_reassigning_invalidates_the_cache(frame):
+    X, y = frame
+    preprocessor = SimpleImputer(strategy="most_frequent").fit(X)
+    X_fit = preprocessor.transform(X)
+    model = DecisionTreeClassifier(random_state=0).fit(X_fit, y)
+    network_model = NetworkModel(preprocessor, model, prediction_cache=PredictionCache())
+    network_model.predict(X)
+    model.set_params(max_depth=1).fit(X_fit, y)
+    network_model.model = model
+    np.testing.assert_array_equal(network_model.predict(X), model.predict(X_fit))
+
+
+def test_pickled_model_keeps_its_fingerprint(frame):
+    X, y = frame
+    preprocessor = SimpleImputer(strategy="most_frequent").fit(X)
+    model = DecisionTreeClassifier(random_state=0).fit(preprocessor.transform(X), y)
+    network_model = NetworkModel(preprocessor, model, prediction_cache=PredictionCache())
+    network_model.predict(X)
+    restored = pickle.loads(pickle.dumps(network_model))
+    assert restored._model_fingerprint == network_model._model_fingerprint
+    np.testing.assert_array_equal(restored.predict(X), network_model.predict(X))
+
+
+def test_batches_match_a_dict_of_the_entries(clock):
+    rng = np.random.default_rng(0)
+    rows = rng.integers(-1, 2, size=(300, 6)).astype(np.float64)
+    _, row_keys = get_row_keys(rows)
+    cache = PredictionCache(max_entries=100, ttl_seconds=None)
+    reference = {}
+    for batch in np.array_split(rng.permutation(len(rows)), 10):
+        values, found = cache.get_many(row_keys[batch])
+        for key, value, hit in zip(row_keys[batch].tolist(), values.tolist(), found.tolist()):
+            assert hit == (key in reference) and (not hit or value == reference[key])
+        cache.put_many(row_keys[batch][~found], batch[~found])
+        for key, value in zip(row_keys[batch][~found].tolist(), batch[~found].tolist()):
+            reference.setdefault(key, value)
+        # Only the entries still cached are compared on the next batches
+        values, found = cache.get_many(np.array(list(reference), dtype=row_keys.dtype))
+        cached = [(key, value) for key, value, hit in zip(reference, values.tolist(), found.tolist()) if hit]
+        assert all(value == reference[key] for key, value in cached)
+        reference = dict(cached)
+        assert len(reference) == len(cache) <= 100
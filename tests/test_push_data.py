@@ -0,0 +1,45 @@
+import mongomock
+import pandas as pd
+import pytest
+
+import push_data
+from network_security.exception.exception import NetworkSecurityException
+
+
+@pytest.fixture
+def sample_csv(tmp_path):
+    file_path = tmp_path / "sample.csv"
+    pd.read_csv(push_data.os.path.join("network_data", "phisingData.csv"), nrows=250).to_csv(
+        file_path, index=False
+    )
+    return str(file_path)
+
+
+def test_rerun_after_failed_batch_inserts_every_row_once(sample_csv, tmp_path, monkeypatch):
+    client = mongomock.MongoClient()
+    collection = client["db"]["rows"]
+    monkeypatch.setattr(push_data, "get_mongo_client", lambda uri: client)
+
+    insert_many = mongomock.collection.Collection.insert_many
+    calls = []
+
+    def failing_second_batch(self, documents, *args, **kwargs):
+        calls.append(len(documents))
+        if len(calls) == 2:
+            raise RuntimeError("connection reset")
+        return insert_many(self, documents, *args, **kwargs)
+
+    extractor = push_data.NetworkDataExtractor(
+        batch_size=100, num_writers=1, checkpoint_dir=str(tmp_path / "checkpoints")
+    )
+    with monkeypatch.context() as patch:
+        patch.setattr(mongomock.collection.Collection, "insert_many", failing_second_batch)
+        with pytest.raises(NetworkSecurityException):
+            extractor.insert_data_to_mongodb(sample_csv, "db", "rows")
+    loaded = collection.count_documents({})
+    assert 0 < loaded < 250
+
+    stats = extractor.insert_data_to_mongodb(sample_csv, "db", "rows")
+    assert stats["inserted"] == 250 - loaded
+    assert collection.count_documents({}) == 250
+    assert not list((tmp_path / "checkpoints").iterdir())
@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+from sklearn.base import clone
+from sklearn.ensemble import (
+    AdaBoostClassifier,
+    ExtraTreesClassifier,
+    GradientBoostingClassifier,
+    RandomForestClassifier,
+)
+from sklearn.metrics import r2_score
+from sklearn.model_selection import GridSearchCV
+from sklearn.tree import DecisionTreeClassifier
+
+from network_security.constants.training_pipeline import TARGET_COLUMN
+from network_security.utils.main_utils.utils import evaluate_models
+from network_security.utils.ml_utils.model.search import parallel_grid_search, successive_halving_search
+
+
+@pytest.fixture(scope="module")
+def data(sample_df):
+    X = sample_df.drop(columns=[TARGET_COLUMN]).to_numpy(dtype=np.float64)
+    y = sample_df[TARGET_COLUMN].replace(-1, 0).to_numpy()
+    return X, y
+
+
+@pytest.fixture
+def grids():
+    models = {
+        "Random Forest": RandomForestClassifier(random_state=0),
+        "Decision Tree": DecisionTreeClassifier(random_state=0),
+    }
+    params = {
+        "Random Forest": {"max_depth": [2, 4, 6], "n_estimators": [4, 8, 16]},
+        "Decision Tree": {"max_depth": [1, 3]},
+    }
+    return models, params
+
+
+def grid_scores(result: dict) -> dict:
+    return {tuple(sorted(params.items())): score for params, score, _ in result["cv_results"]}
+
+
+def test_halving_on_a_grid_parameter_scores_real_grid_points(data, grids):
+    X, y = data
+    models, params = grids
+    reference = parallel_grid_search(models, params, X, y, n_jobs=1, path_fitting=False)
+    results = successive_halving_search(
+        models, params, X, y, n_jobs=1, factor=3, resource="n_estimators", path_fitting=False
+    )
+
+    forest = results["Random Forest"]
+    # 3 depths at 4 trees, the best one at 8 and then at 16 trees
+    assert [params["n_estimators"] for params, _, _ in forest["cv_results"]] == [4, 4, 4, 8, 16]
+    for name, result in results.items():
+        expected = grid_scores(reference[name])
+        for key, score in grid_scores(result).items():
+            assert score == pytest.approx(expected[key])
+        assert result["best_score"] == max(grid_scores(result).values())
+    # A model without the resource is scored on the first rung only, like the grid search
+    assert results["Decision Tree"]["best_params"] == reference["Decision Tree"]["best_params"]
+
+
+def test_halving_on_rows_ends_on_all_rows(data, grids):
+    X, y = data
+    models, params = grids
+    results = successive_halving_search(
+        models, params, X, y, n_jobs=1, factor=3, resource="n_samples", min_samples=20
+    )
+    forest = results["Random Forest"]
+    assert forest["n_samples"] == len(y)
+    assert len(forest["cv_results"]) == 1
+    assert forest["best_params"] in [dict(params) for params, _, _ in forest["cv_results"]]
+
+
+def test_spent_budget_falls_back_to_the_first_grid_point(data, grids):
+    X, y = data
+    models, params = grids
+    results = successive_halving_search(models, params, X, y, n_jobs=1, budget_seconds=0)
+    # At most one fold is fitted past the deadline, so no candidate is complete
+    for name, result in results.items():
+        assert result["cv_results"] == []
+        assert result["best_score"] == -np.inf
+        assert result["best_params"] == {key: values[0] for key, values in params[name].items()}
+
+
+def test_parallel_grid_search_matches_grid_search_cv(data, grids):
+    X, y = data
+    models, params = grids
+    results = parallel_grid_search(models, params, X, y, cv=3, n_jobs=2, path_fitting=False)
+    for name, model in models.items():
+        reference = GridSearchCV(model, params[name], cv=3).fit(X, y)
+        result = results[name]
+        assert result["best_params"] == reference.best_params_
+        assert result["best_score"] == pytest.approx(reference.best_score_)
+        assert [params for params, _, _ in result["cv_results"]] == reference.cv_results_["params"]
+        fold_scores = np.array([scores for _, _, scores in result["cv_results"]])
+        for fold in range(3):
+            np.testing.assert_allclose(fold_scores[:, fold], reference.cv_results_[f"split{fold}_test_score"])
+
+
+def test_evaluate_models_matches_sequential_grid_search(data, grids):
+    X, y = data
+    X_train, y_train, X_test, y_test = X[:300], y[:300], X[300:], y[300:]
+    models, params = grids
+
+    # The sequential loop evaluate_models replaces
+    expected = {}
+    for name, model in models.items():
+        reference = GridSearchCV(clone(model), params[name], cv=3).fit(X_train, y_train)
+        fitted = clone(model).set_params(**reference.best_params_).fit(X_train, y_train)
+        expected[name] = (r2_score(y_test, fitted.predict(X_test)), fitted.predict(X_test))
+
+    searched = {name: clone(model) for name, model in models.items()}
+    report = evaluate_models(X_train, y_train, X_test, y_test, searched, params, cv=3, n_jobs=2, path_fitting=False)
+    assert list(report) == list(models)
+    for name, (score, y_pred) in expected.items():
+        assert report[name] == pytest.approx(score)
+        # Every model is replaced by its best estimator, fitted on all training rows
+        np.testing.assert_array_equal(searched[name].predict(X_test), y_pred)
+
+
+@pytest.mark.parametrize(
+    "estimator",
+    [
+        # Forests grow with warm_start, boosting is scored per stage
+        RandomForestClassifier(random_state=0),
+        ExtraTreesClassifier(random_state=0),
+        GradientBoostingClassifier(random_state=0, subsample=0.8),
+        AdaBoostClassifier(random_state=0),
+    ],
+    ids=lambda estimator: type(estimator).__name__,
+)
+@pytest.mark.parametrize("weighted", [False, True])
+def test_path_fitting_matches_independent_fits(data, estimator, weighted):
+    X, y = data
+    sample_weight = np.random.default_rng(0).integers(1, 4, len(y)) if weighted else None
+    models = {"model": estimator}
+    params = {"model": {"max_depth": [1, 3], "n_estimators": [2, 5, 10]}}
+    if isinstance(estimator, AdaBoostClassifier):
+        params["model"] = {"learning_rate": [0.5, 1.0], "n_estimators": [2, 5, 10]}
+
+    path = parallel_grid_search(models, params, X, y, n_jobs=1, path_fitting=True, sample_weight=sample_weight)
+    independent = parallel_grid_search(
+        models, params, X, y, n_jobs=1, path_fitting=False, sample_weight=sample_weight
+    )
+    assert path["model"]["best_params"] == independent["model"]["best_params"]
+    for (params_path, _, scores_path), (params_fit, _, scores_fit) in zip(
+        path["model"]["cv_results"], independent["model"]["cv_results"]
+    ):
+        assert params_path == params_fit
+        np.testing.assert_allclose(scores_path, scores_fit)
@@ -0,0 +1,88 @@
+import os
+
+import pandas as pd
+import pytest
+
+from network_security.entity.artifact import DataIngestionArtifact
+from network_security.pipeline.stage_cache import StageCache
+from network_security.utils.main_utils.utils import get_fingerprint, load_dataframe, save_dataframe
+
+
+class Component:
+    """Stage stand-in counting how often it really runs"""
+
+    def __init__(self, tmp_path, inputs: list) -> None:
+        self.tmp_path = tmp_path
+        self.inputs = inputs
+        self.runs = 0
+
+    def get_cache_key_inputs(self) -> list:
+        return self.inputs
+
+    def initiate(self) -> DataIngestionArtifact:
+        self.runs += 1
+        file_paths = []
+        for name in ["train.csv", "test.csv"]:
+            file_path = str(self.tmp_path / f"run-{self.runs}" / name)
+            save_dataframe(file_path, pd.DataFrame({"a": [self.runs]}))
+            file_paths.append(file_path)
+        return DataIngestionArtifact(train_file_path=file_paths[0], test_file_path=file_paths[1])
+
+
+def run(cache: StageCache, component: Component, hits: list) -> DataIngestionArtifact:
+    return cache.run("stage", component, component.initiate, DataIngestionArtifact, on_hit=hits.append)
+
+
+@pytest.fixture
+def cache(tmp_path) -> StageCache:
+    return StageCache(cache_dir=str(tmp_path / "cache"), enabled=True)
+
+
+def test_hit_after_commit(cache, tmp_path, sample_df):
+    component, hits = Component(tmp_path, [sample_df, {"threshold": 0.05}]), []
+    run(cache, component, hits)
+    # Entries are only written by commit
+    latest = run(cache, component, hits)
+    assert component.runs == 2 and not hits
+
+    cache.commit()
+    again = run(cache, Component(tmp_path, [sample_df.copy(), {"threshold": 0.05}]), hits)
+    assert hits == [again] and again == latest
+
+
+def test_changed_inputs_miss(cache, tmp_path, sample_df):
+    run(cache, Component(tmp_path, [sample_df, {"threshold": 0.05}]), [])
+    cache.commit()
+    changed = sample_df.copy()
+    changed.iloc[0, 0] = -changed.iloc[0, 0]
+    for inputs in [[changed, {"threshold": 0.05}], [sample_df, {"threshold": 0.01}]]:
+        component, hits = Component(tmp_path, inputs), []
+        run(cache, component, hits)
+        assert component.runs == 1 and not hits
+
+
+def test_entry_with_missing_files_is_ignored(cache, tmp_path):
+    component, hits = Component(tmp_path, [1]), []
+    artifact = run(cache, component, hits)
+    cache.commit()
+    os.remove(artifact.test_file_path)
+    run(cache, component, hits)
+    assert component.runs == 2 and not hits
+
+
+def test_disabled_cache_always_runs(tmp_path):
+    cache = StageCache(cache_dir=str(tmp_path / "cache"), enabled=False)
+    component = Component(tmp_path, [1])
+    run(cache, component, [])
+    cache.commit()
+    run(cache, component, [])
+    assert component.runs == 2 and not os.path.exists(tmp_path / "cache")
+
+
+@pytest.mark.parametrize("file_name", ["data.csv", "data.cols"])
+def test_fingerprint_is_the_same_in_memory_and_on_disk(sample_df, tmp_path, file_name):
+    df = sample_df.astype("Int8")
+    file_path = str(tmp_path / file_name)
+    save_dataframe(file_path, df)
+    loaded = load_dataframe(file_path, dtypes=df.dtypes.astype(str).to_dict())
+    assert get_fingerprint(loaded, {"a": 1}) == get_fingerprint(df, {"a": 1})
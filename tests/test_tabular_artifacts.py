@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from network_security.utils.main_utils.utils import (
+    append_dataframe,
+    get_dataframe_marker,
+    load_dataframe,
+    truncate_dataframe,
+)
+
+ARTIFACT_FILE_NAMES = ["train.csv", "train.cols"]
+
+
+@pytest.fixture
+def frame(sample_df) -> pd.DataFrame:
+    df = sample_df.head(60).astype("Int8")
+    df.iloc[::7, 2] = pd.NA
+    return df
+
+
+@pytest.mark.parametrize("file_name", ARTIFACT_FILE_NAMES)
+def test_append_truncate_load_round_trip(frame, tmp_path, file_name):
+    file_path = str(tmp_path / file_name)
+    dtypes = {col: "Int8" for col in frame.columns}
+
+    append_dataframe(file_path, frame.iloc[:25])
+    marker = get_dataframe_marker(file_path)
+    append_dataframe(file_path, frame.iloc[25:])
+    pd.testing.assert_frame_equal(load_dataframe(file_path, dtypes=dtypes), frame.reset_index(drop=True))
+
+    truncate_dataframe(file_path, marker)
+    assert get_dataframe_marker(file_path) == marker
+    pd.testing.assert_frame_equal(load_dataframe(file_path, dtypes=dtypes), frame.iloc[:25])
+
+    append_dataframe(file_path, frame.iloc[25:])
+    pd.testing.assert_frame_equal(load_dataframe(file_path, dtypes=dtypes), frame)
+
+
+def test_npy_columns_keep_dtypes_and_missing_values(frame, tmp_path):
+    file_path = str(tmp_path / "train.cols")
+    append_dataframe(file_path, frame.iloc[:30])
+    append_dataframe(file_path, frame.iloc[30:])
+    for mmap in [True, False]:
+        loaded = load_dataframe(file_path, mmap=mmap)
+        pd.testing.assert_frame_equal(loaded, frame)
+
+    truncate_dataframe(file_path, 0)
+    assert get_dataframe_marker(file_path) == 0
+    append_dataframe(file_path, frame)
+    pd.testing.assert_frame_equal(load_dataframe(file_path), frame)